@@ -17,7 +17,7 @@ from app.errors import (
     ForbiddenRequest,
     InvalidUsage,
 )
-from app.util import KitchenOwlJSONProvider
+from app.util import KitchenOwlJSONProvider, ResponseCompressor
 from oic.oic import Client
 from oic.oic.message import RegistrationResponse
 from oic.utils.authn.client import CLIENT_AUTHN_METHOD
@@ -40,6 +40,8 @@ PROJECT_DIR = os.path.dirname(APP_DIR)
 
 STORAGE_PATH = os.getenv("STORAGE_PATH", PROJECT_DIR)
 UPLOAD_FOLDER = STORAGE_PATH + "/upload"
+EXPORT_FOLDER = STORAGE_PATH + "/export"
+IMPORT_FOLDER = STORAGE_PATH + "/import"
 ALLOWED_FILE_EXTENSIONS = {"txt", "pdf", "png", "jpg", "jpeg", "gif", "webp", "jxl"}
 
 FRONT_URL = os.getenv("FRONT_URL")
@@ -62,6 +64,40 @@ DB_URL = URL.create(
 )
 MESSAGE_BROKER = os.getenv("MESSAGE_BROKER")
 
+# number of serialized responses kept per process, 0 disables the cache
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "512"))
+# optional cache shared between workers, e.g. redis://localhost:6379/1
+RESPONSE_CACHE_URL = os.getenv("RESPONSE_CACHE_URL")
+# socket events per household kept for clients that reconnect
+SOCKET_REPLAY_BUFFER_SIZE = int(os.getenv("SOCKET_REPLAY_BUFFER_SIZE", "100"))
+# how long entries of the household change feed are kept
+CHANGE_FEED_RETENTION = timedelta(
+    days=int(os.getenv("CHANGE_FEED_RETENTION_DAYS", "30"))
+)
+# how long background export archives are kept for download
+EXPORT_ARCHIVE_RETENTION = timedelta(
+    hours=int(os.getenv("EXPORT_ARCHIVE_RETENTION_HOURS", "24"))
+)
+# unfinished export archives not written to for this long have failed
+EXPORT_ARCHIVE_TIMEOUT = timedelta(
+    minutes=int(os.getenv("EXPORT_ARCHIVE_TIMEOUT_MINUTES", "30"))
+)
+# background jobs run in parallel by each process without MESSAGE_BROKER
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+# jobs waiting or running per process before new ones are rejected
+JOB_QUEUE_SIZE = int(os.getenv("JOB_QUEUE_SIZE", "32"))
+# pending or running jobs without progress for this long are failed, e.g.
+# because the process running them was stopped
+JOB_TIMEOUT = timedelta(minutes=int(os.getenv("JOB_TIMEOUT_MINUTES", "60")))
+# how long background job records are kept
+JOB_RETENTION = timedelta(days=int(os.getenv("JOB_RETENTION_DAYS", "7")))
+# gzip level (1-9) of compressed responses, 0 disables response compression
+COMPRESS_LEVEL = int(os.getenv("COMPRESS_LEVEL", "6"))
+# brotli quality (0-11), used when the client accepts brotli
+COMPRESS_BROTLI_QUALITY = int(os.getenv("COMPRESS_BROTLI_QUALITY", "4"))
+# responses smaller than this (in bytes) are not compressed
+COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", "1024"))
+
 JWT_ACCESS_TOKEN_EXPIRES = timedelta(minutes=15)
 JWT_REFRESH_TOKEN_EXPIRES = timedelta(days=int(os.getenv("JWT_REFRESH_TOKEN_EXPIRES", "30")))
 
@@ -139,6 +175,10 @@ convention = {
 
 metadata = MetaData(naming_convention=convention)
 
+response_compressor = ResponseCompressor(
+    COMPRESS_MIN_SIZE, COMPRESS_LEVEL, COMPRESS_BROTLI_QUALITY
+)
+
 db = SQLAlchemy(app, metadata=metadata)
 migrate = Migrate(app, db, render_as_batch=True)
 bcrypt = Bcrypt(app)
@@ -261,6 +301,15 @@ if DB_URL.drivername == "sqlite":
         listen(db.engine, "connect", load_extension)
 
 
+# registered first, so it runs after every other after_request handler
+@app.after_request
+def compress_response(response):
+    encoding = response_compressor.negotiate(response, request.accept_encodings)
+    if encoding:
+        response_compressor.apply(response, encoding)
+    return response
+
+
 @app.after_request
 def add_cors_headers(response):
     if not request.referrer:
@@ -273,12 +322,34 @@ def add_cors_headers(response):
         response.headers.add("Access-Control-Allow-Headers", "Cache-Control")
         response.headers.add("Access-Control-Allow-Headers", "X-Requested-With")
         response.headers.add("Access-Control-Allow-Headers", "Authorization")
+        response.headers.add("Access-Control-Allow-Headers", "If-None-Match")
         response.headers.add(
             "Access-Control-Allow-Methods", "GET, POST, OPTIONS, PUT, DELETE"
         )
+        response.headers.add("Access-Control-Expose-Headers", "ETag")
+        response.headers.add("Access-Control-Expose-Headers", "X-Next-Cursor")
     return response
 
 
+@app.after_request
+def add_etag(response):
+    """
+    Strong ETags for JSON GET responses that did not set one already (see
+    cache_household_response), unchanged bodies are answered with 304
+    """
+    if (
+        request.method != "GET"
+        or response.status_code != 200
+        or response.is_streamed
+        or response.mimetype != "application/json"
+    ):
+        return response
+    if "ETag" not in response.headers:
+        response.add_etag()
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response.make_conditional(request)
+
+
 @app.errorhandler(Exception)
 def unhandled_exception(e: Exception):
     if type(e) is NotFoundRequest:
@@ -12,5 +12,6 @@ from .tag import *
 from .upload import *
 from .household import *
 from .category import *
+from .job import *
 from .health_controller import health
 from .analytics import *
@@ -1,4 +1,4 @@
-from app.helpers import validate_args, authorize_household
+from app.helpers import validate_args, authorize_household, cache_household_response
 from flask import jsonify, Blueprint
 from app.errors import NotFoundRequest
 from flask_jwt_extended import jwt_required
@@ -12,6 +12,7 @@ categoryHousehold = Blueprint("category", __name__)
 @categoryHousehold.route("", methods=["GET"])
 @jwt_required()
 @authorize_household()
+@cache_household_response()
 def getAllCategories(household_id):
     return jsonify([e.obj_to_dict() for e in Category.all_by_ordering(household_id)])
 
@@ -1,17 +1,38 @@
-import calendar
-from datetime import datetime, timezone, timedelta
-from dateutil.relativedelta import relativedelta
+from datetime import date, datetime, time, timezone, timedelta
+from dateutil.relativedelta import relativedelta, MO
 from sqlalchemy.sql.expression import desc
-from sqlalchemy import or_
-from app.errors import NotFoundRequest
+from sqlalchemy import and_, or_
+from app.errors import NotFoundRequest, InvalidUsage
 from flask import jsonify, Blueprint
 from flask_jwt_extended import current_user, jwt_required
-from sqlalchemy import func
 from app import db
-from app.helpers import validate_args, authorize_household, RequiredRights
-from app.models import Expense, ExpensePaidFor, ExpenseCategory, HouseholdMember
-from app.service.recalculate_balances import recalculateBalances
+from app.helpers import (
+    validate_args,
+    authorize_household,
+    cache_household_response,
+    RequiredRights,
+)
+from sqlalchemy.orm import joinedload, selectinload
+from app.models import (
+    Expense,
+    ExpensePaidFor,
+    ExpenseCategory,
+    ExpenseRollup,
+    HouseholdMember,
+)
+from app.service.recalculate_balances import (
+    recalculateBalances,
+    applyBalanceDeltas,
+    applyExpenseToBalances,
+    expenseBalanceDeltas,
+)
+from app.service.expense_rollup import (
+    applyExpenseToRollup,
+    expenseShares,
+    rebuildExpenseRollup,
+)
 from app.service.file_has_access_or_download import file_has_access_or_download
+from app.util.cursor import encode_cursor, decode_cursor
 from .schemas import (
     GetExpenses,
     AddExpense,
@@ -24,6 +45,9 @@ from .schemas import (
 expense = Blueprint("expense", __name__)
 expenseHousehold = Blueprint("expense", __name__)
 
+EXPENSE_PAGE_SIZE = 30
+EXPENSE_PAGE_SIZE_MAX = 200
+
 
 @expenseHousehold.route("", methods=["GET"])
 @jwt_required()
@@ -31,6 +55,21 @@ expenseHousehold = Blueprint("expense", __name__)
 @validate_args(GetExpenses)
 def getAllExpenses(args, household_id):
     filter = [Expense.household_id == household_id]
+    if "cursor" in args:
+        # keyset on (date, id), stable even if dates are equal
+        cursorDate, cursorId = decode_cursor(args["cursor"], 2)
+        try:
+            cursorDate = datetime.fromisoformat(cursorDate)
+        except (TypeError, ValueError):
+            raise InvalidUsage("Invalid cursor")
+        if not isinstance(cursorId, int):
+            raise InvalidUsage("Invalid cursor")
+        filter.append(
+            or_(
+                Expense.date < cursorDate,
+                and_(Expense.date == cursorDate, Expense.id < cursorId),
+            )
+        )
     if "startAfterId" in args:
         filter.append(Expense.id < args["startAfterId"])
     if "startAfterDate" in args:
@@ -69,17 +108,27 @@ def getAllExpenses(args, household_id):
             query = "%{0}%".format(args["search"])
         filter.append(Expense.name.ilike(query))
 
-    return jsonify(
-        [
-            e.obj_to_full_dict()
-            for e in Expense.query.order_by(desc(Expense.date))
-            .filter(*filter)
-            .join(Expense.category, isouter=True)
-            .limit(30)
-            .all()
-        ]
+    limit = min(args.get("limit", EXPENSE_PAGE_SIZE), EXPENSE_PAGE_SIZE_MAX)
+    expenses = (
+        Expense.query.order_by(desc(Expense.date), desc(Expense.id))
+        .filter(*filter)
+        .options(
+            joinedload(Expense.category),
+            joinedload(Expense.photo_file),
+            selectinload(Expense.paid_for),
+        )
+        .limit(limit + 1)
+        .all()
     )
 
+    response = jsonify([e.obj_to_full_dict() for e in expenses[:limit]])
+    if len(expenses) > limit:
+        last = expenses[limit - 1]
+        response.headers["X-Next-Cursor"] = encode_cursor(
+            last.date.isoformat(), last.id
+        )
+    return response
+
 
 @expense.route("/<int:id>", methods=["GET"])
 @jwt_required()
@@ -96,7 +145,8 @@ def getExpenseById(id):
 @authorize_household()
 @validate_args(AddExpense)
 def addExpense(args, household_id):
-    member = HouseholdMember.find_by_ids(household_id, args["paid_by"]["id"])
+    members = {m.user_id: m for m in HouseholdMember.find_by_household(household_id)}
+    member = members.get(args["paid_by"]["id"])
     if not member:
         raise NotFoundRequest()
     expense = Expense()
@@ -116,26 +166,24 @@ def addExpense(args, household_id):
     if "exclude_from_statistics" in args:
         expense.exclude_from_statistics = args["exclude_from_statistics"]
     expense.paid_by_id = member.user_id
-    expense.save()
-    member.expense_balance = (member.expense_balance or 0) + expense.amount
-    member.save()
-    factor_sum = 0
-    for user_data in args["paid_for"]:
-        if HouseholdMember.find_by_ids(household_id, user_data["id"]):
-            factor_sum += user_data["factor"]
     for user_data in args["paid_for"]:
-        member_for = HouseholdMember.find_by_ids(household_id, user_data["id"])
+        member_for = members.get(user_data["id"])
         if member_for:
             con = ExpensePaidFor(
                 factor=user_data["factor"],
             )
             con.user_id = member_for.user_id
-            con.expense = expense
-            con.save()
-            member_for.expense_balance = (member_for.expense_balance or 0) - (
-                con.factor / factor_sum
-            ) * expense.amount
-            member_for.save()
+            expense.paid_for.append(con)
+
+    try:
+        db.session.add(expense)
+        db.session.flush()  # apply column defaults like the date
+        applyExpenseToBalances(expense)
+        applyExpenseToRollup(expense)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        raise e
     return jsonify(expense.obj_to_dict())
 
 
@@ -148,6 +196,13 @@ def updateExpense(args, id):  # noqa: C901
         raise NotFoundRequest()
     expense.checkAuthorized()
 
+    members = {
+        m.user_id: m for m in HouseholdMember.find_by_household(expense.household_id)
+    }
+    # remove the previous state of the expense from the balances
+    deltas = expenseBalanceDeltas(expense, sign=-1)
+    applyExpenseToRollup(expense, sign=-1)
+
     if "name" in args:
         expense.name = args["name"]
     if "amount" in args:
@@ -167,21 +222,20 @@ def updateExpense(args, id):  # noqa: C901
     if "exclude_from_statistics" in args:
         expense.exclude_from_statistics = args["exclude_from_statistics"]
     if "paid_by" in args:
-        member = HouseholdMember.find_by_ids(
-            expense.household_id, args["paid_by"]["id"]
-        )
+        member = members.get(args["paid_by"]["id"])
         if member:
             expense.paid_by_id = member.user_id
-    expense.save()
     if "paid_for" in args:
-        for con in expense.paid_for:
-            user_ids = [e["id"] for e in args["paid_for"]]
-            if con.user.id not in user_ids:
-                con.delete()
+        user_ids = [e["id"] for e in args["paid_for"]]
+        for con in list(expense.paid_for):
+            if con.user_id not in user_ids:
+                expense.paid_for.remove(con)
         for user_data in args["paid_for"]:
-            member = HouseholdMember.find_by_ids(expense.household_id, user_data["id"])
+            member = members.get(user_data["id"])
             if member:
-                con = ExpensePaidFor.find_by_ids(expense.id, member.user_id)
+                con = next(
+                    (e for e in expense.paid_for if e.user_id == member.user_id), None
+                )
                 if con:
                     if "factor" in user_data and user_data["factor"]:
                         con.factor = user_data["factor"]
@@ -189,10 +243,19 @@ def updateExpense(args, id):  # noqa: C901
                     con = ExpensePaidFor(
                         factor=user_data["factor"],
                     )
-                    con.expense = expense
                     con.user_id = member.user_id
-                con.save()
-    recalculateBalances(expense.household_id)
+                    expense.paid_for.append(con)
+
+    for user_id, delta in expenseBalanceDeltas(expense).items():
+        deltas[user_id] = deltas.get(user_id, 0) + delta
+    try:
+        db.session.add(expense)
+        applyBalanceDeltas(expense.household_id, deltas)
+        applyExpenseToRollup(expense)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        raise e
     return jsonify(expense.obj_to_dict())
 
 
@@ -204,8 +267,14 @@ def deleteExpenseById(id):
         raise NotFoundRequest()
     expense.checkAuthorized()
 
-    expense.delete()
-    recalculateBalances(expense.household_id)
+    try:
+        applyExpenseToBalances(expense, sign=-1)
+        applyExpenseToRollup(expense, sign=-1)
+        db.session.delete(expense)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        raise e
     return jsonify({"msg": "DONE"})
 
 
@@ -214,11 +283,14 @@ def deleteExpenseById(id):
 @authorize_household(required=RequiredRights.ADMIN)
 def calculateBalances(household_id):
     recalculateBalances(household_id)
+    rebuildExpenseRollup(household_id)
+    return jsonify({"msg": "DONE"})
 
 
 @expenseHousehold.route("/categories", methods=["GET"])
 @jwt_required()
 @authorize_household()
+@cache_household_response()
 def getExpenseCategories(household_id):
     return jsonify(
         [
@@ -231,122 +303,82 @@ def getExpenseCategories(household_id):
 @expenseHousehold.route("/overview", methods=["GET"])
 @jwt_required()
 @authorize_household()
+@cache_household_response(
+    per_user=True, vary=lambda: datetime.now(timezone.utc).date().isoformat()
+)
 @validate_args(GetExpenseOverview)
 def getExpenseOverview(args, household_id):
-    thisMonthStart = datetime.now(timezone.utc).date().replace(day=1)
+    today = datetime.now(timezone.utc).date()
 
     steps = args["steps"] if "steps" in args else 5
-    frame = args["frame"] if args["frame"] != None else 2
+    frame = args["frame"] if args.get("frame") != None else 2
     page = args["page"] if "page" in args and args["page"] != None else 0
+    personal = "view" in args and args["view"] == 1
 
-    factor = 1
-    by_category_query = (
-        Expense.query.filter(
-            Expense.household_id == household_id,
-            Expense.exclude_from_statistics == False,
-        )
-        .group_by(Expense.category_id, ExpenseCategory.id)
-        .join(Expense.category, isouter=True)
-    )
-
-    groupByStr = "YYYY-MM" if "postgresql" in db.engine.name else "%Y-%m"
-    if frame < 3:
-        groupByStr += "-DD" if "postgresql" in db.engine.name else "-%d"
-    if frame < 1:
-        groupByStr += " HH24" if "postgresql" in db.engine.name else " %H"
-
-    by_subframe_query = Expense.query.filter(
-        Expense.household_id == household_id,
-        Expense.exclude_from_statistics == False,
-    ).group_by(
-        func.to_char(Expense.date, groupByStr).label("day")
-        if "postgresql" in db.engine.name
-        else func.strftime(groupByStr, Expense.date)
-    )
-
-    if "view" in args and args["view"] == 1:
-        filterQuery = (
-            db.session.query(ExpensePaidFor.expense_id)
-            .filter(ExpensePaidFor.user_id == current_user.id)
-            .scalar_subquery()
-        )
-
-        s1 = (
-            ExpensePaidFor.query.with_entities(
-                ExpensePaidFor.expense_id.label("expense_id"),
-                func.sum(ExpensePaidFor.factor).label("total"),
-            )
-            .group_by(ExpensePaidFor.expense_id)
-            .subquery()
-        )
-        s2 = (
-            ExpensePaidFor.query.with_entities(
-                ExpensePaidFor.expense_id.label("expense_id"),
-                (ExpensePaidFor.factor.cast(db.Float) / s1.c.total).label("factor"),
-            )
-            .filter(ExpensePaidFor.user_id == current_user.id)
-            .join(s1, ExpensePaidFor.expense_id == s1.c.expense_id)
-            .subquery()
-        )
-
-        factor = s2.c.factor
-
-        by_category_query = by_category_query.filter(Expense.id.in_(filterQuery)).join(
-            s2
-        )
-        by_subframe_query = by_subframe_query.filter(Expense.id.in_(filterQuery)).join(
-            s2
-        )
-
-    def getFilterForStepAgo(stepAgo: int):
-        start = None
-        end = None
+    def getRangeForStepAgo(stepAgo: int) -> tuple[date, date]:
         if frame == 0:  # daily
-            start = datetime.now(timezone.utc).date() - timedelta(days=stepAgo)
-            end = start + timedelta(hours=24)
+            start = today - timedelta(days=stepAgo)
+            end = start + timedelta(days=1)
         elif frame == 1:  # weekly
-            start = datetime.now(timezone.utc).date() - relativedelta(
-                days=7, weekday=calendar.MONDAY, weeks=stepAgo
-            )
+            start = today + relativedelta(weekday=MO(-1), weeks=-stepAgo)
             end = start + timedelta(days=7)
         elif frame == 2:  # monthly
-            start = thisMonthStart - relativedelta(months=stepAgo)
+            start = today.replace(day=1) - relativedelta(months=stepAgo)
             end = start + relativedelta(months=1)
-        elif frame == 3:  # yearly
-            start = datetime.now(timezone.utc).date().replace(day=1, month=1) - relativedelta(
-                years=stepAgo
-            )
+        else:  # yearly
+            start = today.replace(day=1, month=1) - relativedelta(years=stepAgo)
             end = start + relativedelta(years=1)
+        return start, end
 
-        return Expense.date >= start, Expense.date <= end
-
-    def getOverviewForStepAgo(stepAgo: int):
-        return {
-            "by_category": {
-                (e.id or -1): (float(e.balance) or 0)
-                for e in by_category_query.with_entities(
-                    ExpenseCategory.id.label("id"),
-                    func.sum(Expense.amount * factor).label("balance"),
-                )
-                .filter(*getFilterForStepAgo(stepAgo))
-                .all()
-            },
-            "by_subframe": {
-                e.day: (float(e.balance) or 0)
-                for e in by_subframe_query.with_entities(
-                    func.to_char(Expense.date, groupByStr).label("day")
-                    if "postgresql" in db.engine.name
-                    else func.strftime(groupByStr, Expense.date).label("day"),
-                    func.sum(Expense.amount * factor).label("balance"),
-                )
-                .filter(*getFilterForStepAgo(stepAgo))
-                .all()
-            },
-        }
-
-    byStep = {
-        i: getOverviewForStepAgo(i) for i in range(page * steps, steps + page * steps)
+    ranges = {
+        i: getRangeForStepAgo(i) for i in range(page * steps, steps + page * steps)
     }
+    windowStart = min(start for start, _ in ranges.values())
+    windowEnd = max(end for _, end in ranges.values())
+    byStep = {i: {"by_category": {}, "by_subframe": {}} for i in ranges}
+
+    def addToStep(day: date, subframe: str, category_id: int | None, amount: float):
+        for i, (start, end) in ranges.items():
+            if start <= day < end:
+                by_category = byStep[i]["by_category"]
+                by_category[category_id or -1] = (
+                    by_category.get(category_id or -1, 0) + amount
+                )
+                by_subframe = byStep[i]["by_subframe"]
+                by_subframe[subframe] = by_subframe.get(subframe, 0) + amount
+                return
+
+    if frame == 0:
+        # hourly buckets are not part of the rollup, the window only spans a few days
+        for e in (
+            Expense.query.filter(
+                Expense.household_id == household_id,
+                Expense.exclude_from_statistics == False,
+                Expense.date
+                >= datetime.combine(windowStart, time.min, tzinfo=timezone.utc),
+                Expense.date
+                < datetime.combine(windowEnd, time.min, tzinfo=timezone.utc),
+            )
+            .options(selectinload(Expense.paid_for))
+            .all()
+        ):
+            amount = expenseShares(e).get(current_user.id if personal else None)
+            if amount is None:
+                continue
+            addToStep(
+                e.date.date(), e.date.strftime("%Y-%m-%d %H"), e.category_id, amount
+            )
+    else:
+        subframeFormat = "%Y-%m" if frame == 3 else "%Y-%m-%d"
+        for day, category_id, amount in ExpenseRollup.query.with_entities(
+            ExpenseRollup.day, ExpenseRollup.category_id, ExpenseRollup.amount
+        ).filter(
+            ExpenseRollup.household_id == household_id,
+            ExpenseRollup.user_id == (current_user.id if personal else None),
+            ExpenseRollup.day >= windowStart,
+            ExpenseRollup.day < windowEnd,
+        ):
+            addToStep(day, day.strftime(subframeFormat), category_id, amount)
 
     return jsonify(byStep)
 
@@ -374,6 +406,7 @@ def deleteExpenseCategoryById(id):
         raise NotFoundRequest()
     category.checkAuthorized()
     category.delete()
+    rebuildExpenseRollup(category.household_id)
     return jsonify({"msg": "DONE"})
 
 
@@ -399,5 +432,6 @@ def updateExpenseCategory(args, id):
         mergeCategory = ExpenseCategory.find_by_id(args["merge_category_id"])
         if mergeCategory:
             category.merge(mergeCategory)
+            rebuildExpenseRollup(category.household_id)
 
     return jsonify(category.obj_to_dict())
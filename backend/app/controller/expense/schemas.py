@@ -17,6 +17,9 @@ class GetExpenses(Schema):
     endBeforeDate = fields.Integer(validate=lambda a: a >= 0)
     filter = MultiDictList(CustomInteger(allow_none=True))
     search = fields.String(allow_none=True)
+    # opaque cursor returned in the X-Next-Cursor header
+    cursor = fields.String()
+    limit = fields.Integer(validate=lambda a: a > 0)
 
 
 class AddExpense(Schema):
@@ -1,11 +1,33 @@
-from flask import jsonify, Blueprint
-from flask_jwt_extended import jwt_required
+from flask import jsonify, Blueprint, send_file, stream_with_context
+from flask_jwt_extended import current_user, jwt_required
+from app import app
 from app.errors import NotFoundRequest
-from app.helpers import authorize_household
-from app.models import Item, Recipe, Household
+from app.helpers import authorize_household, validate_args
+from app.jobs.background import background_job, enqueueJob
+from app.models import Item, Job, Recipe, RecipeTags, Household
+from app.service.export_archive import (
+    ARCHIVE_MIMETYPES,
+    createExportArchive,
+    getExportArchiveStatus,
+    removeExportArchive,
+    streamExportArchive,
+    writeExportArchive,
+)
+from app.util.stream_json import json_stream_response
+from sqlalchemy.orm import joinedload, selectinload
+from .schemas import ExportArchive, ExportArchiveFile, GetExportItems
 
 export = Blueprint("export", __name__)
 
+EXPORT_ITEM_PAGE_SIZE = 1000
+EXPORT_ITEM_PAGE_SIZE_MAX = 5000
+
+
+@background_job("exportArchive", ExportArchiveFile)
+def exportArchiveJob(job: Job, household_id: int, name: str) -> dict:
+    writeExportArchive(household_id, name)
+    return {"name": name}
+
 
 @export.route("", methods=["GET"])
 @jwt_required()
@@ -15,32 +37,107 @@ def getExportAll(household_id):
     if not household:
         raise NotFoundRequest()
 
-    return household.obj_to_export_dict()
+    return json_stream_response(household.obj_to_export_stream_dict())
 
 
 @export.route("/items", methods=["GET"])
 @jwt_required()
 @authorize_household()
-def getExportItems(household_id):
-    return jsonify(
-        {
-            "items": [
-                e.obj_to_export_dict()
-                for e in Item.all_from_household_by_name(household_id)
-            ]
-        }
+@validate_args(GetExportItems)
+def getExportItems(args, household_id):
+    if "cursor" not in args and "limit" not in args:
+        return json_stream_response(
+            {
+                "items": (
+                    e.obj_to_export_dict()
+                    for e in Item.query.filter(Item.household_id == household_id)
+                    .order_by(Item.name)
+                    .options(joinedload(Item.category))
+                    .yield_per(Household.EXPORT_BATCH_SIZE)
+                )
+            }
+        )
+
+    query, next_cursor = Item.paginate_by_name(
+        Item.query.filter(Item.household_id == household_id),
+        args.get("cursor"),
+        min(args.get("limit", EXPORT_ITEM_PAGE_SIZE), EXPORT_ITEM_PAGE_SIZE_MAX),
     )
+    response = jsonify({"items": [e.obj_to_export_dict() for e in query]})
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return response
 
 
 @export.route("/recipes", methods=["GET"])
 @jwt_required()
 @authorize_household()
 def getExportRecipes(household_id):
-    return jsonify(
+    return json_stream_response(
         {
-            "recipes": [
+            "recipes": (
                 e.obj_to_export_dict()
-                for e in Recipe.all_from_household_by_name(household_id)
-            ]
+                for e in Recipe.query.filter(Recipe.household_id == household_id)
+                .order_by(Recipe.name)
+                .options(selectinload(Recipe.tags).joinedload(RecipeTags.tag))
+                .yield_per(Household.EXPORT_BATCH_SIZE)
+            )
         }
     )
+
+
+@export.route("/archive", methods=["GET"])
+@jwt_required()
+@authorize_household()
+@validate_args(ExportArchive)
+def getExportArchive(args, household_id):
+    if not Household.find_by_id(household_id):
+        raise NotFoundRequest()
+
+    format = args["format"]
+    response = app.response_class(
+        stream_with_context(streamExportArchive(household_id, format)),
+        mimetype=ARCHIVE_MIMETYPES[format],
+    )
+    response.headers["Content-Disposition"] = (
+        f'attachment; filename="kitchenowl-export.{format}"'
+    )
+    return response
+
+
+@export.route("/archive", methods=["POST"])
+@jwt_required()
+@authorize_household()
+@validate_args(ExportArchive)
+def startExportArchiveInBackground(args, household_id):
+    if not Household.find_by_id(household_id):
+        raise NotFoundRequest()
+
+    name = createExportArchive(household_id, args["format"])
+    try:
+        job = enqueueJob("exportArchive", household_id, {"name": name}, current_user.id)
+    except Exception:
+        removeExportArchive(household_id, name)
+        raise
+    return jsonify({"name": name, "status": "pending", "job": job.obj_to_dict()})
+
+
+@export.route("/archive/<name>", methods=["GET"])
+@jwt_required()
+@authorize_household()
+def getExportArchiveByName(household_id, name):
+    status, path = getExportArchiveStatus(household_id, name)
+    if status == "pending":
+        return jsonify({"name": name, "status": status}), 202
+    if status == "failed":
+        # not retried, a new archive has to be requested
+        return jsonify({"name": name, "status": status}), 410
+    # conditional responses support range requests, so downloads can resume
+    format = name.rsplit(".", 1)[-1]
+    return send_file(
+        path,
+        mimetype=ARCHIVE_MIMETYPES.get(format),
+        as_attachment=True,
+        download_name=f"kitchenowl-export.{format}",
+        conditional=True,
+    )
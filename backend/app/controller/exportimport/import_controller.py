@@ -1,20 +1,182 @@
+import os
+import shutil
 import time
-from app.config import app
-from app.models import Household
-from app.service.importServices import (
-    importItem,
-    importRecipe,
-    importExpense,
-    importShoppinglist,
-)
-from app.service.recalculate_balances import recalculateBalances
-from .schemas import ImportSchema
+import uuid
+from typing import IO, Callable
+from marshmallow import fields
+from marshmallow.exceptions import ValidationError
+from app.config import app, IMPORT_FOLDER
+from app.errors import ForbiddenRequest, InvalidUsage, NotFoundRequest
+from app.jobs.background import background_job, enqueueJob
+from app.models import Household, Job, User
+from app.service.importServices import BulkImport, importBulk, importShoppinglist
+from app.util.stream_json_parser import iter_json_object
+from .schemas import ImportFile, ImportSchema, ImportStream
 from app.helpers import validate_args, authorize_household
-from flask import jsonify, Blueprint
-from flask_jwt_extended import jwt_required
+from flask import jsonify, Blueprint, request
+from flask_jwt_extended import current_user, jwt_required
 
 importBP = Blueprint("import", __name__)
 
+# records validated and written per transaction by streamed imports
+IMPORT_CHUNK_SIZE = 500
+# validation errors returned by streamed imports, the rest is only counted
+IMPORT_MAX_ERRORS = 100
+
+
+def _import(
+    household: Household, args: dict, progress=None, user: User | None = None
+) -> dict[str, float]:
+    app.logger.info("Starting import...")
+
+    t0 = time.time()
+    phases = importBulk(household, args, progress, user)
+
+    if "shoppinglists" in args:
+        for shoppinglist in args["shoppinglists"]:
+            importShoppinglist(household, shoppinglist)
+
+    app.logger.info(
+        f"Import took: {(time.time() - t0):.3f}s ("
+        + ", ".join(f"{k}: {v:.3f}s" for k, v in phases.items())
+        + ")"
+    )
+    return phases
+
+
+def _importStream(
+    household: Household,
+    stream: IO[bytes],
+    recipe_overwrite: bool = False,
+    progress: Callable[[], None] | None = None,
+    user: User | None = None,
+) -> dict:
+    """
+    Imports an export (see ImportSchema) while it is parsed. Every record is
+    validated on its own, invalid ones are skipped and reported. Other keys
+    of the export are ignored, recipe_overwrite is a query parameter
+    """
+    loaders = {
+        "items": ImportSchema.Item().load,
+        "recipes": ImportSchema.Recipe().load,
+        "expenses": ImportSchema.Expense().load,
+        "shoppinglists": fields.String(required=True).deserialize,
+    }
+    imported = {key: 0 for key in loaders}
+    errors, skipped = [], 0
+    chunk, chunkKey = [], None
+
+    app.logger.info("Starting streamed import...")
+    t0 = time.time()
+    with BulkImport(household, recipe_overwrite, user) as importer:
+
+        def importShoppinglists(names: list[str]) -> int:
+            for name in names:
+                importShoppinglist(household, name)
+            return len(names)
+
+        importers = {
+            "items": importer.importItems,
+            "recipes": importer.importRecipes,
+            "expenses": importer.importExpenses,
+            "shoppinglists": importShoppinglists,
+        }
+
+        def flush():
+            if chunk:
+                importer.timed(chunkKey, importers[chunkKey], chunk)
+                imported[chunkKey] += len(chunk)
+                chunk.clear()
+                if progress:
+                    progress()
+
+        importer.timed("preload", importer.preload)
+        for key, index, value in iter_json_object(stream):
+            if key not in loaders or index is None:
+                continue
+            try:
+                record = loaders[key](value)
+            except ValidationError as exc:
+                skipped += 1
+                if len(errors) < IMPORT_MAX_ERRORS:
+                    errors.append({"key": key, "index": index, "errors": exc.messages})
+                continue
+            if key != chunkKey:
+                flush()
+                chunkKey = key
+            chunk.append(record)
+            if len(chunk) >= IMPORT_CHUNK_SIZE:
+                flush()
+        flush()
+        importer.finish()
+
+    app.logger.info(
+        f"Streamed import took: {(time.time() - t0):.3f}s ("
+        + ", ".join(f"{k}: {v:.3f}s" for k, v in importer.phases.items())
+        + f", {skipped} invalid records)"
+    )
+    return {
+        "phases": importer.phases,
+        "imported": imported,
+        "skipped": skipped,
+        "errors": errors,
+    }
+
+
+def _household(household_id: int) -> Household:
+    household = Household.find_by_id(household_id)
+    if not household:
+        raise NotFoundRequest()
+    return household
+
+
+def _creator(job: Job) -> User:
+    """
+    Jobs run without a request, so photos are checked for the user who
+    started the import instead of the current user
+    """
+    user = User.find_by_id(job.created_by) if job.created_by else None
+    if not user:
+        raise ForbiddenRequest("Import creator no longer exists")
+    return user
+
+
+@background_job("import", ImportSchema)
+def importJob(job: Job, household_id: int, **args) -> dict:
+    return {
+        "phases": _import(_household(household_id), args, job.report, _creator(job))
+    }
+
+
+def _spoolPath(household_id: int, filename: str) -> str:
+    return os.path.join(IMPORT_FOLDER, str(household_id), filename)
+
+
+def _removeSpooled(household_id: int, filename: str, **args):
+    if os.path.exists(_spoolPath(household_id, filename)):
+        os.remove(_spoolPath(household_id, filename))
+
+
+@background_job("importFile", ImportFile, cleanup=_removeSpooled)
+def importFileJob(
+    job: Job, household_id: int, filename: str, recipe_overwrite: bool = False
+) -> dict:
+    path = _spoolPath(household_id, filename)
+    if not os.path.isfile(path):
+        raise NotFoundRequest()
+    size = os.path.getsize(path) or 1
+    try:
+        with open(path, "rb") as f:
+            return _importStream(
+                _household(household_id),
+                f,
+                recipe_overwrite,
+                lambda: job.report(f.tell() / size),
+                _creator(job),
+            )
+    finally:
+        os.remove(path)
+
 
 @importBP.route("", methods=["POST"])
 @jwt_required()
@@ -25,29 +187,46 @@ def importData(args, household_id):
     if not household:
         return
 
-    app.logger.info("Starting import...")
+    if args.pop("background"):
+        job = enqueueJob("import", household_id, args, current_user.id)
+        return jsonify(job.obj_to_dict()), 202
 
-    t0 = time.time()
-    if "items" in args:
-        for item in args["items"]:
-            importItem(household, item)
+    phases = _import(household, args)
+    return jsonify({"msg": "DONE", "phases": phases})
 
-    if "recipes" in args:
-        for recipe in args["recipes"]:
-            importRecipe(
-                household_id,
-                recipe,
-                args["recipe_overwrite"] if "recipe_overwrite" in args else False,
-            )
 
-    if "expenses" in args:
-        for expense in args["expenses"]:
-            importExpense(household, expense)
-        recalculateBalances(household.id)
+@importBP.route("/stream", methods=["POST"])
+@jwt_required()
+@authorize_household()
+def importDataStream(household_id):
+    """
+    Same input as POST /import, but the body is parsed while it is read and
+    invalid records are skipped instead of failing the whole import
+    """
+    try:
+        args = ImportStream().load(request.args)
+    except ValidationError as exc:
+        raise InvalidUsage("{}".format(exc))
+    household = _household(household_id)
 
-    if "shoppinglists" in args:
-        for shoppinglist in args["shoppinglists"]:
-            importShoppinglist(household, shoppinglist)
+    if args["background"]:
+        # spooled to disk, the job may run in another process
+        filename = f"{uuid.uuid4().hex}.json"
+        path = _spoolPath(household_id, filename)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            shutil.copyfileobj(request.stream, f)
+        try:
+            job = enqueueJob(
+                "importFile",
+                household_id,
+                {"filename": filename, "recipe_overwrite": args["recipe_overwrite"]},
+                current_user.id,
+            )
+        except Exception:
+            os.remove(path)
+            raise
+        return jsonify(job.obj_to_dict()), 202
 
-    app.logger.info(f"Import took: {(time.time() - t0):.3f}s")
-    return jsonify({"msg": "DONE"})
+    res = _importStream(household, request.stream, args["recipe_overwrite"])
+    return jsonify({"msg": "DONE"} | res)
@@ -1,4 +1,5 @@
 from marshmallow import EXCLUDE, fields, Schema
+from marshmallow.validate import OneOf, Regexp
 
 
 class ImportSchema(Schema):
@@ -62,3 +63,30 @@ class ImportSchema(Schema):
     expenses = fields.List(fields.Nested(Expense))
     member = fields.List(fields.String())
     shoppinglists = fields.List(fields.String())
+    # run the import as background job, see /household/<id>/job
+    background = fields.Boolean(load_default=False)
+
+
+class ImportStream(Schema):
+    recipe_overwrite = fields.Boolean(load_default=False)
+    # run the import as background job, see /household/<id>/job
+    background = fields.Boolean(load_default=False)
+
+
+class ImportFile(Schema):
+    filename = fields.String(required=True, validate=Regexp(r"^[0-9a-f]{32}\.json$"))
+    recipe_overwrite = fields.Boolean(load_default=False)
+
+
+class GetExportItems(Schema):
+    # opaque cursor returned in the X-Next-Cursor header
+    cursor = fields.String()
+    limit = fields.Integer(validate=lambda a: a > 0)
+
+
+class ExportArchive(Schema):
+    format = fields.String(validate=OneOf(["zip", "tar"]), load_default="zip")
+
+
+class ExportArchiveFile(Schema):
+    name = fields.String(required=True, validate=Regexp(r"^[0-9a-f]{32}\.(zip|tar)$"))
@@ -1,17 +1,43 @@
-import gevent
-from app.config import SUPPORTED_LANGUAGES
+from app.config import app, SUPPORTED_LANGUAGES
 from app.helpers import validate_args, authorize_household, RequiredRights
 from flask import jsonify, Blueprint
-from app.errors import NotFoundRequest
+from app.errors import InvalidUsage, NotFoundRequest
+from app.jobs.background import background_job, enqueueJob
 from flask_jwt_extended import current_user, jwt_required
-from app.models import Household, HouseholdMember, Shoppinglist, User
+from app.models import Household, HouseholdMember, Job, Shoppinglist, User
 from app.service.import_language import importLanguage
 from app.service.file_has_access_or_download import file_has_access_or_download
-from .schemas import AddHousehold, UpdateHousehold, UpdateHouseholdMember
+from app.service.household_changes import getChangesSince
+from .schemas import (
+    AddHousehold,
+    UpdateHousehold,
+    UpdateHouseholdMember,
+    GetHouseholdChanges,
+)
 from app import socketio, db
 
 household = Blueprint("household", __name__)
 
+CHANGE_FEED_PAGE_SIZE = 500
+
+
+@background_job("importLanguage", retries=2)
+def importLanguageJob(job: Job, household_id: int) -> int:
+    household = Household.find_by_id(household_id)
+    if not household:
+        raise NotFoundRequest()
+    if not household.language:
+        return 0
+    return importLanguage(household_id, household.language)
+
+
+def _seedLanguage(household_id: int):
+    try:
+        enqueueJob("importLanguage", household_id, created_by=current_user.id)
+    except InvalidUsage as e:
+        # the household is saved already, it can be seeded later through /job
+        app.logger.warning(f"Could not seed household {household_id}: {e}")
+
 
 @household.route("", methods=["GET"])
 @jwt_required()
@@ -34,6 +60,15 @@ def getHousehold(household_id):
     return jsonify(household.obj_to_dict())
 
 
+@household.route("/<int:household_id>/changes", methods=["GET"])
+@jwt_required()
+@authorize_household()
+@validate_args(GetHouseholdChanges)
+def getHouseholdChanges(args, household_id):
+    limit = min(args.get("limit", CHANGE_FEED_PAGE_SIZE), CHANGE_FEED_PAGE_SIZE)
+    return jsonify(getChangesSince(household_id, args.get("since"), limit))
+
+
 @household.route("", methods=["POST"])
 @jwt_required()
 @validate_args(AddHousehold)
@@ -72,7 +107,7 @@ def addHousehold(args):
     Shoppinglist(name="Default", household_id=household.id).save()
 
     if household.language:
-        gevent.spawn(importLanguage, household.id, household.language, True)
+        _seedLanguage(household.id)
 
     return jsonify(household.obj_to_dict())
 
@@ -96,7 +131,7 @@ def updateHousehold(args, household_id):
         and args["language"] in SUPPORTED_LANGUAGES
     ):
         household.language = args["language"]
-        gevent.spawn(importLanguage, household.id, household.language)
+        _seedLanguage(household.id)
     if "planner_feature" in args:
         household.planner_feature = args["planner_feature"]
     if "expenses_feature" in args:
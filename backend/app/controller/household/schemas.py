@@ -31,3 +31,9 @@ class UpdateHouseholdMember(Schema):
         unknown = EXCLUDE
 
     admin = fields.Boolean()
+
+
+class GetHouseholdChanges(Schema):
+    # cursor of the last sync, omit for a full resync
+    since = fields.String()
+    limit = fields.Integer(validate=lambda a: a > 0)
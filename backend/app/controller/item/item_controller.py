@@ -1,22 +1,38 @@
-from app.helpers import validate_args, authorize_household
+from app.helpers import validate_args, authorize_household, cache_household_response
 from flask import jsonify, Blueprint
 from app.errors import InvalidUsage, NotFoundRequest
 import app.util.description_splitter as description_splitter
 from flask_jwt_extended import jwt_required
 from app.models import Item, RecipeItems, Recipe, Category
-from .schemas import SearchByNameRequest, UpdateItem, AddItem
+from .schemas import GetAllItems, SearchByNameRequest, UpdateItem, AddItem
 
 item = Blueprint("item", __name__)
 itemHousehold = Blueprint("item", __name__)
 
+ITEM_PAGE_SIZE = 500
+ITEM_PAGE_SIZE_MAX = 2000
+
 
 @itemHousehold.route("", methods=["GET"])
 @jwt_required()
 @authorize_household()
-def getAllItems(household_id):
-    return jsonify(
-        [e.obj_to_dict() for e in Item.all_from_household_by_name(household_id)]
+@cache_household_response()
+@validate_args(GetAllItems)
+def getAllItems(args, household_id):
+    if "cursor" not in args and "limit" not in args:
+        return jsonify(
+            [e.obj_to_dict() for e in Item.all_from_household_by_name(household_id)]
+        )
+
+    query, next_cursor = Item.paginate_by_name(
+        Item.query.filter(Item.household_id == household_id),
+        args.get("cursor"),
+        min(args.get("limit", ITEM_PAGE_SIZE), ITEM_PAGE_SIZE_MAX),
     )
+    response = jsonify([e.obj_to_dict() for e in query])
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return response
 
 
 @item.route("/<int:id>", methods=["GET"])
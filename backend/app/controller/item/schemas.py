@@ -1,6 +1,12 @@
 from marshmallow import fields, Schema, EXCLUDE
 
 
+class GetAllItems(Schema):
+    # opaque cursor returned in the X-Next-Cursor header
+    cursor = fields.String()
+    limit = fields.Integer(validate=lambda a: a > 0)
+
+
 class SearchByNameRequest(Schema):
     query = fields.String(required=True, validate=lambda a: a and not a.isspace())
 
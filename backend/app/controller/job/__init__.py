@@ -0,0 +1 @@
+from .job_controller import jobHousehold
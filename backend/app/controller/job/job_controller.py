@@ -0,0 +1,35 @@
+from app.helpers import validate_args, authorize_household
+from flask import jsonify, Blueprint
+from app.errors import NotFoundRequest
+from app.jobs.background import enqueueJob
+from flask_jwt_extended import current_user, jwt_required
+from app.models import Job
+from .schemas import AddJob
+
+jobHousehold = Blueprint("job", __name__)
+
+
+@jobHousehold.route("", methods=["GET"])
+@jwt_required()
+@authorize_household()
+def getJobs(household_id):
+    return jsonify([e.obj_to_dict() for e in Job.recent_from_household(household_id)])
+
+
+@jobHousehold.route("", methods=["POST"])
+@jwt_required()
+@authorize_household()
+@validate_args(AddJob)
+def addJob(args, household_id):
+    job = enqueueJob(args["type"], household_id, args["args"], current_user.id)
+    return jsonify(job.obj_to_dict()), 202
+
+
+@jobHousehold.route("/<int:job_id>", methods=["GET"])
+@jwt_required()
+@authorize_household()
+def getJob(household_id, job_id):
+    job = Job.find_in_household(household_id, job_id)
+    if not job:
+        raise NotFoundRequest()
+    return jsonify(job.obj_to_dict())
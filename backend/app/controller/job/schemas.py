@@ -0,0 +1,6 @@
+from marshmallow import fields, Schema
+
+
+class AddJob(Schema):
+    type = fields.String(required=True, validate=lambda a: a and not a.isspace())
+    args = fields.Dict(load_default=dict)
@@ -2,9 +2,9 @@ from app.errors import NotFoundRequest
 from flask import jsonify, Blueprint
 from flask_jwt_extended import jwt_required
 from app import db
-from app.helpers import validate_args, authorize_household
+from app.helpers import validate_args, authorize_household, cache_household_response
 from app.models import Recipe, RecipeHistory, Planner
-from .schemas import AddPlannedRecipe, RemovePlannedRecipe
+from .schemas import AddPlannedRecipe, RemovePlannedRecipe, GetPlannedRecipes
 
 plannerHousehold = Blueprint("planner", __name__)
 
@@ -12,22 +12,25 @@ plannerHousehold = Blueprint("planner", __name__)
 @plannerHousehold.route("/recipes", methods=["GET"])
 @jwt_required()
 @authorize_household()
-def getAllPlannedRecipes(household_id):
+@validate_args(GetPlannedRecipes)
+def getAllPlannedRecipes(args, household_id):
     plannedRecipes = (
         db.session.query(Planner.recipe_id)
         .filter(Planner.household_id == household_id)
         .group_by(Planner.recipe_id)
         .scalar_subquery()
     )
-    recipes = (
-        Recipe.query.filter(Recipe.id.in_(plannedRecipes)).order_by(Recipe.name).all()
-    )
-    return jsonify([e.obj_to_full_dict() for e in recipes])
+    query = Recipe.query.filter(Recipe.id.in_(plannedRecipes)).order_by(Recipe.name)
+    fields = Recipe.projection_fields(args.get("projection"), args["view"])
+    if fields:
+        return jsonify(Recipe.project(query, fields))
+    return jsonify([e.obj_to_full_dict() for e in query.all()])
 
 
 @plannerHousehold.route("", methods=["GET"])
 @jwt_required()
 @authorize_household()
+@cache_household_response()
 def getPlanner(household_id):
     plans = Planner.all_from_household(household_id)
     return jsonify([e.obj_to_full_dict() for e in plans])
@@ -1,5 +1,6 @@
 from marshmallow import fields, Schema, EXCLUDE
 from marshmallow.validate import Range
+from app.controller.recipe.schemas import RecipeProjection
 
 
 class AddPlannedRecipe(Schema):
@@ -22,3 +23,7 @@ class RemovePlannedRecipe(Schema):
     day = fields.Integer(
         validate=Range(min=0, min_inclusive=True, max=6, max_inclusive=True)
     )
+
+
+class GetPlannedRecipes(RecipeProjection):
+    pass
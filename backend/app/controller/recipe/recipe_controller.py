@@ -2,11 +2,13 @@ from app.errors import NotFoundRequest
 from app.models import Household, RecipeItems, RecipeTags
 from flask import jsonify, Blueprint
 from flask_jwt_extended import jwt_required
-from app.helpers import validate_args, authorize_household
+from app.helpers import validate_args, authorize_household, cache_household_response
 from app.models import Recipe, Item, Tag
 from app.service.file_has_access_or_download import file_has_access_or_download
 from app.service.recipe_scraping import scrape
+from app.util.stream_json import json_stream_response
 from .schemas import (
+    GetAllRecipesRequest,
     SearchByNameRequest,
     AddRecipe,
     UpdateRecipe,
@@ -17,13 +19,48 @@ from .schemas import (
 recipe = Blueprint("recipe", __name__)
 recipeHousehold = Blueprint("recipe", __name__)
 
+RECIPE_PAGE_SIZE = 50
+RECIPE_PAGE_SIZE_MAX = 500
+RECIPE_STREAM_BATCH_SIZE = 100
+
+
+def _recipe_list_response(args, query):
+    """
+    Serializes the recipes of query with the requested projection, paginated
+    by name if a cursor or limit is given and streamed if requested
+    """
+    next_cursor = None
+    if "cursor" in args or "limit" in args:
+        query, next_cursor = Recipe.paginate_by_name(
+            query,
+            args.get("cursor"),
+            min(args.get("limit", RECIPE_PAGE_SIZE), RECIPE_PAGE_SIZE_MAX),
+        )
+    fields = Recipe.projection_fields(args.get("projection"), args["view"])
+    if fields:
+        res = Recipe.project(query, fields)
+    elif args.get("stream"):
+        res = (e.obj_to_full_dict() for e in query.yield_per(RECIPE_STREAM_BATCH_SIZE))
+    else:
+        res = [e.obj_to_full_dict() for e in query]
+    if args.get("stream"):
+        response = json_stream_response(iter(res))
+    else:
+        response = jsonify(res)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return response
+
 
 @recipeHousehold.route("", methods=["GET"])
 @jwt_required()
 @authorize_household()
-def getAllRecipes(household_id):
-    return jsonify(
-        [e.obj_to_full_dict() for e in Recipe.all_from_household_by_name(household_id)]
+@cache_household_response()
+@validate_args(GetAllRecipesRequest)
+def getAllRecipes(args, household_id):
+    return _recipe_list_response(
+        args,
+        Recipe.query.filter(Recipe.household_id == household_id).order_by(Recipe.name),
     )
 
 
@@ -171,8 +208,8 @@ def deleteRecipeById(id):
 def searchRecipeByName(args, household_id):
     if "only_ids" in args and args["only_ids"]:
         return jsonify([e.id for e in Recipe.search_name(household_id, args["query"])])
-    return jsonify(
-        [e.obj_to_full_dict() for e in Recipe.search_name(household_id, args["query"])]
+    return _recipe_list_response(
+        args, Recipe.search_name_query(household_id, args["query"])
     )
 
 
@@ -181,11 +218,8 @@ def searchRecipeByName(args, household_id):
 @authorize_household()
 @validate_args(GetAllFilterRequest)
 def getAllFiltered(args, household_id):
-    return jsonify(
-        [
-            e.obj_to_full_dict()
-            for e in Recipe.all_by_name_with_filter(household_id, args["filter"])
-        ]
+    return _recipe_list_response(
+        args, Recipe.all_by_name_with_filter_query(household_id, args["filter"])
     )
 
 
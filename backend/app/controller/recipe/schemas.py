@@ -1,4 +1,5 @@
 from marshmallow import fields, Schema
+from marshmallow.validate import OneOf
 
 
 class AddRecipe(Schema):
@@ -39,14 +40,31 @@ class UpdateRecipe(Schema):
     tags = fields.List(fields.String())
 
 
-class SearchByNameRequest(Schema):
+class RecipeProjection(Schema):
+    # comma separated list of fields, e.g. "id,name,photo,items"
+    projection = fields.String(data_key="fields")
+    view = fields.String(validate=OneOf(["full", "summary"]), load_default="full")
+
+
+class RecipePage(Schema):
+    # opaque cursor returned in the X-Next-Cursor header
+    cursor = fields.String()
+    limit = fields.Integer(validate=lambda a: a > 0)
+
+
+class GetAllRecipesRequest(RecipeProjection, RecipePage):
+    # write the response while reading the recipes in batches
+    stream = fields.Boolean(load_default=False)
+
+
+class SearchByNameRequest(RecipeProjection):
     query = fields.String(required=True, validate=lambda a: a and not a.isspace())
     only_ids = fields.Boolean(
         load_default=False,
     )
 
 
-class GetAllFilterRequest(Schema):
+class GetAllFilterRequest(RecipeProjection, RecipePage):
     filter = fields.List(fields.String())
 
 
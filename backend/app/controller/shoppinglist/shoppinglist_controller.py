@@ -9,7 +9,7 @@ from app.models import (
     Association,
     ShoppinglistItems,
 )
-from app.helpers import validate_args, authorize_household
+from app.helpers import validate_args, authorize_household, cache_household_response
 from .schemas import (
     GetShoppingLists,
     RemoveItem,
@@ -25,7 +25,7 @@ from .schemas import (
 from app.errors import NotFoundRequest, InvalidUsage
 from datetime import datetime, timedelta, timezone
 import app.util.description_merger as description_merger
-from app import socketio
+from app.service.socket_events import emitHouseholdEvent, emitShoppinglistItemEvent
 
 
 shoppinglist = Blueprint("shoppinglist", __name__)
@@ -40,12 +40,8 @@ def createShoppinglist(args, household_id):
     shoppinglist = Shoppinglist(name=args["name"], household_id=household_id)
     shoppinglist.save()
     shoppinglist_dict = shoppinglist.obj_to_dict()
-    socketio.emit(
-        "shoppinglist:add",
-        {
-            "shoppinglist": shoppinglist_dict
-        },
-        to=household_id
+    emitHouseholdEvent(
+        "shoppinglist:add", {"shoppinglist": shoppinglist_dict}, household_id
     )
     return jsonify(shoppinglist_dict)
 
@@ -53,6 +49,7 @@ def createShoppinglist(args, household_id):
 @shoppinglistHousehold.route("", methods=["GET"])
 @jwt_required()
 @authorize_household()
+@cache_household_response()
 @validate_args(GetShoppingLists)
 def getShoppinglists(args, household_id):
     shoppinglists = Shoppinglist.all_from_household(household_id)
@@ -116,12 +113,10 @@ def deleteShoppinglist(id):
     if shoppinglist.isDefault():
         raise InvalidUsage()
     shoppinglist.delete()
-    socketio.emit(
+    emitHouseholdEvent(
         "shoppinglist:delete",
-        {
-          "shoppinglist": shoppinglist.obj_to_dict()
-        },
-        to=shoppinglist.household_id
+        {"shoppinglist": shoppinglist.obj_to_dict()},
+        shoppinglist.household_id,
     )
 
     return jsonify({"msg": "DONE"})
@@ -147,14 +142,7 @@ def updateItemDescription(args, id: int, item_id: int):
 
     con.description = args["description"] or ""
     con.save()
-    socketio.emit(
-        "shoppinglist_item:add",
-        {
-            "item": con.obj_to_item_dict(),
-            "shoppinglist": con.shoppinglist.obj_to_dict(),
-        },
-        to=con.shoppinglist.household_id,
-    )
+    emitShoppinglistItemEvent("shoppinglist_item:add", con, con.shoppinglist)
     return jsonify(con.obj_to_item_dict())
 
 
@@ -305,14 +293,7 @@ def addShoppinglistItemByName(args, id):
 
         History.create_added(shoppinglist, item, description)
 
-        socketio.emit(
-            "shoppinglist_item:add",
-            {
-                "item": con.obj_to_item_dict(),
-                "shoppinglist": shoppinglist.obj_to_dict(),
-            },
-            to=shoppinglist.household_id,
-        )
+        emitShoppinglistItemEvent("shoppinglist_item:add", con, shoppinglist)
 
     return jsonify(item.obj_to_dict())
 
@@ -332,14 +313,7 @@ def removeShoppinglistItem(args, id: int):
         args["removed_at"] if "removed_at" in args else None,
     )
     if con:
-        socketio.emit(
-            "shoppinglist_item:remove",
-            {
-                "item": con.obj_to_item_dict(),
-                "shoppinglist": shoppinglist.obj_to_dict(),
-            },
-            to=shoppinglist.household_id,
-        )
+        emitShoppinglistItemEvent("shoppinglist_item:remove", con, shoppinglist)
 
     return jsonify({"msg": "DONE"})
 
@@ -360,14 +334,7 @@ def removeShoppinglistItems(args, id: int):
             arg["removed_at"] if "removed_at" in arg else None,
         )
         if con:
-            socketio.emit(
-                "shoppinglist_item:remove",
-                {
-                    "item": con.obj_to_item_dict(),
-                    "shoppinglist": shoppinglist.obj_to_dict(),
-                },
-                to=shoppinglist.household_id,
-            )
+            emitShoppinglistItemEvent("shoppinglist_item:remove", con, shoppinglist)
 
     return jsonify({"msg": "DONE"})
 
@@ -425,14 +392,7 @@ def addRecipeItems(args, id):
                     History.create_added_without_save(shoppinglist, item, description)
                 )
 
-                socketio.emit(
-                    "shoppinglist_item:add",
-                    {
-                        "item": con.obj_to_item_dict(),
-                        "shoppinglist": shoppinglist.obj_to_dict(),
-                    },
-                    to=shoppinglist.household_id,
-                )
+                emitShoppinglistItemEvent("shoppinglist_item:add", con, shoppinglist)
 
         db.session.commit()
     except Exception as e:
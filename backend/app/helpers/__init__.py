@@ -6,3 +6,4 @@ from .validate_socket_args import validate_socket_args
 from .server_admin_required import server_admin_required
 from .authorize_household import authorize_household, RequiredRights
 from .socket_jwt_required import socket_jwt_required
+from .cache_household_response import cache_household_response
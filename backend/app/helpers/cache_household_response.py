@@ -0,0 +1,175 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import wraps
+from typing import Callable
+from flask import request
+from flask_jwt_extended import current_user
+from app.config import (
+    app,
+    response_compressor,
+    RESPONSE_CACHE_SIZE,
+    RESPONSE_CACHE_URL,
+)
+from app.models import Household
+
+
+class ResponseCache:
+    """
+    Bounded in-process LRU of serialized responses, optionally backed by a
+    shared redis instance so workers can reuse each others entries
+    """
+
+    def __init__(self, size: int, url: str | None = None, timeout: int = 86400):
+        self.size = size
+        self.timeout = timeout
+        self._entries: OrderedDict[str, bytes] = OrderedDict()
+        self._lock = threading.Lock()
+        self._shared = None
+        if url:
+            try:
+                import redis
+
+                self._shared = redis.Redis.from_url(url)
+            except ImportError:
+                app.logger.warning(
+                    "RESPONSE_CACHE_URL is set but redis is not installed"
+                )
+
+    @property
+    def enabled(self) -> bool:
+        return self.size > 0 or self._shared is not None
+
+    def get(self, key: str) -> bytes | None:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                return value
+        if not self._shared:
+            return None
+        try:
+            value = self._shared.get(key)
+        except Exception as e:
+            app.logger.warning(f"Response cache lookup failed: {e}")
+            return None
+        if value is not None:
+            self._set_local(key, value)
+        return value
+
+    def set(self, key: str, value: bytes):
+        self._set_local(key, value)
+        if self._shared:
+            try:
+                self._shared.set(key, value, ex=self.timeout)
+            except Exception as e:
+                app.logger.warning(f"Response cache store failed: {e}")
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _set_local(self, key: str, value: bytes):
+        if self.size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+
+response_cache = ResponseCache(RESPONSE_CACHE_SIZE, RESPONSE_CACHE_URL)
+
+
+def _pack(next_cursor: str | None, body: bytes) -> bytes:
+    # the pagination cursor is part of the response, JSON never starts with \0
+    if not next_cursor:
+        return body
+    return b"\0" + next_cursor.encode() + b"\0" + body
+
+
+def _unpack(value: bytes) -> tuple[str | None, bytes]:
+    if not value.startswith(b"\0"):
+        return None, value
+    _, next_cursor, body = value.split(b"\0", 2)
+    return next_cursor.decode(), body
+
+
+def cache_household_response(
+    per_user: bool = False, vary: Callable[[], str] | None = None
+):
+    """
+    Caches the JSON body of a household GET endpoint by endpoint, household
+    version and query arguments. Any write to the household bumps its version,
+    so stale entries are never served and simply age out of the LRU.
+    Use after authorize_household. per_user for responses that depend on
+    current_user, vary for other inputs (e.g. the current date)
+
+    The key doubles as the ETag, so conditional requests are answered with
+    304 before the view runs. Compressed bodies are cached per encoding
+    """
+
+    def wrapper(func):
+        @wraps(func)
+        def decorator(*args, **kwargs):
+            if not response_cache.enabled:
+                return func(*args, **kwargs)
+            household_id = kwargs["household_id"]
+            version = Household.find_version_tag(household_id)
+            if version is None:
+                return func(*args, **kwargs)
+
+            key = [
+                request.endpoint,
+                household_id,
+                version,
+                sorted(request.args.items(multi=True)),
+            ]
+            if per_user:
+                key.append(current_user.id)
+            if vary:
+                key.append(vary())
+            etag = hashlib.sha1(repr(key).encode()).hexdigest()
+            key = "kitchenowl:response:" + etag
+
+            if request.if_none_match.contains_weak(etag):
+                response = app.response_class(status=304)
+                response.set_etag(etag)
+                return response
+
+            body = response_cache.get(key)
+            if body is not None:
+                next_cursor, body = _unpack(body)
+                response = app.response_class(body, mimetype="application/json")
+                if next_cursor:
+                    response.headers["X-Next-Cursor"] = next_cursor
+            else:
+                response = func(*args, **kwargs)
+                if (
+                    response.status_code != 200
+                    or response.is_streamed
+                    or response.mimetype != "application/json"
+                ):
+                    return response
+                response_cache.set(
+                    key,
+                    _pack(response.headers.get("X-Next-Cursor"), response.get_data()),
+                )
+            response.set_etag(etag)
+
+            # compressed bodies are cached alongside the plain one
+            encoding = response_compressor.negotiate(response, request.accept_encodings)
+            if encoding:
+                compressed = response_cache.get(f"{key}:{encoding}")
+                if compressed is None:
+                    compressed = response_compressor.compress(
+                        response.get_data(), encoding
+                    )
+                    response_cache.set(f"{key}:{encoding}", compressed)
+                response_compressor.apply(response, encoding, compressed)
+            return response
+
+        return decorator
+
+    return wrapper
@@ -4,18 +4,22 @@ import app
 
 
 class DbModelAuthorizeMixin(object):
-    def checkAuthorized(self, requires_admin=False, household_id: int | None = None):
+    def checkAuthorized(
+        self, requires_admin=False, household_id: int | None = None, user=None
+    ):
         """
         Checks if current user ist authorized to access this model. Throws and unauthorized exception if not
         IMPORTANT: requires household_id
+        user defaults to the current user
         """
         if not household_id and not hasattr(self, "household_id"):
             raise Exception("Wrong usage of authorize_household")
-        if not current_user:
+        user = user or current_user
+        if not user:
             raise UnauthorizedRequest()
         member = app.models.household.HouseholdMember.find_by_ids(
-            household_id or self.household_id, current_user.id
+            household_id or self.household_id, user.id
         )
-        if not current_user.admin:
+        if not user.admin:
             if not member or requires_admin and not (member.admin or member.owner):
                 raise ForbiddenRequest()
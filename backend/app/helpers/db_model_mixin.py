@@ -1,7 +1,32 @@
 from __future__ import annotations
-from typing import Self
+from operator import attrgetter
+from typing import Callable, Self
+from sqlalchemy import and_, func, or_
+from sqlalchemy.orm import Query
 from app import db
+from app.errors import InvalidUsage
 from app.helpers.timestamp_mixin import TimestampMixin
+from app.util.cursor import encode_cursor, decode_cursor
+
+
+_serializers: dict[tuple, Callable] = {}
+
+
+def _compile_serializer(cls, skip_columns, include_columns) -> Callable:
+    names = tuple(
+        column.name
+        for column in cls.__table__.columns
+        if column.name not in (skip_columns or ())
+        and (not include_columns or column.name in include_columns)
+    )
+    if not names:
+        return lambda obj: {}
+    if len(names) == 1:
+        name = names[0]
+        getter = attrgetter(name)
+        return lambda obj: {name: getter(obj)}
+    getter = attrgetter(*names)
+    return lambda obj: dict(zip(names, getter(obj)))
 
 
 class DbModelMixin(TimestampMixin):
@@ -28,21 +53,25 @@ class DbModelMixin(TimestampMixin):
     def obj_to_dict(
         self, skip_columns: list[str] | None = None, include_columns: list[str] | None = None
     ) -> dict:
-        d = {}
-        for column in self.__table__.columns:
-            d[column.name] = getattr(self, column.name)
-
-        for column_name in skip_columns or []:
-            del d[column_name]
+        return self.serializer(skip_columns, include_columns)(self)
 
-        for column in self.__table__.columns:
-            if not include_columns:
-                break
-
-            if column.name in d and column.name not in include_columns:
-                del d[column.name]
-
-        return d
+    @classmethod
+    def serializer(
+        cls,
+        skip_columns: list[str] | tuple[str, ...] | None = None,
+        include_columns: list[str] | tuple[str, ...] | None = None,
+    ) -> Callable[[Self], dict]:
+        """
+        Column serializer of the model for the given field set, built once
+        and cached. Prefer it over obj_to_dict when serializing many rows
+        """
+        key = (cls, tuple(skip_columns or ()), tuple(include_columns or ()))
+        serializer = _serializers.get(key)
+        if serializer is None:
+            serializer = _serializers[key] = _compile_serializer(
+                cls, skip_columns, include_columns
+            )
+        return serializer
 
     @classmethod
     def get_column_names(cls) -> list[str]:
@@ -96,6 +125,40 @@ class DbModelMixin(TimestampMixin):
             cls.query.filter(cls.household_id == household_id).order_by(cls.name).all()
         )
 
+    @classmethod
+    def paginate_by_name(
+        cls, query: Query, cursor: str | None, limit: int
+    ) -> tuple[Query, str | None]:
+        """
+        Restricts query to one page ordered by name and id (keyset), returns
+        the page query and the cursor of the next page, None on the last page
+        IMPORTANT: requires name column
+        """
+        name = func.coalesce(cls.name, "")
+        if cursor:
+            cursorName, cursorId = decode_cursor(cursor, 2)
+            if not isinstance(cursorName, str) or not isinstance(cursorId, int):
+                raise InvalidUsage("Invalid cursor")
+            query = query.filter(
+                or_(name > cursorName, and_(name == cursorName, cls.id > cursorId))
+            )
+        keys = (
+            query.with_entities(cls.id, name)
+            .order_by(None)
+            .order_by(name, cls.id)
+            .limit(limit + 1)
+            .all()
+        )
+        next_cursor = None
+        if len(keys) > limit:
+            next_cursor = encode_cursor(keys[limit - 1][1], keys[limit - 1][0])
+        return (
+            query.filter(cls.id.in_([k[0] for k in keys[:limit]]))
+            .order_by(None)
+            .order_by(name, cls.id),
+            next_cursor,
+        )
+
     @classmethod
     def count(cls) -> int:
         return cls.query.count()
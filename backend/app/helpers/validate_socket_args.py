@@ -11,7 +11,7 @@ def validate_socket_args(schema_cls):
                 raise Exception("Invalid usage. Schema class missing")
 
             try:
-                arguments = schema_cls().load(args[0])
+                arguments = schema_cls().load(args[0] if args else {})
             except ValidationError as exc:
                 raise InvalidUsage("{}".format(exc))
 
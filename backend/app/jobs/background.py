@@ -0,0 +1,167 @@
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Callable
+from marshmallow import Schema
+from marshmallow.exceptions import ValidationError
+from app.config import app, db, celery_app, JOB_QUEUE_SIZE, JOB_WORKERS
+from app.errors import InvalidUsage
+from app.models import Job
+from .instrumentation import job_stage
+
+
+class _JobType:
+    def __init__(
+        self,
+        func: Callable,
+        schema: type[Schema] | None,
+        retries: int,
+        cleanup: Callable | None,
+    ):
+        self.func = func
+        self.schema = schema
+        self.retries = retries
+        self.cleanup = cleanup
+
+
+_job_types: dict[str, _JobType] = {}
+
+
+def background_job(
+    type: str,
+    schema: type[Schema] | None = None,
+    retries: int = 0,
+    cleanup: Callable | None = None,
+):
+    """
+    Registers func(job, household_id, **args) as background job. schema
+    validates the args on enqueue, failed runs are retried up to retries
+    times. The return value is stored as result of the job.
+    cleanup(household_id, **args) removes inputs the job would have removed
+    itself, it is called for jobs that never finish (see failStaleJobs)
+    """
+
+    def wrapper(func):
+        _job_types[type] = _JobType(func, schema, retries, cleanup)
+        return func
+
+    return wrapper
+
+
+# jobs run on celery if configured, otherwise on a bounded thread pool
+_executor = None
+_slots = None
+if not celery_app:
+    _executor = ThreadPoolExecutor(JOB_WORKERS, thread_name_prefix="kitchenowl-job")
+    _slots = threading.BoundedSemaphore(JOB_QUEUE_SIZE)
+else:
+
+    @celery_app.task
+    def runJobTask(job_id: int):
+        runJob(job_id)
+
+
+def enqueueJob(
+    type: str,
+    household_id: int,
+    args: dict | None = None,
+    created_by: int | None = None,
+) -> Job:
+    """
+    Stores and starts a background job
+    """
+    if type not in _job_types:
+        raise InvalidUsage(f"Unknown job type {type}")
+    args = args or {}
+    if _job_types[type].schema:
+        try:
+            args = _job_types[type].schema().load(args)
+        except ValidationError as exc:
+            raise InvalidUsage("{}".format(exc))
+    if _slots and not _slots.acquire(blocking=False):
+        raise InvalidUsage("Too many background jobs")
+
+    try:
+        job = Job(
+            type=type, household_id=household_id, args=args, created_by=created_by
+        ).save()
+    except Exception:
+        if _slots:
+            _slots.release()
+        raise
+
+    if _executor:
+        _executor.submit(_runLocal, job.id)
+    else:
+        runJobTask.delay(job.id)
+    return job
+
+
+def _runLocal(job_id: int):
+    try:
+        with app.app_context():
+            runJob(job_id)
+    except Exception as e:
+        app.logger.error(e, exc_info=e)
+    finally:
+        _slots.release()
+
+
+def runJob(job_id: int):
+    job = Job.find_by_id(job_id)
+    if not job or job.finished:
+        return
+    jobType = _job_types[job.type]
+    while True:
+        job.status = Job.RUNNING
+        job.attempts += 1
+        job.save()
+        try:
+            with job_stage("job", job.type, job.household_id):
+                result = jobType.func(job, job.household_id, **(job.args or {}))
+            break
+        except Exception as e:
+            db.session.rollback()
+            if job.attempts <= jobType.retries:
+                time.sleep(min(2**job.attempts, 60))
+                continue
+            app.logger.error(e, exc_info=e)
+            job.status = Job.FAILED
+            job.error = str(e) or type(e).__name__
+            job.args = None
+            job.finished_at = datetime.now(timezone.utc)
+            job.save()
+            return
+
+    job.status = Job.DONE
+    job.progress = 1
+    # results are stored as JSON, serialize them like responses
+    job.result = json.loads(app.json.dumps(result)) if result is not None else None
+    job.args = None
+    job.finished_at = datetime.now(timezone.utc)
+    job.save()
+
+
+def failStaleJobs() -> int:
+    """
+    Fails jobs that stopped making progress, e.g. because the process
+    running them was stopped. Their inputs are cleaned up and they are not
+    run again. Returns the number of failed jobs
+    """
+    jobs = Job.find_stale()
+    for job in jobs:
+        jobType = _job_types.get(job.type)
+        if jobType and jobType.cleanup:
+            try:
+                jobType.cleanup(job.household_id, **(job.args or {}))
+            except Exception as e:
+                app.logger.error(e, exc_info=e)
+        job.status = Job.FAILED
+        job.error = "Timed out"
+        job.args = None
+        job.finished_at = datetime.now(timezone.utc)
+        db.session.add(job)
+    db.session.commit()
+    return len(jobs)
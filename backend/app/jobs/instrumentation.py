@@ -0,0 +1,89 @@
+import time
+from contextlib import contextmanager
+from prometheus_client import Counter, Gauge, Histogram
+from app.config import app, COLLECT_METRICS
+
+if COLLECT_METRICS:
+    from app.config import registry
+
+    stage_duration = Histogram(
+        "kitchenowl_job_stage_duration_seconds",
+        "Duration of background job stages",
+        ["job", "stage"],
+        registry=registry,
+        buckets=(0.01, 0.05, 0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 300, 900),
+    )
+    stage_rows = Counter(
+        "kitchenowl_job_stage_rows",
+        "Rows touched by background job stages",
+        ["job", "stage"],
+        registry=registry,
+    )
+    stage_failures = Counter(
+        "kitchenowl_job_stage_failures",
+        "Failed runs of background job stages",
+        ["job", "stage"],
+        registry=registry,
+    )
+    stage_last_success = Gauge(
+        "kitchenowl_job_stage_last_success_timestamp_seconds",
+        "Unix time of the last successful run of background job stages",
+        ["job", "stage"],
+        registry=registry,
+        multiprocess_mode="max",
+    )
+    daily_analysis_households = Counter(
+        "kitchenowl_daily_analysis_households",
+        "Households processed or skipped (no new activity) by the daily analysis",
+        ["result"],
+        registry=registry,
+    )
+
+
+class JobStage:
+    def __init__(self, job: str, stage: str, household_id: int | None = None):
+        self.job = job
+        self.stage = stage
+        self.household_id = household_id
+        # number of rows read or written, set by the instrumented code
+        self.rows = 0
+        self.duration = 0.0
+
+    def __str__(self) -> str:
+        res = f"{self.job}/{self.stage}"
+        if self.household_id is not None:
+            res += f" (household {self.household_id})"
+        return res
+
+
+@contextmanager
+def job_stage(job: str, stage: str, household_id: int | None = None):
+    """
+    Records duration, touched rows, failures and the last success of a job stage
+
+    Usage:
+        with job_stage("daily", "findItemOrdering", household_id) as stage:
+            stage.rows = findItemOrdering(...)
+    """
+    run = JobStage(job, stage, household_id)
+    t0 = time.perf_counter()
+    try:
+        yield run
+    except Exception:
+        run.duration = time.perf_counter() - t0
+        app.logger.warning(f"{run} failed after {run.duration:.3f}s")
+        if COLLECT_METRICS:
+            stage_failures.labels(job=job, stage=stage).inc()
+        raise
+    run.duration = time.perf_counter() - t0
+    app.logger.debug(f"{run} took {run.duration:.3f}s ({run.rows} rows)")
+    if COLLECT_METRICS:
+        stage_duration.labels(job=job, stage=stage).observe(run.duration)
+        stage_rows.labels(job=job, stage=stage).inc(run.rows or 0)
+        stage_last_success.labels(job=job, stage=stage).set_to_current_time()
+
+
+def record_daily_analysis(processed: int, skipped: int):
+    if COLLECT_METRICS:
+        daily_analysis_households.labels(result="processed").inc(processed)
+        daily_analysis_households.labels(result="skipped").inc(skipped)
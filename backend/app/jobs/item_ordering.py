@@ -3,7 +3,7 @@ from app.models import Item
 import copy
 
 
-def findItemOrdering(shopping_instances):
+def findItemOrdering(shopping_instances) -> int:
     # sort the items according to each shopping course
     sorter = ItemSort()
     for items in shopping_instances:
@@ -22,6 +22,7 @@ def findItemOrdering(shopping_instances):
     db.session.commit()
 
     app.logger.info("new ordering was determined and stored in the database")
+    return len(order)
 
 
 class ItemSort:
@@ -7,9 +7,9 @@ from mlxtend.preprocessing import TransactionEncoder
 from mlxtend.frequent_patterns import association_rules as arule
 
 
-def findItemSuggestions(shopping_instances):
+def findItemSuggestions(shopping_instances) -> int:
     if not shopping_instances or len(shopping_instances) == 0:
-        return
+        return 0
 
     # prepare data set
     te = TransactionEncoder()
@@ -68,3 +68,4 @@ def findItemSuggestions(shopping_instances):
         )
         db.session.add(a)
     app.logger.info("associations rules of size 2 were updated")
+    return len(single_rules)
@@ -1,19 +1,25 @@
-from datetime import timedelta
+from datetime import datetime, timedelta, timezone
 from app.jobs.recipe_suggestions import computeRecipeSuggestions
-from app.config import app, scheduler, celery_app, MESSAGE_BROKER
+from app.config import app, db, scheduler, celery_app, MESSAGE_BROKER
 from celery.schedules import crontab
 from app.models import (
     Token,
     Household,
+    HouseholdChange,
+    Job,
     Shoppinglist,
     Recipe,
     ChallengePasswordReset,
     OIDCRequest,
 )
 from app.service.delete_unused import deleteEmptyHouseholds
+from app.service.export_archive import deleteExpiredExportArchives
+from .background import failStaleJobs
 from .item_ordering import findItemOrdering
 from .item_suggestions import findItemSuggestions
 from .cluster_shoppings import clusterShoppings
+from .scheduler_lock import scheduler_lock
+from .instrumentation import job_stage, record_daily_analysis
 
 
 if not MESSAGE_BROKER:
@@ -21,17 +27,20 @@ if not MESSAGE_BROKER:
     @scheduler.task("cron", id="everyMonth", day="1", hour="0", minute="0")
     def setup_monthly():
         with app.app_context():
-            monthly()
+            if scheduler_lock.acquire():
+                monthly()
 
     @scheduler.task("cron", id="everyDay", day_of_week="*", hour="3", minute="0")
     def setup_daily():
         with app.app_context():
-            daily()
+            if scheduler_lock.acquire():
+                daily()
 
     @scheduler.task("interval", id="every30min", minutes=30)
     def setup_halfHourly():
         with app.app_context():
-            halfHourly()
+            if scheduler_lock.acquire():
+                halfHourly()
 
 else:
 
@@ -67,32 +76,73 @@ else:
 
 
 def monthly():
-    deleteEmptyHouseholds()
+    with job_stage("monthly", "deleteEmptyHouseholds") as stage:
+        stage.rows = deleteEmptyHouseholds()
 
 
 def daily():
     app.logger.info("--- daily analysis is starting ---")
-    # task for all households
-    for household in Household.all():
-        # shopping tasks
-        shopping_instances = clusterShoppings(
-            Shoppinglist.query.filter(Shoppinglist.household_id == household.id)
-            .first()
-            .id
-        )
-        if shopping_instances:
-            findItemOrdering(shopping_instances)
-            findItemSuggestions(shopping_instances)
-        # recipe planner tasks
-        computeRecipeSuggestions(household.id)
-        Recipe.compute_suggestion_ranking(household.id)
-
-    app.logger.info("--- daily analysis is completed ---")
+    with job_stage("daily", "deleteExpiredChanges") as stage:
+        stage.rows = HouseholdChange.delete_expired()
+    with job_stage("daily", "deleteExpiredExportArchives") as stage:
+        stage.rows = deleteExpiredExportArchives()
+    with job_stage("daily", "deleteExpiredJobs") as stage:
+        stage.rows = Job.delete_expired()
+    household_ids = Household.find_ids_needing_analysis()
+    skipped = Household.count() - len(household_ids)
+    failed = 0
+    # task for all households with new activity
+    for household_id in household_ids:
+        try:
+            with job_stage("daily", "total", household_id):
+                analyseHousehold(household_id)
+        except Exception as e:
+            db.session.rollback()
+            app.logger.error(e, exc_info=e)
+            failed += 1
+
+    record_daily_analysis(len(household_ids), skipped)
+    app.logger.info(
+        f"--- daily analysis is completed ({len(household_ids)} processed, {skipped} skipped, {failed} failed) ---"
+    )
+
+
+def analyseHousehold(household_id: int):
+    started_at = datetime.now(timezone.utc)
+    # shopping tasks
+    with job_stage("daily", "clusterShoppings", household_id) as stage:
+        shoppinglist = Shoppinglist.getDefault(household_id)
+        shopping_instances = clusterShoppings(shoppinglist.id) if shoppinglist else None
+        stage.rows = len(shopping_instances or [])
+    if shopping_instances:
+        with job_stage("daily", "findItemOrdering", household_id) as stage:
+            stage.rows = findItemOrdering(shopping_instances)
+        with job_stage("daily", "findItemSuggestions", household_id) as stage:
+            stage.rows = findItemSuggestions(shopping_instances)
+    # recipe planner tasks
+    with job_stage("daily", "computeRecipeSuggestions", household_id) as stage:
+        stage.rows = computeRecipeSuggestions(household_id)
+    with job_stage("daily", "computeSuggestionRanking", household_id) as stage:
+        stage.rows = Recipe.compute_suggestion_ranking(household_id)
+
+    Household.query.filter(Household.id == household_id).update(
+        {
+            Household.last_analysis_at: started_at,
+            Household.updated_at: Household.updated_at,
+        }
+    )
+    db.session.commit()
 
 
 def halfHourly():
     # Remove expired Tokens
-    Token.delete_expired_access()
-    Token.delete_expired_refresh()
-    ChallengePasswordReset.delete_expired()
-    OIDCRequest.delete_expired()
+    with job_stage("halfHourly", "deleteExpiredAccessTokens") as stage:
+        stage.rows = Token.delete_expired_access()
+    with job_stage("halfHourly", "deleteExpiredRefreshTokens") as stage:
+        stage.rows = Token.delete_expired_refresh()
+    with job_stage("halfHourly", "deleteExpiredPasswordResets") as stage:
+        stage.rows = ChallengePasswordReset.delete_expired()
+    with job_stage("halfHourly", "deleteExpiredOIDCRequests") as stage:
+        stage.rows = OIDCRequest.delete_expired()
+    with job_stage("halfHourly", "failStaleJobs") as stage:
+        stage.rows = failStaleJobs()
@@ -6,7 +6,7 @@ import datetime
 from app.models.recipe_history import Status
 
 
-def computeRecipeSuggestions(household_id: int):
+def computeRecipeSuggestions(household_id: int) -> int:
     historyCount = (
         RecipeHistory.query.with_entities(
             RecipeHistory.recipe_id, func.count().label("count")
@@ -38,3 +38,4 @@ def computeRecipeSuggestions(household_id: int):
     # commit changes to db
     db.session.commit()
     app.logger.info("computed and stored new suggestion scores")
+    return len(historyCount)
@@ -0,0 +1,81 @@
+import fcntl
+import os
+from sqlalchemy import func, select, text
+from app.config import app, db, STORAGE_PATH
+
+# arbitrary but fixed key for the postgres advisory lock ("KOWL")
+ADVISORY_LOCK_KEY = 0x4B4F574C
+LOCK_FILE = os.path.join(STORAGE_PATH, "scheduler.lock")
+
+
+class SchedulerLock:
+    """
+    Elects a single process to run the scheduled jobs when every uWSGI worker
+    starts its own APScheduler. Uses a session level advisory lock on postgres
+    and a lock file otherwise. Both are released by the OS/database when the
+    holding process dies, a waiting process takes over on its next trigger.
+    """
+
+    def __init__(self):
+        self._connection = None
+        self._file = None
+
+    def acquire(self) -> bool:
+        """
+        Returns True if this process is (or just became) the leader
+        """
+        if "postgresql" in db.engine.name:
+            return self._acquire_advisory_lock()
+        return self._acquire_file_lock()
+
+    def _acquire_advisory_lock(self) -> bool:
+        if self._connection is not None:
+            try:
+                self._connection.execute(text("SELECT 1"))
+                return True
+            except Exception:
+                app.logger.warning("Lost scheduler leadership connection")
+                self._release_connection()
+
+        connection = db.engine.connect().execution_options(isolation_level="AUTOCOMMIT")
+        try:
+            locked = connection.execute(
+                select(func.pg_try_advisory_lock(ADVISORY_LOCK_KEY))
+            ).scalar()
+        except Exception as e:
+            connection.close()
+            raise e
+        if not locked:
+            connection.close()
+            return False
+        self._connection = connection
+        app.logger.info(f"Process {os.getpid()} is now the scheduler leader")
+        return True
+
+    def _release_connection(self):
+        try:
+            self._connection.invalidate()
+        except Exception:
+            pass
+        self._connection = None
+
+    def _acquire_file_lock(self) -> bool:
+        if self._file is not None:
+            return True
+
+        file = open(LOCK_FILE, "a+")
+        try:
+            fcntl.flock(file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            file.close()
+            return False
+        file.seek(0)
+        file.truncate()
+        file.write(str(os.getpid()))
+        file.flush()
+        self._file = file
+        app.logger.info(f"Process {os.getpid()} is now the scheduler leader")
+        return True
+
+
+scheduler_lock = SchedulerLock()
@@ -1,7 +1,7 @@
 from .user import User
 from .item import Item
 from .association import Association
-from .expense import Expense, ExpensePaidFor
+from .expense import Expense, ExpensePaidFor, ExpenseRollup
 from .settings import Settings
 from .history import History, Status
 from .recipe import RecipeTags, RecipeItems, Recipe
@@ -13,6 +13,9 @@ from .expense_category import ExpenseCategory
 from .category import Category
 from .token import Token
 from .household import Household, HouseholdMember
+from .household_change import HouseholdChange
+from .job import Job
+from .socket_event import SocketEvent, SocketRoom
 from .file import File
 from .challenge_mail_verify import ChallengeMailVerify
 from .challenge_password_reset import ChallengePasswordReset
@@ -41,7 +41,8 @@ class ChallengePasswordReset(db.Model, DbModelMixin):
         db.session.commit()
 
     @classmethod
-    def delete_expired(cls):
+    def delete_expired(cls) -> int:
         filter_before = datetime.now(timezone.utc) - timedelta(hours=3)
-        db.session.query(cls).filter(cls.created_at <= filter_before).delete()
+        count = db.session.query(cls).filter(cls.created_at <= filter_before).delete()
         db.session.commit()
+        return count
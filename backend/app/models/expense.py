@@ -1,4 +1,4 @@
-from datetime import datetime
+from datetime import date, datetime
 from typing import Self, List, TYPE_CHECKING
 from app import db
 from app.helpers import DbModelMixin, DbModelAuthorizeMixin
@@ -40,13 +40,7 @@ class Expense(db.Model, DbModelMixin, DbModelAuthorizeMixin):
 
     def obj_to_full_dict(self) -> dict:
         res = self.obj_to_dict()
-        paidFor = (
-            ExpensePaidFor.query.filter(ExpensePaidFor.expense_id == self.id)
-            .join(ExpensePaidFor.user)
-            .order_by(ExpensePaidFor.expense_id)
-            .all()
-        )
-        res["paid_for"] = [e.obj_to_dict() for e in paidFor]
+        res["paid_for"] = [e.obj_to_dict() for e in self.paid_for]
         if self.category:
             res["category"] = self.category.obj_to_full_dict()
         return res
@@ -99,3 +93,40 @@ class ExpensePaidFor(db.Model, DbModelMixin):
         return cls.query.filter(
             cls.expense_id == expense_id, cls.user_id == user_id
         ).first()
+
+
+class ExpenseRollup(db.Model, DbModelMixin):
+    """
+    Daily expense sums per household and category used by the statistics.
+    Rows with user_id None hold the full amounts, rows with a user_id hold
+    the share of that user. There is one row per household, day, user and
+    category, see ROLLUP_KEY
+    """
+
+    __tablename__ = "expense_rollup"
+
+    id: Mapped[int] = db.Column(db.Integer, primary_key=True)
+    household_id: Mapped[int] = db.Column(
+        db.Integer, db.ForeignKey("household.id", ondelete="CASCADE"), nullable=False
+    )
+    user_id: Mapped[int] = db.Column(
+        db.Integer, db.ForeignKey("user.id", ondelete="CASCADE"), nullable=True
+    )
+    day: Mapped[date] = db.Column(db.Date, nullable=False)
+    category_id: Mapped[int] = db.Column(
+        db.Integer,
+        # rows of deleted categories are rebuilt without category
+        db.ForeignKey("expense_category.id", ondelete="CASCADE"),
+        nullable=True,
+    )
+    amount: Mapped[float] = db.Column(db.Float, default=0, nullable=False)
+
+    # NULLs are distinct in unique indexes, so they are compared as 0
+    ROLLUP_KEY = (
+        household_id,
+        day,
+        db.func.coalesce(user_id, db.literal_column("0")),
+        db.func.coalesce(category_id, db.literal_column("0")),
+    )
+
+    __table_args__ = (db.Index("uq_expense_rollup_key", *ROLLUP_KEY, unique=True),)
@@ -44,18 +44,31 @@ class File(db.Model, DbModelMixin, DbModelAuthorizeMixin):
             and not self.profile_picture
         )
 
-    def checkAuthorized(self, requires_admin=False, household_id: int | None = None):
-        if self.created_by and current_user and self.created_by == current_user.id:
+    def checkAuthorized(
+        self, requires_admin=False, household_id: int | None = None, user=None
+    ):
+        user = user or current_user
+        if self.created_by and user and self.created_by == user.id:
             pass  # created by user can access his pictures
         elif self.profile_picture:
             pass  # profile pictures are public
         elif self.recipe:
             if not self.recipe.public:
-                super().checkAuthorized(household_id=self.recipe.household_id, requires_admin=requires_admin)
+                super().checkAuthorized(
+                    household_id=self.recipe.household_id,
+                    requires_admin=requires_admin,
+                    user=user,
+                )
         elif self.household:
-            super().checkAuthorized(household_id=self.household.id, requires_admin=requires_admin)
+            super().checkAuthorized(
+                household_id=self.household.id, requires_admin=requires_admin, user=user
+            )
         elif self.expense:
-            super().checkAuthorized(household_id=self.expense.household_id, requires_admin=requires_admin)
+            super().checkAuthorized(
+                household_id=self.expense.household_id,
+                requires_admin=requires_admin,
+                user=user,
+            )
         else:
             raise ForbiddenRequest()
 
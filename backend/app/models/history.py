@@ -1,14 +1,15 @@
 from typing import Self, TYPE_CHECKING
 from app import db
 from app.helpers import DbModelMixin
-from .shoppinglist import ShoppinglistItems
-from sqlalchemy import func
+from .household import Household
+from .shoppinglist import Shoppinglist, ShoppinglistItems
+from sqlalchemy import event, func, select
 from sqlalchemy.orm import Mapped
 
 import enum
 
 if TYPE_CHECKING:
-    from app.models import Item, Shoppinglist
+    from app.models import Item
 
 
 class Status(enum.Enum):
@@ -117,3 +118,13 @@ class History(db.Model, DbModelMixin):
                 .order_by(cls.created_at.desc(), cls.item_id)
                 .limit(limit)
             )
+
+
+@event.listens_for(History, "after_insert")
+def _history_after_insert(mapper, connection, target: History):
+    Household.touch_activity(
+        connection,
+        select(Shoppinglist.household_id)
+        .where(Shoppinglist.id == target.shoppinglist_id)
+        .scalar_subquery(),
+    )
@@ -1,8 +1,10 @@
+from datetime import datetime, timedelta, timezone
 from typing import Self, List, TYPE_CHECKING
 from app import db
 from app.helpers import DbModelMixin
 from app.helpers.db_list_type import DbListType
-from sqlalchemy.orm import Mapped
+from sqlalchemy import event, insert, inspect, select, update
+from sqlalchemy.orm import Mapped, joinedload, selectinload
 
 if TYPE_CHECKING:
     from app.models import *
@@ -24,6 +26,18 @@ class Household(db.Model, DbModelMixin):
 
     view_ordering: Mapped[List] = db.Column(DbListType(), default=list())
 
+    # watermarks used to skip idle households in the daily analysis
+    last_activity_at: Mapped[datetime] = db.Column(db.DateTime, nullable=True)
+    last_analysis_at: Mapped[datetime] = db.Column(db.DateTime, nullable=True)
+
+    # hash of the language template the default items were last upgraded to
+    default_items_hash: Mapped[str] = db.Column(db.String(64), nullable=True)
+
+    # bumped by every change to the household's data, used to invalidate caches
+    version: Mapped[int] = db.Column(
+        db.BigInteger, nullable=False, default=0, server_default="0"
+    )
+
     items: Mapped[List["Item"]] = db.relationship(
         "Item", back_populates="household", cascade="all, delete-orphan"
     )
@@ -50,8 +64,15 @@ class Household(db.Model, DbModelMixin):
     )
     photo_file = db.relationship("File", back_populates="household", uselist=False)
 
+    # history older than this still influences the recipe suggestion scores
+    ANALYSIS_WINDOW = timedelta(days=7)
+    # rows loaded at once when streaming exports
+    EXPORT_BATCH_SIZE = 200
+
     def obj_to_dict(self) -> dict:
-        res = super().obj_to_dict()
+        res = super().obj_to_dict(
+            skip_columns=["last_activity_at", "last_analysis_at", "version"]
+        )
         res["member"] = [m.obj_to_user_dict() for m in getattr(self, "member")]
         res["default_shopping_list"] = self.shoppinglists[0].obj_to_dict()
         if self.photo_file:
@@ -65,6 +86,48 @@ class Household(db.Model, DbModelMixin):
         return res
 
     def obj_to_export_dict(self) -> dict:
+        res = self.obj_to_export_settings_dict()
+        res["recipes"] = [s.obj_to_export_dict() for s in self.recipes]
+        res["items"] = [s.obj_to_export_dict() for s in self.items]
+        res["expenses"] = [s.obj_to_export_dict() for s in self.expenses]
+        return res
+
+    def obj_to_export_stream_dict(self) -> dict:
+        """
+        Like obj_to_export_dict, but recipes, items and expenses are
+        iterators reading the rows in batches, see stream_json
+        """
+        from app.models import Expense, ExpensePaidFor, Item, Recipe, RecipeTags
+
+        res = self.obj_to_export_settings_dict()
+        res["recipes"] = (
+            e.obj_to_export_dict()
+            for e in Recipe.query.filter(Recipe.household_id == self.id)
+            .order_by(Recipe.id)
+            .options(selectinload(Recipe.tags).joinedload(RecipeTags.tag))
+            .yield_per(self.EXPORT_BATCH_SIZE)
+        )
+        res["items"] = (
+            e.obj_to_export_dict()
+            for e in Item.query.filter(Item.household_id == self.id)
+            .order_by(Item.id)
+            .options(joinedload(Item.category))
+            .yield_per(self.EXPORT_BATCH_SIZE)
+        )
+        res["expenses"] = (
+            e.obj_to_export_dict()
+            for e in Expense.query.filter(Expense.household_id == self.id)
+            .order_by(Expense.id)
+            .options(
+                joinedload(Expense.category),
+                joinedload(Expense.paid_by),
+                selectinload(Expense.paid_for).joinedload(ExpensePaidFor.user),
+            )
+            .yield_per(self.EXPORT_BATCH_SIZE)
+        )
+        return res
+
+    def obj_to_export_settings_dict(self) -> dict:
         return {
             "name": self.name,
             "language": self.language,
@@ -73,11 +136,117 @@ class Household(db.Model, DbModelMixin):
             "expenses_feature": self.expenses_feature,
             "member": [m.user.username for m in getattr(self, "member")],
             "shoppinglists": [s.name for s in self.shoppinglists],
-            "recipes": [s.obj_to_export_dict() for s in self.recipes],
-            "items": [s.obj_to_export_dict() for s in self.items],
-            "expenses": [s.obj_to_export_dict() for s in self.expenses],
         }
 
+    @classmethod
+    def find_needing_default_items_upgrade(
+        cls, template_hashes: dict[str, str]
+    ) -> list[tuple[int, str]]:
+        """
+        (id, language) of households whose default items were not upgraded to
+        the current template of their language, template_hashes maps the
+        language to the hash of its template
+        """
+        return [
+            (id, language)
+            for id, language, default_items_hash in cls.query.with_entities(
+                cls.id, cls.language, cls.default_items_hash
+            )
+            .filter(cls.language.in_(template_hashes.keys()))
+            .order_by(cls.id)
+            if default_items_hash != template_hashes[language]
+        ]
+
+    @classmethod
+    def find_ids_needing_analysis(cls) -> list[int]:
+        """
+        Ids of households that had activity since (or shortly before) their
+        last analysis, were never analysed, or have not been analysed for a while
+        """
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        res = []
+        for id, last_activity_at, last_analysis_at in (
+            cls.query.with_entities(cls.id, cls.last_activity_at, cls.last_analysis_at)
+            .order_by(cls.id)
+            .all()
+        ):
+            if (
+                not last_analysis_at
+                or last_analysis_at < now - cls.ANALYSIS_WINDOW
+                or last_activity_at
+                and last_activity_at > last_analysis_at - cls.ANALYSIS_WINDOW
+            ):
+                res.append(id)
+        return res
+
+    @classmethod
+    def touch_activity(cls, connection, household_id):
+        """
+        Bump the activity watermark. Meant to be called from flush events,
+        household_id may be a scalar subquery
+        """
+        connection.execute(
+            update(cls)
+            .where(cls.id == household_id)
+            .values(
+                last_activity_at=datetime.now(timezone.utc),
+                updated_at=cls.updated_at,
+            )
+        )
+
+    @classmethod
+    def find_version(cls, household_id: int) -> int | None:
+        return db.session.query(cls.version).filter(cls.id == household_id).scalar()
+
+    @classmethod
+    def find_committed_version(cls, household_id: int) -> int | None:
+        """
+        Version written by the last commit of this session that changed the
+        household, only queried if there was none
+        """
+        version = db.session.info.get("household_versions", {}).get(household_id)
+        return version if version is not None else cls.find_version(household_id)
+
+    @classmethod
+    def find_version_tag(cls, household_id: int) -> str | None:
+        """
+        Opaque tag that changes with every change to the household's data.
+        Includes the creation time as ids can be reused after a deletion
+        """
+        res = (
+            db.session.query(cls.version, cls.created_at)
+            .filter(cls.id == household_id)
+            .first()
+        )
+        if not res:
+            return None
+        return f"{res.created_at.timestamp():.6f}-{res.version}"
+
+    @classmethod
+    def bump_version(
+        cls,
+        household_id,
+        changes: list[tuple[str, str, str]] | None = None,
+    ):
+        """
+        Needed after bulk statements, ORM changes are picked up by the flush
+        listener below. household_id may be a list or a subquery. changes
+        are the (entity, entity id, op) written by the statements, without
+        them clients of the change feed have to resync. The version is
+        bumped when the transaction is committed
+        """
+        ids = (
+            [household_id]
+            if isinstance(household_id, int)
+            else db.session.execute(select(cls.id).where(cls.id.in_(household_id)))
+            .scalars()
+            .all()
+        )
+        _add_household_changes(
+            db.session(),
+            {id: list(changes) if changes is not None else None for id in ids},
+        )
+
 
 class HouseholdMember(db.Model, DbModelMixin):
     __tablename__ = "household_member"
@@ -131,3 +300,171 @@ class HouseholdMember(db.Model, DbModelMixin):
     @classmethod
     def find_by_user(cls, user_id: int) -> list[Self]:
         return cls.query.filter(cls.user_id == user_id).all()
+
+
+def _collect_household_changes(session) -> list[tuple[int, str, str, str]]:
+    """
+    (household id, entity, entity id, op) for the objects of a flush. Children
+    without a household_id column are resolved through their parent
+    """
+    from app.models import (
+        Association,
+        Expense,
+        ExpensePaidFor,
+        History,
+        Item,
+        Job,
+        Recipe,
+        RecipeItems,
+        RecipeTags,
+        Shoppinglist,
+        ShoppinglistItems,
+    )
+
+    parents = {
+        RecipeItems: (Recipe, "recipe_id"),
+        RecipeTags: (Recipe, "recipe_id"),
+        ShoppinglistItems: (Shoppinglist, "shoppinglist_id"),
+        History: (Shoppinglist, "shoppinglist_id"),
+        ExpensePaidFor: (Expense, "expense_id"),
+        Association: (Item, "antecedent_id"),
+    }
+
+    changed = [(o, "insert") for o in session.new]
+    changed += [(o, "delete") for o in session.deleted]
+    changed += [(o, "update") for o in session.dirty if session.is_modified(o)]
+    # job status is not household data
+    changed = [(o, op) for o, op in changed if not isinstance(o, Job)]
+
+    # parent id -> household id, from the flushed objects and then the database
+    known = {}
+    for obj, _ in changed:
+        if type(obj) in (Recipe, Shoppinglist, Expense, Item):
+            known[(type(obj), obj.id)] = obj.household_id
+    missing = {}
+    for obj, _ in changed:
+        if type(obj) in parents:
+            parent, column = parents[type(obj)]
+            if (parent, getattr(obj, column)) not in known:
+                missing.setdefault(parent, set()).add(getattr(obj, column))
+    connection = session.connection()
+    for parent, ids in missing.items():
+        for id, household_id in connection.execute(
+            select(parent.id, parent.household_id).where(parent.id.in_(ids))
+        ):
+            known[(parent, id)] = household_id
+
+    res = []
+    for obj, op in changed:
+        if isinstance(obj, Household):
+            household_id = obj.id
+        elif type(obj) in parents:
+            parent, column = parents[type(obj)]
+            household_id = known.get((parent, getattr(obj, column)))
+        else:
+            household_id = getattr(obj, "household_id", None)
+        if household_id is None:
+            continue
+        mapper = inspect(obj).mapper
+        entity_id = ":".join(str(v) for v in mapper.primary_key_from_instance(obj))
+        res.append((household_id, mapper.local_table.name, entity_id, op))
+    return res
+
+
+def _log_household_changes(
+    connection, changes: dict[int, list[tuple[str, str, str]] | None]
+) -> dict[int, int]:
+    """
+    Bumps the version of the households and writes their (entity, entity
+    id, op) changes to the change feed, None writes a reset marker instead.
+    Every version gets a row, so the feed has no gaps. Returns the new
+    versions, households that do not exist anymore are left out
+    """
+    from app.models import HouseholdChange
+
+    connection.execute(
+        update(Household)
+        .where(Household.id.in_(changes.keys()))
+        .values(version=Household.version + 1, updated_at=Household.updated_at)
+    )
+    versions = dict(
+        connection.execute(
+            select(Household.id, Household.version).where(
+                Household.id.in_(changes.keys())
+            )
+        ).all()
+    )
+    rows = []
+    for household_id, version in versions.items():
+        entries = changes[household_id]
+        if entries is None:
+            entries = [("household", str(household_id), HouseholdChange.RESET)]
+        else:
+            # the same row may have been flushed several times
+            entries = [
+                e
+                for e in dict.fromkeys(entries)
+                if e[0] not in HouseholdChange.IGNORED_ENTITIES
+            ]
+            # only derived data changed, nothing to sync
+            entries = entries or [
+                ("household", str(household_id), HouseholdChange.TOUCH)
+            ]
+        rows += [
+            {
+                "household_id": household_id,
+                "version": version,
+                "entity": entity,
+                "entity_id": entity_id,
+                "op": op,
+            }
+            for entity, entity_id, op in entries
+        ]
+    if rows:
+        connection.execute(insert(HouseholdChange), rows)
+    return versions
+
+
+def _add_household_changes(
+    session, changes: dict[int, list[tuple[str, str, str]] | None]
+):
+    """
+    Adds changes to the ones logged when the transaction is committed, a
+    reset (None) replaces all changes of its household
+    """
+    pending = session.info.setdefault("household_changes", {})
+    for household_id, entries in changes.items():
+        if entries is None or pending.get(household_id, []) is None:
+            pending[household_id] = None
+        else:
+            pending.setdefault(household_id, []).extend(entries)
+
+
+@event.listens_for(db.session, "after_flush")
+def _household_after_flush(session, flush_context):
+    changes = {}
+    for household_id, entity, entity_id, op in _collect_household_changes(session):
+        changes.setdefault(household_id, []).append((entity, entity_id, op))
+    _add_household_changes(session, changes)
+
+
+@event.listens_for(db.session, "before_commit")
+def _household_before_commit(session):
+    """
+    Bumps the version of every changed household once per transaction, so
+    the household rows are only locked right before the commit
+    """
+    if session.in_nested_transaction():
+        return
+    session.flush()
+    changes = session.info.pop("household_changes", None)
+    session.info["household_versions"] = (
+        _log_household_changes(session.connection(), changes) if changes else {}
+    )
+
+
+@event.listens_for(db.session, "after_transaction_end")
+def _household_after_transaction_end(session, transaction):
+    # changes of rolled back transactions are dropped
+    if transaction.parent is None:
+        session.info.pop("household_changes", None)
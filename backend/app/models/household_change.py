@@ -0,0 +1,95 @@
+from datetime import datetime, timezone
+from typing import Self, TYPE_CHECKING
+from app import db
+from app.config import CHANGE_FEED_RETENTION
+from app.helpers import DbModelMixin
+from sqlalchemy.orm import Mapped
+
+if TYPE_CHECKING:
+    from app.models import *
+
+
+class HouseholdChange(db.Model, DbModelMixin):
+    """
+    Append-only log of changes to a household's data, written in the same
+    transaction as the change itself (see household.py). Rows removed by an
+    ON DELETE CASCADE of the database are not seen by the session and not
+    logged, so only tables that clients do not sync may use it
+    """
+
+    __tablename__ = "household_change"
+
+    # derived or log tables, clients get them through their parents
+    IGNORED_ENTITIES = {
+        "expense_rollup",
+        "history",
+        "recipe_history",
+        "household_change",
+    }
+    # ops of the "household" marker rows. reset: the version was bumped by
+    # bulk statements, clients have to resync. touch: only ignored entities
+    # changed, there is nothing to sync
+    RESET = "reset"
+    TOUCH = "touch"
+
+    id: Mapped[int] = db.Column(
+        db.BigInteger().with_variant(db.Integer, "sqlite"), primary_key=True
+    )
+    household_id: Mapped[int] = db.Column(
+        db.Integer, db.ForeignKey("household.id", ondelete="CASCADE"), nullable=False
+    )
+    # household version after the change
+    version: Mapped[int] = db.Column(db.BigInteger, nullable=False)
+    entity: Mapped[str] = db.Column(db.String(64), nullable=False)
+    # primary key, composite keys are joined with ":"
+    entity_id: Mapped[str] = db.Column(db.String(128), nullable=False)
+    # insert, update or delete
+    op: Mapped[str] = db.Column(db.String(8), nullable=False)
+
+    __table_args__ = (
+        db.Index("ix_household_change_household_id_version", "household_id", "version"),
+    )
+
+    @classmethod
+    def find_since(
+        cls, household_id: int, since: int, limit: int
+    ) -> tuple[list[Self], bool]:
+        """
+        Changes after version since, cut at a version boundary after roughly
+        limit rows. Returns the changes and whether more are available
+        """
+        query = cls.query.filter(
+            cls.household_id == household_id, cls.version > since
+        ).order_by(cls.id)
+        last = query.offset(limit - 1).first()
+        if not last:
+            return query.all(), False
+        return (
+            query.filter(cls.version <= last.version).all(),
+            query.filter(cls.version > last.version).first() is not None,
+        )
+
+    @classmethod
+    def has_reset_since(cls, household_id: int, since: int) -> bool:
+        return db.session.query(
+            cls.query.filter(
+                cls.household_id == household_id,
+                cls.version > since,
+                cls.op == cls.RESET,
+            ).exists()
+        ).scalar()
+
+    @classmethod
+    def find_min_version(cls, household_id: int) -> int | None:
+        return (
+            db.session.query(db.func.min(cls.version))
+            .filter(cls.household_id == household_id)
+            .scalar()
+        )
+
+    @classmethod
+    def delete_expired(cls) -> int:
+        filter_before = datetime.now(timezone.utc) - CHANGE_FEED_RETENTION
+        count = cls.query.filter(cls.created_at <= filter_before).delete()
+        db.session.commit()
+        return count
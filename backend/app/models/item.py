@@ -59,8 +59,8 @@ class Item(db.Model, DbModelMixin, DbModelAuthorizeMixin):
     def obj_to_dict(self) -> dict:
         res = super().obj_to_dict()
         if self.category_id:
-            category = Category.find_by_id(self.category_id)
-            res["category"] = category.obj_to_dict()
+            # many-to-one loads are served from the identity map after the first
+            res["category"] = self.category.obj_to_dict()
         return res
 
     def obj_to_export_dict(self) -> dict:
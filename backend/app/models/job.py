@@ -0,0 +1,93 @@
+from datetime import datetime, timezone
+from typing import Any, Self, TYPE_CHECKING
+from app import db
+from app.config import JOB_RETENTION, JOB_TIMEOUT
+from app.helpers import DbModelMixin
+from sqlalchemy.orm import Mapped
+
+if TYPE_CHECKING:
+    from app.models import *
+
+
+class Job(db.Model, DbModelMixin):
+    """
+    Background job of a household (see app/jobs/background.py). Changes to
+    jobs are not household data and do not bump the household version
+    """
+
+    __tablename__ = "job"
+
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+    id: Mapped[int] = db.Column(db.Integer, primary_key=True)
+    household_id: Mapped[int] = db.Column(
+        db.Integer, db.ForeignKey("household.id", ondelete="CASCADE"), nullable=False
+    )
+    created_by: Mapped[int] = db.Column(
+        db.Integer, db.ForeignKey("user.id", ondelete="SET NULL"), nullable=True
+    )
+    type: Mapped[str] = db.Column(db.String(64), nullable=False)
+    status: Mapped[str] = db.Column(db.String(16), nullable=False, default=PENDING)
+    # 0 to 1
+    progress: Mapped[float] = db.Column(db.Float, nullable=False, default=0)
+    attempts: Mapped[int] = db.Column(db.Integer, nullable=False, default=0)
+    # input of the job, cleared once it finished
+    args: Mapped[Any] = db.Column(db.JSON, nullable=True)
+    result: Mapped[Any] = db.Column(db.JSON, nullable=True)
+    error: Mapped[str] = db.Column(db.String, nullable=True)
+    finished_at: Mapped[datetime] = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (db.Index("ix_job_household_id", "household_id"),)
+
+    def obj_to_dict(
+        self,
+        skip_columns: list[str] | None = None,
+        include_columns: list[str] | None = None,
+    ) -> dict:
+        return super().obj_to_dict(skip_columns or ["args"], include_columns)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (self.DONE, self.FAILED)
+
+    def report(self, progress: float):
+        """
+        Stores the progress of a running job. Commits the session, so only
+        call it between transactions of the job
+        """
+        self.progress = min(max(progress, 0), 1)
+        self.save()
+
+    @classmethod
+    def find_in_household(cls, household_id: int, id: int) -> Self | None:
+        return cls.query.filter(cls.household_id == household_id, cls.id == id).first()
+
+    @classmethod
+    def recent_from_household(cls, household_id: int, limit: int = 50) -> list[Self]:
+        return (
+            cls.query.filter(cls.household_id == household_id)
+            .order_by(cls.id.desc())
+            .limit(limit)
+            .all()
+        )
+
+    @classmethod
+    def find_stale(cls) -> list[Self]:
+        """
+        Pending or running jobs that were not updated for JOB_TIMEOUT
+        """
+        filter_before = datetime.now(timezone.utc) - JOB_TIMEOUT
+        return cls.query.filter(
+            cls.status.in_([cls.PENDING, cls.RUNNING]),
+            cls.updated_at <= filter_before,
+        ).all()
+
+    @classmethod
+    def delete_expired(cls) -> int:
+        filter_before = datetime.now(timezone.utc) - JOB_RETENTION
+        count = cls.query.filter(cls.created_at <= filter_before).delete()
+        db.session.commit()
+        return count
@@ -45,7 +45,8 @@ class OIDCRequest(db.Model, DbModelMixin):
         ).first()
 
     @classmethod
-    def delete_expired(cls):
+    def delete_expired(cls) -> int:
         filter_before = datetime.now(timezone.utc) - timedelta(minutes=7)
-        db.session.query(cls).filter(cls.created_at <= filter_before).delete()
+        count = db.session.query(cls).filter(cls.created_at <= filter_before).delete()
         db.session.commit()
+        return count
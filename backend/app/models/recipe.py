@@ -1,12 +1,15 @@
 from __future__ import annotations
+from collections import defaultdict
 from typing import Self, List, TYPE_CHECKING
 from app import db
+from app.errors import InvalidUsage
 from app.helpers import DbModelMixin, DbModelAuthorizeMixin
+from .file import File
 from .item import Item
 from .tag import Tag
 from .planner import Planner
 from random import randint
-from sqlalchemy.orm import Mapped
+from sqlalchemy.orm import Mapped, Query, joinedload, noload
 
 if TYPE_CHECKING:
     from app.models import *
@@ -15,6 +18,26 @@ if TYPE_CHECKING:
 class Recipe(db.Model, DbModelMixin, DbModelAuthorizeMixin):
     __tablename__ = "recipe"
 
+    # fields of the summary view, enough to render recipe lists
+    SUMMARY_FIELDS = (
+        "id",
+        "name",
+        "photo",
+        "photo_hash",
+        "time",
+        "cook_time",
+        "prep_time",
+        "yields",
+    )
+    RELATED_FIELDS = (
+        "photo_hash",
+        "planned",
+        "planned_days",
+        "items",
+        "tags",
+        "household",
+    )
+
     id: Mapped[int] = db.Column(db.Integer, primary_key=True)
     name: Mapped[str] = db.Column(db.String(128))
     description: Mapped[str] = db.Column(db.String())
@@ -50,8 +73,7 @@ class Recipe(db.Model, DbModelMixin, DbModelAuthorizeMixin):
         res = super().obj_to_dict()
         res["planned"] = len(self.plans) > 0
         res["planned_days"] = [plan.day for plan in self.plans if plan.day >= 0]
-        if self.photo_file:
-            res["photo_hash"] = self.photo_file.blur_hash
+        res["photo_hash"] = self.photo_file.blur_hash if self.photo_file else None
         return res
 
     def obj_to_full_dict(self) -> dict:
@@ -84,7 +106,86 @@ class Recipe(db.Model, DbModelMixin, DbModelAuthorizeMixin):
         return res
 
     @classmethod
-    def compute_suggestion_ranking(cls, household_id: int):
+    def projection_fields(
+        cls, fields: str | None = None, view: str | None = None
+    ) -> set[str] | None:
+        """
+        Parses a comma separated field list or a named view into the fields
+        to serialize, None for the full representation
+        """
+        if fields:
+            res = {f.strip() for f in fields.split(",") if f.strip()}
+            unknown = res - set(cls.get_column_names()) - set(cls.RELATED_FIELDS)
+            if unknown:
+                raise InvalidUsage(f"Unknown fields: {', '.join(sorted(unknown))}")
+            return res
+        if view == "summary":
+            return set(cls.SUMMARY_FIELDS)
+        return None
+
+    @classmethod
+    def project(cls, query: Query, fields: set[str]) -> list[dict]:
+        """
+        Serializes the recipes selected by query with only the given fields
+        (see projection_fields). Only the requested columns are selected and
+        relationships are loaded in one query each, only when requested
+        """
+        columns = [c for c in cls.get_column_names() if c in fields]
+        entities = [cls.id, cls.household_id] + [getattr(cls, c) for c in columns]
+        if "photo_hash" in fields:
+            columns.append("photo_hash")
+            entities.append(File.blur_hash)
+            query = query.outerjoin(File, File.filename == cls.photo)
+        rows = query.with_entities(*entities).all()
+        res = [dict(zip(columns, row[2:])) for row in rows]
+
+        ids = [row[0] for row in rows]
+        if ids and ("planned" in fields or "planned_days" in fields):
+            days = defaultdict(list)
+            for recipe_id, day in db.session.query(
+                Planner.recipe_id, Planner.day
+            ).filter(Planner.recipe_id.in_(ids)):
+                days[recipe_id].append(day)
+            for id, e in zip(ids, res):
+                if "planned" in fields:
+                    e["planned"] = id in days
+                if "planned_days" in fields:
+                    e["planned_days"] = [d for d in days.get(id, []) if d >= 0]
+        if ids and "items" in fields:
+            items = defaultdict(list)
+            for con in (
+                RecipeItems.query.filter(RecipeItems.recipe_id.in_(ids))
+                .options(noload(RecipeItems.recipe))
+                .order_by(RecipeItems._name)
+            ):
+                items[con.recipe_id].append(con.obj_to_item_dict())
+            for id, e in zip(ids, res):
+                e["items"] = items.get(id, [])
+        if ids and "tags" in fields:
+            tags = defaultdict(list)
+            for con in (
+                RecipeTags.query.filter(RecipeTags.recipe_id.in_(ids))
+                .options(noload(RecipeTags.recipe), joinedload(RecipeTags.tag))
+                .order_by(RecipeTags._name)
+            ):
+                tags[con.recipe_id].append(con.obj_to_item_dict())
+            for id, e in zip(ids, res):
+                e["tags"] = tags.get(id, [])
+        if ids and "household" in fields:
+            from app.models import Household
+
+            households = {
+                h.id: h.obj_to_public_dict()
+                for h in Household.query.filter(
+                    Household.id.in_(list({row[1] for row in rows}))
+                )
+            }
+            for row, e in zip(rows, res):
+                e["household"] = households[row[1]]
+        return res
+
+    @classmethod
+    def compute_suggestion_ranking(cls, household_id: int) -> int:
         # reset all suggestion ranks
         for r in cls.query.filter(cls.household_id == household_id).all():
             r.suggestion_rank = 0
@@ -113,6 +214,7 @@ class Recipe(db.Model, DbModelMixin, DbModelAuthorizeMixin):
                     break
             recipes.pop(to_be_removed)
         db.session.commit()
+        return current_rank - 1
 
     @classmethod
     def find_suggestions(
@@ -143,33 +245,38 @@ class Recipe(db.Model, DbModelMixin, DbModelAuthorizeMixin):
 
     @classmethod
     def search_name(cls, household_id: int, name: str) -> list[Self]:
+        return cls.search_name_query(household_id, name).all()
+
+    @classmethod
+    def search_name_query(cls, household_id: int, name: str) -> Query:
         if "*" in name or "_" in name:
             looking_for = name.replace("_", "__").replace("*", "%").replace("?", "_")
         else:
             looking_for = "%{0}%".format(name)
-        return (
-            cls.query.filter(
-                cls.household_id == household_id, cls.name.ilike(looking_for)
-            )
-            .order_by(cls.name)
-            .all()
-        )
+        return cls.query.filter(
+            cls.household_id == household_id, cls.name.ilike(looking_for)
+        ).order_by(cls.name)
 
     @classmethod
     def all_by_name_with_filter(
         cls, household_id: int, filter: list[str]
     ) -> list[Self]:
+        return cls.all_by_name_with_filter_query(household_id, filter).all()
+
+    @classmethod
+    def all_by_name_with_filter_query(
+        cls, household_id: int, filter: list[str]
+    ) -> Query:
         sq = (
             db.session.query(RecipeTags.recipe_id)
             .join(RecipeTags.tag)
             .filter(Tag.name.in_(filter))
-            .subquery()
+            .scalar_subquery()
         )
         return (
             db.session.query(cls)
             .filter(cls.household_id == household_id, cls.id.in_(sq))
             .order_by(cls.name)
-            .all()
         )
 
 
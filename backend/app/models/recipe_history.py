@@ -1,16 +1,14 @@
-from typing import Self, TYPE_CHECKING
+from typing import Self
 from app import db
 from app.helpers import DbModelMixin
+from .household import Household
 from .recipe import Recipe
 from .planner import Planner
-from sqlalchemy import func
+from sqlalchemy import event, func
 from sqlalchemy.orm import Mapped
 
 import enum
 
-if TYPE_CHECKING:
-    from app.models import Household, Recipe
-
 
 class Status(enum.Enum):
     ADDED = 1
@@ -86,3 +84,8 @@ class RecipeHistory(db.Model, DbModelMixin):
             .select()
         )
         return cls.query.filter(cls.id.in_(sq2)).order_by(cls.id.desc()).limit(9)
+
+
+@event.listens_for(RecipeHistory, "after_insert")
+def _recipe_history_after_insert(mapper, connection, target: RecipeHistory):
+    Household.touch_activity(connection, target.household_id)
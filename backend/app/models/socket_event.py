@@ -0,0 +1,159 @@
+from typing import Any, Self, TYPE_CHECKING
+from app import db
+from app.helpers import DbModelMixin
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Mapped
+
+if TYPE_CHECKING:
+    from app.models import *
+
+
+class SocketRoom(db.Model, DbModelMixin):
+    """
+    Sequence counter of a household socket room, shared by all processes.
+    slim rooms are numbered separately (see app/service/socket_events.py)
+    """
+
+    __tablename__ = "socket_room"
+
+    household_id: Mapped[int] = db.Column(
+        db.Integer, db.ForeignKey("household.id", ondelete="CASCADE"), primary_key=True
+    )
+    slim: Mapped[bool] = db.Column(db.Boolean, primary_key=True)
+    seq: Mapped[int] = db.Column(db.BigInteger, nullable=False, default=0)
+
+    @classmethod
+    def next_seq(cls, connection: Connection, household_id: int, slim: bool) -> int:
+        statement = (
+            update(cls)
+            .where(cls.household_id == household_id, cls.slim == slim)
+            .values(seq=cls.seq + 1)
+            .returning(cls.seq)
+        )
+        seq = connection.execute(statement).scalar()
+        if seq is not None:
+            return seq
+        try:
+            with connection.begin_nested():
+                connection.execute(
+                    insert(cls).values(household_id=household_id, slim=slim, seq=1)
+                )
+            return 1
+        except IntegrityError:  # created by another process in between
+            return connection.execute(statement).scalar()
+
+    @classmethod
+    def find_seq(cls, household_id: int, slim: bool) -> int:
+        return (
+            db.session.query(cls.seq)
+            .filter(cls.household_id == household_id, cls.slim == slim)
+            .scalar()
+            or 0
+        )
+
+
+class SocketEvent(db.Model, DbModelMixin):
+    """
+    Recent events of a household socket room, kept for clients that
+    reconnect. Written outside of the session, so events are not household
+    data and do not bump the household version
+    """
+
+    __tablename__ = "socket_event"
+
+    id: Mapped[int] = db.Column(
+        db.BigInteger().with_variant(db.Integer, "sqlite"), primary_key=True
+    )
+    household_id: Mapped[int] = db.Column(
+        db.Integer, db.ForeignKey("household.id", ondelete="CASCADE"), nullable=False
+    )
+    slim: Mapped[bool] = db.Column(db.Boolean, nullable=False)
+    seq: Mapped[int] = db.Column(db.BigInteger, nullable=False)
+    event: Mapped[str] = db.Column(db.String(64), nullable=False)
+    data: Mapped[Any] = db.Column(db.JSON, nullable=False)
+
+    __table_args__ = (
+        db.UniqueConstraint(
+            "household_id", "slim", "seq", name="uq_socket_event_household_id_slim_seq"
+        ),
+    )
+
+    @classmethod
+    def record(
+        cls, events: list[tuple[int, bool, str, Any | None]], keep: int
+    ) -> list[int | None]:
+        """
+        Numbers and stores the (household id, slim, event, data) events in
+        one transaction, only the last keep events of a room are kept. Events
+        without data were not sent, they only make clients that missed them
+        resync. Returns the sequence numbers, None for events not sent
+        """
+        res = []
+        # rooms whose last number is a skipped event, and the last seqs
+        skipped, last = set(), {}
+        with db.engine.begin() as connection:
+            for household_id, slim, event, data in events:
+                room = (household_id, slim)
+                if data is None:
+                    # one missed event is enough to make clients resync
+                    if room not in skipped and cls._sent_last(connection, *room):
+                        SocketRoom.next_seq(connection, *room)
+                    skipped.add(room)
+                    res.append(None)
+                    continue
+                skipped.discard(room)
+                seq = last[room] = SocketRoom.next_seq(connection, *room)
+                connection.execute(
+                    insert(cls).values(
+                        household_id=household_id,
+                        slim=slim,
+                        seq=seq,
+                        event=event,
+                        data=data,
+                    )
+                )
+                res.append(seq)
+            for (household_id, slim), seq in last.items():
+                if seq > keep:
+                    connection.execute(
+                        delete(cls).where(
+                            cls.household_id == household_id,
+                            cls.slim == slim,
+                            cls.seq <= seq - keep,
+                        )
+                    )
+        return res
+
+    @classmethod
+    def _sent_last(cls, connection: Connection, household_id: int, slim: bool) -> bool:
+        """
+        Whether the last number of the room is a stored event (or the room
+        has no number yet), so a skipped event has to take a new one
+        """
+        seq = connection.execute(
+            select(SocketRoom.seq).where(
+                SocketRoom.household_id == household_id, SocketRoom.slim == slim
+            )
+        ).scalar()
+        if seq is None:
+            return True
+        return (
+            seq
+            == connection.execute(
+                select(func.max(cls.seq)).where(
+                    cls.household_id == household_id, cls.slim == slim
+                )
+            ).scalar()
+        )
+
+    @classmethod
+    def find_since(cls, household_id: int, slim: bool, seq: int) -> list[Self]:
+        return (
+            cls.query.filter(
+                cls.household_id == household_id, cls.slim == slim, cls.seq > seq
+            )
+            .order_by(cls.seq)
+            .all()
+        )
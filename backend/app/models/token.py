@@ -33,22 +33,16 @@ class Token(db.Model, DbModelMixin):
     user: Mapped["User"] = db.relationship("User", lazy='selectin')
 
     def obj_to_dict(self, skip_columns=None, include_columns=None) -> dict:
-        if skip_columns:
-            skip_columns = skip_columns + ["jti"]
-        else:
-            skip_columns = ["jti"]
-        return super().obj_to_dict(
-            skip_columns=skip_columns, include_columns=include_columns
-        )
+        return self.serializer(("jti", *(skip_columns or ())), include_columns)(self)
 
     @classmethod
     def find_by_jti(cls, jti: str) -> Self:
         return cls.query.filter(cls.jti == jti).first()
 
     @classmethod
-    def delete_expired_refresh(cls):
+    def delete_expired_refresh(cls) -> int:
         filter_before = datetime.now(timezone.utc) - JWT_REFRESH_TOKEN_EXPIRES
-        for token in (
+        tokens = (
             db.session.query(cls)
             .filter(
                 cls.created_at <= filter_before,
@@ -56,17 +50,22 @@ class Token(db.Model, DbModelMixin):
                 ~cls.created_tokens.any(),
             )
             .all()
-        ):
+        )
+        for token in tokens:
             token.delete_token_familiy(commit=False)
         db.session.commit()
+        return len(tokens)
 
     @classmethod
-    def delete_expired_access(cls):
+    def delete_expired_access(cls) -> int:
         filter_before = datetime.now(timezone.utc) - JWT_ACCESS_TOKEN_EXPIRES
-        db.session.query(cls).filter(
-            cls.created_at <= filter_before, cls.type == "access"
-        ).delete()
+        count = (
+            db.session.query(cls)
+            .filter(cls.created_at <= filter_before, cls.type == "access")
+            .delete()
+        )
         db.session.commit()
+        return count
 
     # Delete oldest refresh token -> log out device
     # Used e.g. when a refresh token is used twice
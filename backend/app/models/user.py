@@ -69,20 +69,14 @@ class User(db.Model, DbModelMixin):
         include_columns: list[str] | None = None,
         include_email: bool = False,
     ) -> dict:
-        if skip_columns:
-            skip_columns = skip_columns + ["password"]
-        else:
-            skip_columns = ["password"]
+        skip = ("password",)
         if not include_email:
-            skip_columns += ["email", "email_verified"]
-
+            skip += ("email", "email_verified")
         if not current_user or not current_user.admin:
             # Filter out admin status if current user is not an admin
-            skip_columns = skip_columns + ["admin"]
+            skip += ("admin",)
 
-        return super().obj_to_dict(
-            skip_columns=skip_columns, include_columns=include_columns
-        )
+        return self.serializer(skip + tuple(skip_columns or ()), include_columns)(self)
 
     def obj_to_full_dict(self) -> dict:
         from .token import Token
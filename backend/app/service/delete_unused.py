@@ -1,13 +1,115 @@
-from app.models import Household, File
-from app import app
+import os
+import time
+from datetime import timedelta
+from sqlalchemy import exists
+from app.config import UPLOAD_FOLDER
+from app.models import Household, File, Recipe, Expense, User
+from app import app, db
 
+# uploads are written to disk before their database entry is committed
+UPLOAD_GRACE_PERIOD = timedelta(hours=1)
 
-def deleteUnusedFiles() -> int:
-    filesToDelete = [f for f in File.query.all() if f.isUnused()]
-    for f in filesToDelete:
-        f.delete()
-    app.logger.info(f"Deleted {len(filesToDelete)} unused files")
-    return len(filesToDelete)
+
+def unusedFilesQuery():
+    """
+    Filenames of all files that are not referenced by any household, recipe,
+    expense or profile picture (single anti-join query)
+    """
+    return (
+        db.session.query(File.filename)
+        .filter(
+            ~exists().where(Household.photo == File.filename),
+            ~exists().where(Recipe.photo == File.filename),
+            ~exists().where(Expense.photo == File.filename),
+            ~exists().where(User.photo == File.filename),
+        )
+        .order_by(File.filename)
+    )
+
+
+def _removeFromDisk(filename: str):
+    try:
+        os.remove(os.path.join(UPLOAD_FOLDER, filename))
+    except FileNotFoundError:
+        pass
+
+
+def deleteUnusedFiles(dry_run: bool = False, batch_size: int = 500) -> int:
+    """
+    Deletes unreferenced files from the database and disk in batches
+    Returns the number of (would be) deleted files
+    """
+    count = 0
+    last = None
+    while True:
+        query = unusedFilesQuery()
+        if last is not None:
+            query = query.filter(File.filename > last)
+        batch = [f for (f,) in query.limit(batch_size).all()]
+        if not batch:
+            break
+        count += len(batch)
+        last = batch[-1]
+        if dry_run:
+            continue
+
+        try:
+            File.query.filter(File.filename.in_(batch)).delete(
+                synchronize_session=False
+            )
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            raise e
+        for filename in batch:
+            _removeFromDisk(filename)
+
+    app.logger.info(f"{'Found' if dry_run else 'Deleted'} {count} unused files")
+    return count
+
+
+def deleteOrphanedUploads(
+    dry_run: bool = False,
+    batch_size: int = 500,
+    grace_period: timedelta = UPLOAD_GRACE_PERIOD,
+) -> int:
+    """
+    Streams UPLOAD_FOLDER and removes files that have no database entry.
+    Files modified within grace_period are kept, they may be uploads in
+    progress. Returns the number of (would be) deleted files
+    """
+    count = 0
+    cutoff = time.time() - grace_period.total_seconds()
+
+    def checkBatch(batch: list[str]) -> int:
+        known = {
+            f
+            for (f,) in db.session.query(File.filename)
+            .filter(File.filename.in_(batch))
+            .all()
+        }
+        orphans = [f for f in batch if f not in known]
+        if not dry_run:
+            for filename in orphans:
+                _removeFromDisk(filename)
+        return len(orphans)
+
+    batch = []
+    with os.scandir(UPLOAD_FOLDER) as it:
+        for entry in it:
+            if not entry.is_file() or entry.stat().st_mtime > cutoff:
+                continue
+            batch.append(entry.name)
+            if len(batch) >= batch_size:
+                count += checkBatch(batch)
+                batch = []
+    if batch:
+        count += checkBatch(batch)
+
+    app.logger.info(
+        f"{'Found' if dry_run else 'Deleted'} {count} files without database entry"
+    )
+    return count
 
 
 def deleteEmptyHouseholds() -> int:
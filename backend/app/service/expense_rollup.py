@@ -0,0 +1,111 @@
+from collections import defaultdict
+from sqlalchemy import delete, insert
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import selectinload
+from app.models import Expense, ExpenseRollup, Household
+from app import db
+
+
+def expenseShares(expense: Expense) -> dict[int | None, float]:
+    """
+    Maps user ids to their share of the expense, None to the full amount
+    """
+    amount = expense.amount or 0
+    res = {None: amount}
+    factor_sum = sum(e.factor or 0 for e in expense.paid_for)
+    if factor_sum:
+        for paid_for in expense.paid_for:
+            res[paid_for.user_id] = (
+                res.get(paid_for.user_id, 0)
+                + (paid_for.factor or 0) / factor_sum * amount
+            )
+    return res
+
+
+def _insert(table):
+    if db.session.get_bind().dialect.name == "postgresql":
+        return postgresql.insert(table)
+    return sqlite.insert(table)
+
+
+def applyExpenseToRollup(expense: Expense, sign: int = 1):
+    """
+    Adds (sign=1) or removes (sign=-1) an expense from the daily rollup.
+    The amounts are added in the database with one upsert, so concurrent
+    changes of the same day are not lost. Changes are only executed in the
+    session transaction, the caller commits them together with the expense
+    """
+    if expense.exclude_from_statistics or not expense.date:
+        return
+    day = expense.date.date()
+    category_id = expense.category.id if expense.category else None
+
+    statement = _insert(ExpenseRollup).values(
+        [
+            {
+                "household_id": expense.household_id,
+                "user_id": user_id,
+                "day": day,
+                "category_id": category_id,
+                "amount": sign * amount,
+            }
+            for user_id, amount in expenseShares(expense).items()
+        ]
+    )
+    db.session.execute(
+        statement.on_conflict_do_update(
+            index_elements=ExpenseRollup.ROLLUP_KEY,
+            set_={
+                "amount": ExpenseRollup.amount + statement.excluded.amount,
+                "updated_at": statement.excluded.updated_at,
+            },
+        )
+    )
+    db.session.execute(
+        delete(ExpenseRollup).where(
+            ExpenseRollup.household_id == expense.household_id,
+            ExpenseRollup.day == day,
+            db.func.abs(ExpenseRollup.amount) <= 1e-9,
+        ),
+        execution_options={"synchronize_session": False},
+    )
+
+
+def rebuildExpenseRollup(household_id: int):
+    """
+    Recomputes the rollup of a household from scratch
+    """
+    sums = defaultdict(float)
+    for expense in (
+        Expense.query.filter(
+            Expense.household_id == household_id,
+            Expense.exclude_from_statistics == False,
+        )
+        .options(selectinload(Expense.paid_for))
+        .yield_per(500)
+    ):
+        for user_id, amount in expenseShares(expense).items():
+            sums[(user_id, expense.date.date(), expense.category_id)] += amount
+
+    try:
+        ExpenseRollup.query.filter(ExpenseRollup.household_id == household_id).delete()
+        if sums:
+            db.session.execute(
+                insert(ExpenseRollup),
+                [
+                    {
+                        "household_id": household_id,
+                        "user_id": user_id,
+                        "day": day,
+                        "category_id": category_id,
+                        "amount": amount,
+                    }
+                    for (user_id, day, category_id), amount in sums.items()
+                ],
+            )
+        # the rollup is derived data, no change to sync
+        Household.bump_version(household_id, changes=[])
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        raise e
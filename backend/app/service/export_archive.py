@@ -0,0 +1,244 @@
+import os
+import tarfile
+import tempfile
+import time
+import uuid
+import zipfile
+from datetime import datetime, timezone
+from typing import IO, Iterable, Iterator
+from app import app
+from app.config import (
+    EXPORT_FOLDER,
+    EXPORT_ARCHIVE_RETENTION,
+    EXPORT_ARCHIVE_TIMEOUT,
+    UPLOAD_FOLDER,
+)
+from app.errors import NotFoundRequest
+from app.models import Household
+
+ARCHIVE_MIMETYPES = {"zip": "application/zip", "tar": "application/x-tar"}
+CHUNK_SIZE = 64 * 1024
+# ndjson bigger than this is spooled to disk to compute the tar member size
+TAR_SPOOL_SIZE = 4 * 1024 * 1024
+
+
+class _BufferWriter:
+    """
+    Unseekable file object that collects the written bytes until drained
+    """
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+class _ZipArchive:
+    def __init__(self, fileobj: IO[bytes]):
+        self.zip = zipfile.ZipFile(fileobj, "w", zipfile.ZIP_DEFLATED)
+
+    def add(
+        self, name: str, chunks: Iterable[bytes], compress: bool = True
+    ) -> Iterator[None]:
+        info = zipfile.ZipInfo(name, time.localtime()[:6])
+        info.compress_type = zipfile.ZIP_DEFLATED if compress else zipfile.ZIP_STORED
+        with self.zip.open(info, "w", force_zip64=True) as f:
+            for chunk in chunks:
+                f.write(chunk)
+                yield
+
+    def close(self):
+        self.zip.close()
+
+
+class _TarArchive:
+    """
+    Minimal streaming tar writer, member data is written chunk by chunk
+    """
+
+    def __init__(self, fileobj: IO[bytes]):
+        self.fileobj = fileobj
+        self.offset = 0
+
+    def add(
+        self, name: str, chunks: Iterable[bytes], compress: bool = True
+    ) -> Iterator[None]:
+        # the header needs the size, so generated content is spooled first
+        with tempfile.SpooledTemporaryFile(TAR_SPOOL_SIZE) as spool:
+            for chunk in chunks:
+                spool.write(chunk)
+                yield
+            info = tarfile.TarInfo(name)
+            info.size = spool.tell()
+            info.mtime = int(time.time())
+            info.mode = 0o644
+            self._write(info.tobuf(tarfile.PAX_FORMAT, "utf-8", "surrogateescape"))
+            spool.seek(0)
+            for chunk in _readChunks(spool):
+                self._write(chunk)
+                yield
+            self._write(b"\0" * (-info.size % tarfile.BLOCKSIZE))
+
+    def close(self):
+        self._write(b"\0" * (2 * tarfile.BLOCKSIZE))
+        self._write(b"\0" * (-self.offset % tarfile.RECORDSIZE))
+
+    def _write(self, data: bytes):
+        self.fileobj.write(data)
+        self.offset += len(data)
+
+
+def _readChunks(f: IO[bytes]) -> Iterator[bytes]:
+    while chunk := f.read(CHUNK_SIZE):
+        yield chunk
+
+
+def _ndjson(records: Iterable[dict], files: set[str]) -> Iterator[bytes]:
+    buffer, size = [], 0
+    for record in records:
+        if record.get("photo"):
+            files.add(record["photo"])
+        line = app.json.dumps(record, separators=(",", ":")) + "\n"
+        buffer.append(line)
+        size += len(line)
+        if size >= CHUNK_SIZE:
+            yield "".join(buffer).encode()
+            buffer, size = [], 0
+    yield "".join(buffer).encode()
+
+
+def _writeArchive(household_id: int, fileobj: IO[bytes], format: str) -> Iterator[None]:
+    """
+    Writes the archive into fileobj. Yields whenever a chunk was written, so
+    streamed responses can pass on the data before the next one is produced
+    """
+    household = Household.find_by_id(household_id)
+    if not household:
+        raise NotFoundRequest()
+    export = household.obj_to_export_stream_dict()
+    settings = household.obj_to_export_settings_dict()
+    settings["photo"] = household.photo
+    files = {household.photo} if household.photo else set()
+
+    archive = _ZipArchive(fileobj) if format == "zip" else _TarArchive(fileobj)
+    yield from archive.add(
+        "household.json", [app.json.dumps(settings, separators=(",", ":")).encode()]
+    )
+    for key in ["recipes", "items", "expenses"]:
+        yield from archive.add(f"{key}.ndjson", _ndjson(export[key], files))
+    for filename in sorted(files):
+        filename = os.path.basename(filename)
+        path = os.path.join(UPLOAD_FOLDER, filename)
+        if not os.path.isfile(path):
+            continue
+        with open(path, "rb") as f:
+            # uploads are already compressed images
+            yield from archive.add(f"files/{filename}", _readChunks(f), compress=False)
+    archive.close()
+    yield
+
+
+def streamExportArchive(household_id: int, format: str = "zip") -> Iterator[bytes]:
+    """
+    Streams the household export archive: household.json, one ndjson file
+    per recipes, items and expenses and the referenced uploads in files/
+    """
+    writer = _BufferWriter()
+    for _ in _writeArchive(household_id, writer, format):
+        data = writer.drain()
+        if data:
+            yield data
+
+
+def _archivePath(household_id: int, name: str) -> str:
+    return os.path.join(EXPORT_FOLDER, str(household_id), os.path.basename(name))
+
+
+def createExportArchive(household_id: int, format: str = "zip") -> str:
+    """
+    Reserves the name of a background export archive, it is pending until
+    written by writeExportArchive
+    """
+    name = f"{uuid.uuid4().hex}.{format}"
+    path = _archivePath(household_id, name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    open(path + ".part", "wb").close()
+    return name
+
+
+def writeExportArchive(household_id: int, name: str):
+    """
+    Writes the export archive to EXPORT_FOLDER, the file is only visible
+    under its name once complete
+    """
+    path = _archivePath(household_id, name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    try:
+        with open(path + ".part", "wb") as f:
+            for _ in _writeArchive(household_id, f, name.rsplit(".", 1)[-1]):
+                pass
+        os.replace(path + ".part", path)
+    except Exception:
+        open(path + ".failed", "w").close()
+        if os.path.exists(path + ".part"):
+            os.remove(path + ".part")
+        raise
+
+
+def getExportArchiveStatus(household_id: int, name: str) -> tuple[str, str | None]:
+    """
+    Returns the status (pending, failed, done) and the path once done.
+    Archives that were not written to for EXPORT_ARCHIVE_TIMEOUT have
+    failed, e.g. because the process writing them was stopped
+    """
+    path = _archivePath(household_id, name)
+    # the part file is only removed once the archive or the marker exists
+    try:
+        modified = os.path.getmtime(path + ".part")
+        expires = (datetime.now(timezone.utc) - EXPORT_ARCHIVE_TIMEOUT).timestamp()
+        return ("failed" if modified < expires else "pending"), None
+    except FileNotFoundError:
+        pass
+    if os.path.exists(path):
+        return "done", path
+    if os.path.exists(path + ".failed"):
+        return "failed", None
+    raise NotFoundRequest()
+
+
+def removeExportArchive(household_id: int, name: str):
+    """
+    Removes a background export archive in any state
+    """
+    path = _archivePath(household_id, name)
+    for filename in [path, path + ".part", path + ".failed"]:
+        if os.path.exists(filename):
+            os.remove(filename)
+
+
+def deleteExpiredExportArchives() -> int:
+    """
+    Removes background export archives older than EXPORT_ARCHIVE_RETENTION
+    """
+    if not os.path.isdir(EXPORT_FOLDER):
+        return 0
+    expires = (datetime.now(timezone.utc) - EXPORT_ARCHIVE_RETENTION).timestamp()
+    count = 0
+    for household in os.scandir(EXPORT_FOLDER):
+        if not household.is_dir():
+            continue
+        for entry in os.scandir(household.path):
+            if entry.is_file() and entry.stat().st_mtime < expires:
+                os.remove(entry.path)
+                count += 1
+    return count
@@ -6,16 +6,20 @@ import blurhash
 from PIL import Image
 from app.util.filename_validator import allowed_file
 from app.config import UPLOAD_FOLDER
-from app.models import File
+from app.models import File, User
 from flask_jwt_extended import current_user
 from werkzeug.utils import secure_filename
 
 
-def file_has_access_or_download(newPhoto: str, oldPhoto: str | None = None) -> str | None:
+def file_has_access_or_download(
+    newPhoto: str, oldPhoto: str | None = None, user: User | None = None
+) -> str | None:
     """
     Downloads the file if the url is an external URL or checks if the user has access to the file on this server
     If the user has no access oldPhoto is returned
+    user defaults to the current user, pass it outside of requests (e.g. in background jobs)
     """
+    user = user or current_user
     if newPhoto is not None and "/" in newPhoto:
         from mimetypes import guess_extension
 
@@ -34,19 +38,19 @@ def file_has_access_or_download(newPhoto: str, oldPhoto: str | None = None) -> s
                 return None
             except Exception:
                 pass
-            File(filename=filename, blur_hash=blur, created_by=current_user.id).save()
+            File(filename=filename, blur_hash=blur, created_by=user.id).save()
             return filename
     elif newPhoto is not None:
         if not newPhoto:
             return None
         f = File.find(newPhoto)
-        if f and f.isUnused() and (f.created_by == current_user.id or current_user.admin):
+        if f and f.isUnused() and (f.created_by == user.id or user.admin):
             return f.filename
         elif f:
-            f.checkAuthorized()
+            f.checkAuthorized(user=user)
             filename = secure_filename(str(uuid.uuid4()) + "." + f.filename.split(".")[-1])
             shutil.copyfile(os.path.join(UPLOAD_FOLDER, f.filename), os.path.join(UPLOAD_FOLDER, filename))
-            File(filename=filename, blur_hash=f.blur_hash, created_by=current_user.id).save()
+            File(filename=filename, blur_hash=f.blur_hash, created_by=user.id).save()
             return filename
 
     return oldPhoto
@@ -0,0 +1,100 @@
+from app.models import Household, HouseholdChange
+from app.util.cursor import encode_cursor, decode_cursor
+from app import db
+
+
+def _modelsByTable() -> dict:
+    return {m.local_table.name: m for m in db.Model.registry.mappers}
+
+
+def _loadEntities(entity: str, entity_ids: list[str]) -> dict[str, dict]:
+    mapper = _modelsByTable().get(entity)
+    if not mapper:
+        return {}
+    types = [c.type.python_type for c in mapper.primary_key]
+    keys = {
+        entity_id: tuple(t(v) for t, v in zip(types, entity_id.split(":")))
+        for entity_id in entity_ids
+    }
+    if len(types) == 1:
+        column = mapper.primary_key[0]
+        objs = mapper.class_.query.filter(
+            column.in_([k[0] for k in keys.values()])
+        ).all()
+        found = {str(getattr(o, column.key)): o for o in objs}
+    else:
+        found = {
+            entity_id: db.session.get(mapper.class_, key)
+            for entity_id, key in keys.items()
+        }
+    return {entity_id: obj.obj_to_dict() for entity_id, obj in found.items() if obj}
+
+
+def getChangesSince(household_id: int, since: str | None, limit: int) -> dict:
+    """
+    Compacted changes of a household after the cursor since. Every entity
+    appears at most once, either as upsert (with its current data) or delete.
+    If the cursor is missing, invalid or older than the retained changes the
+    client has to do a full resync and continue with the returned cursor
+    """
+    version = Household.find_version(household_id)
+    resync = {
+        "cursor": encode_cursor(version),
+        "resync": True,
+        "more": False,
+        "changes": [],
+    }
+    if since is None:
+        return resync
+    since = decode_cursor(since, 1)[0]
+    if not isinstance(since, int) or since > version:
+        return resync
+    if since == version:
+        return resync | {"resync": False}
+    floor = HouseholdChange.find_min_version(household_id)
+    if floor is None or floor > since + 1:
+        return resync
+    if HouseholdChange.has_reset_since(household_id, since):
+        return resync
+
+    changes, more = HouseholdChange.find_since(household_id, since, limit)
+    compacted: dict[tuple[str, str], dict] = {}
+    for change in changes:
+        if change.op == HouseholdChange.TOUCH:
+            continue
+        key = (change.entity, change.entity_id)
+        if key not in compacted:
+            compacted[key] = {
+                "entity": change.entity,
+                "id": change.entity_id,
+                "created": change.op == "insert",
+            }
+        compacted[key]["op"] = change.op
+        compacted[key]["version"] = change.version
+
+    res = []
+    upserts: dict[str, list[str]] = {}
+    for (entity, entity_id), change in compacted.items():
+        created = change.pop("created")
+        if change["op"] == "delete":
+            if created:
+                continue  # created and deleted in between
+        else:
+            change["op"] = "upsert"
+            upserts.setdefault(entity, []).append(entity_id)
+        res.append(change)
+
+    data = {
+        entity: _loadEntities(entity, entity_ids)
+        for entity, entity_ids in upserts.items()
+    }
+    for change in res:
+        if change["op"] == "upsert":
+            change["data"] = data[change["entity"]].get(change["id"])
+
+    return {
+        "cursor": encode_cursor(changes[-1].version if more else version),
+        "resync": False,
+        "more": more,
+        "changes": res,
+    }
@@ -1,4 +1,2 @@
-from .import_recipe import importRecipe
-from .import_expense import importExpense
+from .bulk_import import BulkImport, importBulk
 from .import_shoppinglist import importShoppinglist
-from .import_item import importItem
@@ -0,0 +1,310 @@
+from datetime import datetime, timezone
+from typing import Callable, Self
+from sqlalchemy.orm import joinedload
+from app import db
+from app.jobs.instrumentation import job_stage
+from app.models import (
+    Category,
+    Expense,
+    ExpenseCategory,
+    ExpensePaidFor,
+    Household,
+    HouseholdMember,
+    Item,
+    Recipe,
+    RecipeItems,
+    RecipeTags,
+    Tag,
+    User,
+)
+from app.service.file_has_access_or_download import file_has_access_or_download
+
+
+def _suffixBases(name: str) -> list[str]:
+    """
+    Lowercase names X for which name matches "X (_%)", i.e. it is a
+    numbered copy of a recipe called X
+    """
+    if not name.endswith(")"):
+        return []
+    res = []
+    i = name.find(" (")
+    while i != -1:
+        if len(name) - i > 3:
+            res.append(name[:i].lower())
+        i = name.find(" (", i + 1)
+    return res
+
+
+class BulkImport:
+    """
+    Imports items, recipes and expenses into a household. The household's
+    items, categories, tags, recipes and members are loaded once into name
+    maps. Each call adds all new rows to the session and commits once, so
+    they are written with batched INSERTs in one transaction per call.
+    Use as context manager, the loaded rows are then kept valid across the
+    commits so records can be fed in chunks. Photos are checked and stored
+    for user, by default the current user
+    """
+
+    def __init__(
+        self,
+        household: Household,
+        recipe_overwrite: bool = False,
+        user: User | None = None,
+    ):
+        self.household = household
+        self.recipe_overwrite = recipe_overwrite
+        self.user = user
+        # seconds spent per phase, see timed
+        self.phases: dict[str, float] = {}
+        self.items: dict[str, Item] = {}
+        self.categories: dict[str, Category] = {}
+        self.tags: dict[str, Tag] = {}
+        self.expense_categories: dict[str, ExpenseCategory] = {}
+        # recipes are only loaded to be overwritten, names map to their ids.
+        # New recipes are kept until their ids are known after the commit
+        self.recipes: dict[str, int] = {}
+        self.new_recipes: dict[str, Recipe] = {}
+        self.recipe_suffixes: dict[str, int] = {}
+        self.members: dict[str, int] = {}
+
+    def __enter__(self) -> Self:
+        session = db.session()
+        self._expire_on_commit = session.expire_on_commit
+        session.expire_on_commit = False
+        return self
+
+    def __exit__(self, *exc):
+        session = db.session()
+        session.expire_on_commit = self._expire_on_commit
+        session.expire_all()
+
+    def timed(self, phase: str, func: Callable[..., int | None], *args):
+        """
+        Runs func as (part of) phase, its duration is added to phases
+        """
+        with job_stage("import", phase, self.household.id) as stage:
+            stage.rows = func(*args)
+        self.phases[phase] = round(self.phases.get(phase, 0) + stage.duration, 3)
+
+    def finish(self):
+        """
+        Updates the balances and statistics if expenses were imported. Clients
+        of the change feed resync instead of fetching every imported row
+        """
+        from app.service.expense_rollup import rebuildExpenseRollup
+        from app.service.recalculate_balances import recalculateBalances
+
+        if "expenses" in self.phases:
+            self.timed("balances", recalculateBalances, self.household.id)
+            self.timed("rollup", rebuildExpenseRollup, self.household.id)
+        Household.bump_version(self.household.id)
+        self._commit()
+
+    def preload(self) -> int:
+        household_id = self.household.id
+        for item in Item.query.filter(Item.household_id == household_id).order_by(
+            Item.id
+        ):
+            self.items.setdefault(item.name.lower(), item)
+        for category in Category.query.filter(
+            Category.household_id == household_id
+        ).order_by(Category.id):
+            self.categories.setdefault(category.name, category)
+        for tag in Tag.query.filter(Tag.household_id == household_id).order_by(Tag.id):
+            self.tags.setdefault(tag.name, tag)
+        for category in ExpenseCategory.query.filter(
+            ExpenseCategory.household_id == household_id
+        ).order_by(ExpenseCategory.id):
+            self.expense_categories.setdefault(category.name, category)
+        for id, name in (
+            Recipe.query.filter(Recipe.household_id == household_id)
+            .with_entities(Recipe.id, Recipe.name)
+            .order_by(Recipe.id)
+        ):
+            self._addRecipeName(name, id)
+        for member in HouseholdMember.query.filter(
+            HouseholdMember.household_id == household_id
+        ).options(joinedload(HouseholdMember.user)):
+            self.members[member.user.username] = member.user_id
+        return (
+            len(self.items)
+            + len(self.categories)
+            + len(self.tags)
+            + len(self.expense_categories)
+            + len(self.recipes)
+        )
+
+    def importItems(self, items: list[dict]) -> int:
+        for args in items:
+            item = self._item(args["name"], strip=False)
+            # like Item.save, imported items are no longer default items
+            item.default = False
+            if "icon" in args:
+                item.icon = args["icon"]
+            if "category" in args and not item.category_id and not item.category:
+                item.category = self._category(args["category"])
+            db.session.add(item)
+        self._commit()
+        return len(items)
+
+    def importRecipes(self, recipes: list[dict]) -> int:
+        for args in recipes:
+            name = args["name"]
+            exists = name in self.recipes or name in self.new_recipes
+            if exists and not self.recipe_overwrite:
+                # numbered copy, e.g. "Soup (2)"
+                name = f"{name} ({self.recipe_suffixes.get(name.lower(), 0) + 2})"
+                exists = False
+            if not exists:
+                recipe = Recipe(household_id=self.household.id)
+                self.new_recipes.setdefault(name, recipe)
+                self._addRecipeName(name)
+            else:
+                recipe = self.new_recipes.get(name) or db.session.get(
+                    Recipe, self.recipes[name]
+                )
+                recipe.items = []
+                recipe.tags = []
+            recipe.name = name
+            recipe.description = args["description"]
+            for key in ["time", "cook_time", "prep_time", "yields", "source"]:
+                if key in args:
+                    setattr(recipe, key, args[key])
+            if "photo" in args:
+                recipe.photo = file_has_access_or_download(
+                    args["photo"], user=self.user
+                )
+            db.session.add(recipe)
+
+            seen = set()
+            for recipeItem in args.get("items", []):
+                item = self._item(recipeItem["name"])
+                if id(item) in seen:
+                    continue
+                seen.add(id(item))
+                db.session.add(
+                    RecipeItems(
+                        recipe=recipe,
+                        item=item,
+                        description=recipeItem["description"],
+                        optional=recipeItem["optional"],
+                    )
+                )
+            for tagName in dict.fromkeys(args.get("tags", [])):
+                db.session.add(RecipeTags(recipe=recipe, tag=self._tag(tagName)))
+        self._commit()
+        return len(recipes)
+
+    def importExpenses(self, expenses: list[dict]) -> int:
+        for args in expenses:
+            expense = Expense(
+                household_id=self.household.id,
+                name=args["name"],
+                amount=args["amount"],
+            )
+            if "date" in args:
+                expense.date = datetime.fromtimestamp(args["date"] / 1000, timezone.utc)
+            if "photo" in args:
+                expense.photo = file_has_access_or_download(
+                    args["photo"], user=self.user
+                )
+            if "category" in args:
+                expense.category = self._expenseCategory(args["category"])
+            expense.paid_by_id = self.members.get(args["paid_by"])
+            db.session.add(expense)
+
+            seen = set()
+            for paid_for in args.get("paid_for", []):
+                user_id = self.members.get(paid_for["username"])
+                if not user_id or user_id in seen:
+                    continue
+                seen.add(user_id)
+                db.session.add(
+                    ExpensePaidFor(
+                        expense=expense, user_id=user_id, factor=paid_for["factor"]
+                    )
+                )
+        self._commit()
+        return len(expenses)
+
+    def _item(self, name: str, strip: bool = True) -> Item:
+        key = name.strip().lower()
+        item = self.items.get(key)
+        if not item:
+            item = Item(
+                name=name.strip() if strip else name,
+                default=False,
+                household_id=self.household.id,
+            )
+            self.items[key] = item
+        return item
+
+    def _category(self, name: str) -> Category:
+        category = self.categories.get(name)
+        if not category:
+            category = self.categories[name] = Category(
+                name=name, default=False, household_id=self.household.id
+            )
+        return category
+
+    def _tag(self, name: str) -> Tag:
+        tag = self.tags.get(name)
+        if not tag:
+            tag = self.tags[name] = Tag(name=name, household_id=self.household.id)
+        return tag
+
+    def _expenseCategory(self, args: dict) -> ExpenseCategory:
+        category = self.expense_categories.get(args["name"])
+        if not category:
+            category = self.expense_categories[args["name"]] = ExpenseCategory(
+                name=args["name"],
+                color=args.get("color"),
+                household_id=self.household.id,
+            )
+        return category
+
+    def _addRecipeName(self, name: str, id: int | None = None):
+        if id is not None:
+            self.recipes.setdefault(name, id)
+        for base in _suffixBases(name):
+            self.recipe_suffixes[base] = self.recipe_suffixes.get(base, 0) + 1
+
+    def _commit(self):
+        try:
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            raise e
+        for name, recipe in self.new_recipes.items():
+            self.recipes.setdefault(name, recipe.id)
+        self.new_recipes.clear()
+
+
+def importBulk(
+    household: Household,
+    args: dict,
+    progress: Callable[[float], None] | None = None,
+    user: User | None = None,
+) -> dict[str, float]:
+    """
+    Imports the items, recipes and expenses of an export (see ImportSchema).
+    Returns the duration in seconds of each phase, progress is called with
+    the finished share after every phase
+    """
+    with BulkImport(household, args.get("recipe_overwrite", False), user) as importer:
+        planned = [("preload", importer.preload)]
+        if "items" in args:
+            planned.append(("items", importer.importItems, args["items"]))
+        if "recipes" in args:
+            planned.append(("recipes", importer.importRecipes, args["recipes"]))
+        if "expenses" in args:
+            planned.append(("expenses", importer.importExpenses, args["expenses"]))
+
+        for i, (phase, func, *func_args) in enumerate(planned):
+            importer.timed(phase, func, *func_args)
+            if progress:
+                progress((i + 1) / (len(planned) + 1))
+        importer.finish()
+        return importer.phases
@@ -1,81 +1,198 @@
+import hashlib
 import time
-from app.config import app, APP_DIR, SUPPORTED_LANGUAGES, db
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Callable
+from sqlalchemy import update
+from app.config import app, APP_DIR, DB_URL, SUPPORTED_LANGUAGES, db
 from os.path import exists
 import json
 
 from app.errors import NotFoundRequest
-from app.models import Item, Category
+from app.models import Item, Category, Household
 
+# bump if the upgrade changes, so every household is upgraded again
+UPGRADE_VERSION = "1"
 
-def importLanguage(household_id, lang, bulkSave=False):
+
+@lru_cache(maxsize=None)
+def _loadAttributes() -> dict:
+    with open(f"{APP_DIR}/../templates/attributes.json", "r") as f:
+        return json.load(f)
+
+
+def _languagePath(lang: str) -> str:
+    file_path = f"{APP_DIR}/../templates/l10n/{lang}.json"
+    if lang not in SUPPORTED_LANGUAGES or not exists(file_path):
+        raise NotFoundRequest("Language code not supported")
+    return file_path
+
+
+@lru_cache(maxsize=None)
+def _loadLanguage(lang: str) -> dict:
+    with open(_languagePath(lang), "r") as f:
+        return json.load(f)
+
+
+@lru_cache(maxsize=None)
+def templateHash(lang: str) -> str:
+    """
+    Hash of everything importLanguage applies for the language
+    """
+    res = hashlib.sha256(UPGRADE_VERSION.encode())
+    for path in [_languagePath(lang), f"{APP_DIR}/../templates/attributes.json"]:
+        with open(path, "rb") as f:
+            res.update(f.read())
+    return res.hexdigest()
+
+
+def importLanguage(household_id, lang) -> int:
+    """
+    Adds the default items of the language template to the household and
+    updates the ones the household did not change. All changes are written
+    in one transaction, returns the number of new or updated items
+    """
     with app.app_context():
-        file_path = f"{APP_DIR}/../templates/l10n/{lang}.json"
-        if lang not in SUPPORTED_LANGUAGES or not exists(file_path):
-            raise NotFoundRequest("Language code not supported")
-        with open(file_path, "r") as f:
-            data = json.load(f)
-        with open(f"{APP_DIR}/../templates/attributes.json", "r") as f:
-            attributes = json.load(f)
+        data = _loadLanguage(lang)
+        attributes = _loadAttributes()["items"]
 
         t0 = time.time()
-        models: list[Item] = []
+        items_by_key: dict[str, Item] = {}
+        items_by_name: dict[str, Item] = {}
+        for item in Item.query.filter(Item.household_id == household_id).order_by(
+            Item.id
+        ):
+            if item.default_key:
+                items_by_key.setdefault(item.default_key, item)
+            items_by_name.setdefault(item.name.strip().lower(), item)
+        categories_by_key: dict[str, Category] = {}
+        categories_by_name: dict[str, Category] = {}
+        for category in Category.query.filter(
+            Category.household_id == household_id
+        ).order_by(Category.id):
+            if category.default_key:
+                categories_by_key.setdefault(category.default_key, category)
+            categories_by_name.setdefault(category.name, category)
+
+        # lowercase names of the items added by this import
+        created: set[str] = set()
         for key, name in data["items"].items():
-            item = Item.find_by_default_key(household_id, key) or Item.find_by_name(
-                household_id, name
-            )
+            name = name.strip()
+            item = items_by_key.get(key)
+            if not item and name.lower() in created:
+                # duplicate name in the template
+                continue
+            item = item or items_by_name.get(name.lower())
             if not item:
-                # needed to filter out duplicate names
-                if bulkSave and any(i.name == name for i in models):
-                    continue
+                created.add(name.lower())
                 item = Item()
-                item.name = name.strip()
+                item.name = name
                 item.household_id = household_id
                 item.default = True
                 item.default_key = key
+                items_by_key[key] = item
+                items_by_name[name.lower()] = item
 
             if not item.default_key:  # migrate to new system
                 item.default_key = key
 
             if item.default:
-                if (
-                    item.name != name.strip()
-                    and not Item.find_by_name(household_id, name)
-                    and not any(i.name == name for i in models)
-                ):
-                    item.name = name.strip()
+                if item.name != name and name.lower() not in items_by_name:
+                    if items_by_name.get(item.name.strip().lower()) is item:
+                        del items_by_name[item.name.strip().lower()]
+                    items_by_name[name.lower()] = item
+                    item.name = name
 
-                if key in attributes["items"] and "icon" in attributes["items"][key]:
-                    item.icon = attributes["items"][key]["icon"]
+                if key in attributes and "icon" in attributes[key]:
+                    item.icon = attributes[key]["icon"]
 
                 # Category not already set for existing item and category set for template and category translation exist for language
                 if (
-                    key in attributes["items"]
-                    and "category" in attributes["items"][key]
-                    and attributes["items"][key]["category"] in data["categories"]
+                    key in attributes
+                    and "category" in attributes[key]
+                    and attributes[key]["category"] in data["categories"]
                 ):
-                    category_key = attributes["items"][key]["category"]
+                    category_key = attributes[key]["category"]
                     category_name = data["categories"][category_key]
-                    category = Category.find_by_default_key(
-                        household_id, category_key
-                    ) or Category.find_by_name(household_id, category_name)
+                    category = categories_by_key.get(
+                        category_key
+                    ) or categories_by_name.get(category_name)
                     if not category:
-                        category = Category.create_by_name(
-                            household_id, category_name, True, category_key
+                        category = Category(
+                            name=category_name,
+                            default=True,
+                            default_key=category_key,
+                            household_id=household_id,
                         )
+                        categories_by_name[category_name] = category
                     if not category.default_key:  # migrate to new system
                         category.default_key = category_key
-                        category.save()
+                    categories_by_key[category_key] = category
                     item.category = category
-                if not bulkSave:
-                    item.save(keepDefault=True)
-                else:
-                    models.append(item)
-
-        if bulkSave:
-            try:
-                db.session.add_all(models)
-                db.session.commit()
-            except Exception as e:
-                db.session.rollback()
-                raise e
+            db.session.add(item)
+
+        count = len(
+            [
+                o
+                for o in db.session.new | db.session.dirty
+                if isinstance(o, Item) and db.session.is_modified(o)
+            ]
+        )
+        try:
+            # not household data, so no version bump or change feed entry
+            db.session.execute(
+                update(Household)
+                .where(Household.id == household_id)
+                .values(default_items_hash=templateHash(lang)),
+                execution_options={"synchronize_session": False},
+            )
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            raise e
         app.logger.info(f"Import took: {(time.time() - t0):.3f}s")
+        return count
+
+
+def findOutdatedHouseholds() -> list[tuple[int, str]]:
+    """
+    (id, language) of the households whose language template changed since
+    their default items were last upgraded
+    """
+    hashes = {}
+    for lang in SUPPORTED_LANGUAGES:
+        try:
+            hashes[lang] = templateHash(lang)
+        except NotFoundRequest:
+            pass
+    with app.app_context():
+        return Household.find_needing_default_items_upgrade(hashes)
+
+
+def upgradeDefaultItems(
+    households: list[tuple[int, str]],
+    workers: int = 4,
+    progress: Callable[[], None] | None = None,
+) -> int:
+    """
+    Runs importLanguage for the (id, language) households, workers at a
+    time. progress is called after each household. Returns the number of
+    failed households
+    """
+    if DB_URL.drivername == "sqlite":
+        # sqlite has a single writer
+        workers = 1
+
+    def upgrade(household: tuple[int, str]) -> bool:
+        try:
+            importLanguage(*household)
+            return True
+        except Exception as e:
+            app.logger.error(f"Upgrading household {household[0]} failed: {e}")
+            return False
+        finally:
+            if progress:
+                progress()
+
+    with ThreadPoolExecutor(max(workers, 1)) as executor:
+        return len(households) - sum(executor.map(upgrade, households))
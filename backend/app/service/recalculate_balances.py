@@ -1,38 +1,106 @@
-from sqlalchemy import func
-from app.models import Expense, ExpensePaidFor, HouseholdMember
+from sqlalchemy import func, select, union_all, update
+from app.models import Expense, ExpensePaidFor, Household, HouseholdMember
 from app import db
 
 
 def recalculateBalances(household_id):
-    for member in HouseholdMember.find_by_household(household_id):
-        member.expense_balance = float(
-            Expense.query.with_entities(func.sum(Expense.amount).label("balance"))
-            .filter(
-                Expense.paid_by_id == member.user_id,
-                Expense.household_id == household_id,
-            )
-            .first()
-            .balance
-            or 0
+    """
+    Recomputes all member balances of a household from scratch with a single
+    grouped query. Only needed for repairs, writes apply deltas instead
+    """
+    factor_sums = (
+        select(
+            ExpensePaidFor.expense_id,
+            func.sum(ExpensePaidFor.factor).label("factor_sum"),
+        )
+        .join(Expense, Expense.id == ExpensePaidFor.expense_id)
+        .filter(Expense.household_id == household_id)
+        .group_by(ExpensePaidFor.expense_id)
+        .subquery()
+    )
+    paid = select(
+        Expense.paid_by_id.label("user_id"), Expense.amount.label("amount")
+    ).filter(Expense.household_id == household_id)
+    owed = (
+        select(
+            ExpensePaidFor.user_id.label("user_id"),
+            (
+                -Expense.amount
+                * ExpensePaidFor.factor.cast(db.Float)
+                / factor_sums.c.factor_sum
+            ).label("amount"),
         )
-        for paid_for in ExpensePaidFor.query.filter(
-            ExpensePaidFor.user_id == member.user_id,
-            ExpensePaidFor.expense_id.in_(
-                db.session.query(Expense.id)
-                .filter(Expense.household_id == household_id)
-                .scalar_subquery()
-            ),
-        ).all():
-            factor_sum = (
-                Expense.query.with_entities(
-                    func.sum(ExpensePaidFor.factor).label("factor_sum")
-                )
-                .filter(ExpensePaidFor.expense_id == paid_for.expense_id)
-                .first()
-                .factor_sum
+        .join(Expense, Expense.id == ExpensePaidFor.expense_id)
+        .join(factor_sums, factor_sums.c.expense_id == ExpensePaidFor.expense_id)
+        .filter(Expense.household_id == household_id)
+    )
+    entries = union_all(paid, owed).subquery()
+    balances = {
+        user_id: balance
+        for user_id, balance in db.session.execute(
+            select(entries.c.user_id, func.sum(entries.c.amount)).group_by(
+                entries.c.user_id
+            )
+        ).all()
+    }
+
+    try:
+        for member in HouseholdMember.find_by_household(household_id):
+            member.expense_balance = float(balances.get(member.user_id) or 0)
+            db.session.add(member)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        raise e
+
+
+def expenseBalanceDeltas(expense: Expense, sign: int = 1) -> dict[int, float]:
+    """
+    Maps user ids to the change of their balance by the expense, sign=-1
+    for removing it
+    """
+    amount = expense.amount or 0
+    res = {}
+    if expense.paid_by_id is not None:
+        res[expense.paid_by_id] = sign * amount
+
+    factor_sum = sum(e.factor or 0 for e in expense.paid_for)
+    if factor_sum:
+        for paid_for in expense.paid_for:
+            res[paid_for.user_id] = (
+                res.get(paid_for.user_id, 0)
+                - sign * ((paid_for.factor or 0) / factor_sum) * amount
             )
-            member.expense_balance = (
-                member.expense_balance
-                - (paid_for.factor / factor_sum) * paid_for.expense.amount
+    return res
+
+
+def applyBalanceDeltas(household_id: int, deltas: dict[int, float]):
+    """
+    Adds the deltas to the member balances with one atomic UPDATE per member,
+    so concurrent changes are not lost. Statements are only executed in the
+    session, the caller commits them together with the expense
+    """
+    changed = []
+    for user_id, delta in deltas.items():
+        if not delta:
+            continue
+        res = db.session.execute(
+            update(HouseholdMember)
+            .where(
+                HouseholdMember.household_id == household_id,
+                HouseholdMember.user_id == user_id,
             )
-        member.save()
+            .values(expense_balance=HouseholdMember.expense_balance + delta)
+        )
+        if res.rowcount:
+            changed.append(("household_member", f"{household_id}:{user_id}", "update"))
+    if changed:
+        Household.bump_version(household_id, changes=changed)
+
+
+def applyExpenseToBalances(expense: Expense, sign: int = 1):
+    """
+    Adds (sign=1) or removes (sign=-1) the effect of an expense on the member
+    balances, see applyBalanceDeltas
+    """
+    applyBalanceDeltas(expense.household_id, expenseBalanceDeltas(expense, sign))
@@ -0,0 +1,127 @@
+from typing import Callable
+from flask_jwt_extended import current_user
+from socketio import PubSubManager
+from sqlalchemy import event as sa_event
+from app import db, socketio
+from app.models import Household, Shoppinglist, ShoppinglistItems
+
+# session.info keys: whether the transaction wrote anything, and the events
+# waiting for its commit
+_FLUSHED = "socket_flushed"
+_PENDING = "socket_events"
+
+
+def slimRoom(household_id: int) -> str:
+    return f"slim:{household_id}"
+
+
+def householdRoom(household_id: int, slim: bool = False) -> int | str:
+    """
+    Clients that negotiated the slim payload mode join the slim room of their
+    households, all others the room named by the household id
+    """
+    return slimRoom(household_id) if slim else household_id
+
+
+def hasListeners(room) -> bool:
+    manager = socketio.server.manager
+    if isinstance(manager, PubSubManager):
+        # the clients of other processes are not known here
+        return True
+    return bool(manager.rooms.get("/", {}).get(room))
+
+
+def emitHouseholdEvent(
+    event: str,
+    data: dict | Callable[[], dict],
+    household_id: int,
+    slim_data: dict | Callable[[], dict] | None = None,
+):
+    """
+    data and slim_data may be functions, they are only called if a client
+    is in the room of their payload mode. Events of a transaction with
+    pending writes are sent once it is committed, so the event buffer is
+    not written while the transaction holds its locks
+    """
+    events = []
+    for slim, payload in [
+        (False, data),
+        (True, slim_data if slim_data is not None else data),
+    ]:
+        if hasListeners(householdRoom(household_id, slim)):
+            payload = payload() if callable(payload) else payload
+        else:
+            payload = None
+        events.append((household_id, slim, event, payload))
+
+    session = db.session()
+    if session.new or session.dirty or session.deleted or session.info.get(_FLUSHED):
+        session.info.setdefault(_PENDING, []).extend(events)
+    else:
+        _publish(events)
+
+
+def _publish(events: list[tuple[int, bool, str, dict | None]]):
+    from app.sockets.event_buffer import event_buffer
+
+    # numbered when published, the message queue delivers them everywhere
+    for (household_id, slim, event, _), data in zip(
+        events, event_buffer.record(events)
+    ):
+        if data is not None:
+            socketio.emit(event, data, to=householdRoom(household_id, slim))
+
+
+def emitShoppinglistItemEvent(
+    event: str, con: ShoppinglistItems, shoppinglist: Shoppinglist
+):
+    """
+    Slim clients get the ids and the description only, item and category
+    are looked up in their catalog
+    """
+    emitHouseholdEvent(
+        event,
+        lambda: {
+            "item": con.obj_to_item_dict(),
+            "shoppinglist": shoppinglist.obj_to_dict(),
+        },
+        shoppinglist.household_id,
+        slim_data=lambda: {
+            "shoppinglist_id": shoppinglist.id,
+            "item_id": con.item.id,
+            "description": con.description,
+            "version": Household.find_committed_version(shoppinglist.household_id),
+            "actor": current_user.id if current_user else None,
+        },
+    )
+
+
+@sa_event.listens_for(db.session, "after_flush")
+def _socket_after_flush(session, flush_context):
+    session.info[_FLUSHED] = True
+
+
+@sa_event.listens_for(db.session, "after_commit")
+def _socket_after_commit(session):
+    events = session.info.pop(_PENDING, None)
+    if not events:
+        return
+    # versions are bumped by the commit, payloads get the new one
+    versions = session.info.get("household_versions", {})
+    for i, (household_id, slim, event, data) in enumerate(events):
+        if data is not None and "version" in data and household_id in versions:
+            events[i] = (
+                household_id,
+                slim,
+                event,
+                data | {"version": versions[household_id]},
+            )
+    _publish(events)
+
+
+@sa_event.listens_for(db.session, "after_transaction_end")
+def _socket_after_transaction_end(session, transaction):
+    # events of rolled back transactions are dropped
+    if transaction.parent is None:
+        session.info.pop(_FLUSHED, None)
+        session.info.pop(_PENDING, None)
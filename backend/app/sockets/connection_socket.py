@@ -1,18 +1,60 @@
+from flask import request
 from flask_jwt_extended import current_user
-from flask_socketio import join_room
+from flask_socketio import emit, join_room, rooms
 
-from app.helpers import socket_jwt_required
+from app.helpers import socket_jwt_required, validate_socket_args
+from app.service.socket_events import householdRoom, slimRoom
 from app import socketio
+from .event_buffer import event_buffer
+from .schemas import reconnect
 
 
 @socketio.on("connect")
 @socket_jwt_required()
-def on_connect():
+def on_connect(auth=None):
+    # clients opt into compact event payloads with auth {"payload": "slim"}
+    # or ?payload=slim, everyone else gets the full payloads
+    slim = request.args.get("payload") == "slim" or (
+        isinstance(auth, dict) and auth.get("payload") == "slim"
+    )
     for household in current_user.households:
-        join_room(household.household_id)
+        join_room(householdRoom(household.household_id, slim))
 
 
 @socketio.on("reconnect")
 @socket_jwt_required()
-def on_reconnect():
-    pass
+@validate_socket_args(reconnect)
+def on_reconnect(args):
+    """
+    Replays the household events a client missed since its last seen seq.
+    Events can arrive twice (live and replayed), clients skip known seqs.
+    Returns the current seq of all households of the user
+    """
+    joined = rooms()
+    # household id -> whether the client gets slim payloads
+    households = {
+        h.household_id: slimRoom(h.household_id) in joined
+        for h in current_user.households
+    }
+    for cursor in args["households"]:
+        household_id = cursor["household_id"]
+        if household_id not in households:
+            continue
+        slim = households[household_id]
+        missed = event_buffer.since(household_id, slim, cursor["seq"])
+        if missed is None:
+            emit(
+                "resync",
+                {
+                    "household_id": household_id,
+                    "seq": event_buffer.cursor(household_id, slim),
+                },
+            )
+            continue
+        for event, data in missed:
+            emit(event, data)
+
+    return [
+        {"household_id": household_id, "seq": event_buffer.cursor(household_id, slim)}
+        for household_id, slim in households.items()
+    ]
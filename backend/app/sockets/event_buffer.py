@@ -0,0 +1,67 @@
+import json
+from app.config import app, SOCKET_REPLAY_BUFFER_SIZE
+from app.models import SocketEvent, SocketRoom
+
+
+class EventBuffer:
+    """
+    Recent socket events per household room, stored in the database so all
+    processes share them. Events are numbered when they are published, a
+    client can reconnect to any process and replay what it missed.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+
+    def cursor(self, household_id: int, slim: bool) -> str:
+        if self.size <= 0:
+            return "0"
+        return str(SocketRoom.find_seq(household_id, slim))
+
+    def record(
+        self, events: list[tuple[int, bool, str, dict | None]]
+    ) -> list[dict | None]:
+        """
+        Stores the (household id, slim, event, data) events of a commit and
+        returns their data with the sequence number added. Events without
+        data were not sent, nobody was in the room. Clients that missed them
+        are told to resync
+        """
+        if self.size <= 0:
+            return [data for *_, data in events]
+        # stored as JSON, serialize it like the emitted packet
+        seqs = SocketEvent.record(
+            [
+                (
+                    (household_id, slim, event, json.loads(app.json.dumps(data)))
+                    if data is not None
+                    else (household_id, slim, event, None)
+                )
+                for household_id, slim, event, data in events
+            ],
+            self.size,
+        )
+        return [
+            data | {"seq": str(seq)} if data is not None else None
+            for (*_, data), seq in zip(events, seqs)
+        ]
+
+    def since(
+        self, household_id: int, slim: bool, cursor: str
+    ) -> list[tuple[str, dict]] | None:
+        """
+        Events after the cursor, None if they are not (all) available anymore
+        """
+        if self.size <= 0 or not cursor.isdigit():
+            return None
+        seq = int(cursor)
+        latest = SocketRoom.find_seq(household_id, slim)
+        if seq > latest:
+            return None
+        missed = SocketEvent.find_since(household_id, slim, seq)
+        if len(missed) != latest - seq:
+            return None  # rolled over or skipped
+        return [(e.event, e.data | {"seq": str(e.seq)}) for e in missed]
+
+
+event_buffer = EventBuffer(SOCKET_REPLAY_BUFFER_SIZE)
@@ -10,3 +10,12 @@ class shoppinglist_item_add(Schema):
 class shoppinglist_item_remove(Schema):
     shoppinglist_id = fields.Integer(required=True)
     item_id = fields.Integer(required=True)
+
+
+class reconnect(Schema):
+    class Cursor(Schema):
+        household_id = fields.Integer(required=True)
+        # seq of the last received event
+        seq = fields.String(required=True)
+
+    households = fields.List(fields.Nested(Cursor), load_default=[])
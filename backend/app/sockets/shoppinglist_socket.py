@@ -1,10 +1,10 @@
 from flask_jwt_extended import current_user
-from flask_socketio import emit
 from app.controller.shoppinglist.shoppinglist_controller import removeShoppinglistItem
 from app.errors import NotFoundRequest
 
 from app.helpers import socket_jwt_required, validate_socket_args
 from app.models import Shoppinglist, Item, ShoppinglistItems, History
+from app.service.socket_events import emitShoppinglistItemEvent
 from app import socketio
 from .schemas import shoppinglist_item_add, shoppinglist_item_remove
 
@@ -33,14 +33,7 @@ def on_add(args):
 
         History.create_added(shoppinglist, item, description)
 
-        emit(
-            "shoppinglist_item:add",
-            {
-                "item": con.obj_to_item_dict(),
-                "shoppinglist": shoppinglist.obj_to_dict(),
-            },
-            to=shoppinglist.household_id,
-        )
+        emitShoppinglistItemEvent("shoppinglist_item:add", con, shoppinglist)
 
 
 @socketio.on("shoppinglist_item:remove")
@@ -54,11 +47,4 @@ def on_remove(args):
 
     con = removeShoppinglistItem(shoppinglist, args["item_id"])
     if con:
-        emit(
-            "shoppinglist_item:remove",
-            {
-                "item": con.obj_to_item_dict(),
-                "shoppinglist": shoppinglist.obj_to_dict(),
-            },
-            to=shoppinglist.household_id,
-        )
+        emitShoppinglistItemEvent("shoppinglist_item:remove", con, shoppinglist)
@@ -1,2 +1,3 @@
 from .kitchenowl_json_provider import KitchenOwlJSONProvider
 from .multi_dict_list import MultiDictList
+from .compression import ResponseCompressor
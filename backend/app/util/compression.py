@@ -0,0 +1,98 @@
+import gzip
+import zlib
+from typing import Iterable, Iterator
+from flask import Response
+from werkzeug.datastructures import Accept
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = {
+    "application/json",
+    "application/x-ndjson",
+    "text/csv",
+    "text/html",
+    "text/plain",
+}
+
+
+class ResponseCompressor:
+    """
+    Content negotiated gzip/brotli encoding of text responses. Bodies below
+    min_size are sent as is, streamed bodies are compressed chunk by chunk.
+    A level of 0 disables compression
+    """
+
+    def __init__(self, min_size: int = 1024, level: int = 6, brotli_quality: int = 4):
+        self.min_size = min_size
+        self.level = level
+        self.brotli_quality = brotli_quality
+
+    @property
+    def encodings(self) -> list[str]:
+        return ["br", "gzip"] if brotli else ["gzip"]
+
+    def negotiate(self, response: Response, accept_encodings: Accept) -> str | None:
+        """
+        Encoding to use for the response, None if it should be sent as is
+        """
+        if (
+            self.level <= 0
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES
+            or response.direct_passthrough
+            or "Content-Encoding" in response.headers
+            or response.status_code not in (200, 201, 202)
+        ):
+            return None
+        response.vary.add("Accept-Encoding")
+        if not response.is_streamed and (response.content_length or 0) < self.min_size:
+            return None
+        return accept_encodings.best_match(self.encodings)
+
+    def compress(self, data: bytes, encoding: str) -> bytes:
+        if encoding == "br":
+            return brotli.compress(data, quality=self.brotli_quality)
+        return gzip.compress(data, compresslevel=self.level, mtime=0)
+
+    def compress_stream(
+        self, chunks: Iterable[bytes | str], encoding: str
+    ) -> Iterator[bytes]:
+        if encoding == "br":
+            compressor = brotli.Compressor(quality=self.brotli_quality)
+            compress, finish = compressor.process, compressor.finish
+        else:
+            compressor = zlib.compressobj(
+                self.level, zlib.DEFLATED, 16 + zlib.MAX_WBITS
+            )
+            compress, finish = compressor.compress, compressor.flush
+        try:
+            for chunk in chunks:
+                data = compress(chunk.encode() if isinstance(chunk, str) else chunk)
+                if data:
+                    yield data
+            yield finish()
+        finally:
+            if hasattr(chunks, "close"):
+                chunks.close()
+
+    def apply(self, response: Response, encoding: str, data: bytes | None = None):
+        """
+        Encodes the body of the response, data is an already encoded body
+        e.g. from a cache
+        """
+        if response.is_streamed:
+            response.response = self.compress_stream(response.response, encoding)
+            response.headers.pop("Content-Length", None)
+        else:
+            response.set_data(
+                data
+                if data is not None
+                else self.compress(response.get_data(), encoding)
+            )
+        response.headers["Content-Encoding"] = encoding
+        # the encoded body is a different representation of the same resource
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
@@ -0,0 +1,25 @@
+import base64
+import json
+from app.errors import InvalidUsage
+
+
+def encode_cursor(*values) -> str:
+    """
+    Encodes a keyset position (e.g. the sort columns of the last returned row)
+    into an opaque pagination cursor
+    """
+    return (
+        base64.urlsafe_b64encode(json.dumps(values, separators=(",", ":")).encode())
+        .decode()
+        .rstrip("=")
+    )
+
+
+def decode_cursor(cursor: str, length: int) -> list:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except ValueError:
+        raise InvalidUsage("Invalid cursor")
+    if not isinstance(values, list) or len(values) != length:
+        raise InvalidUsage("Invalid cursor")
+    return values
@@ -1,5 +1,28 @@
+import codecs
+import re
 from flask.json.provider import DefaultJSONProvider
 from datetime import date, timezone
+from json.encoder import encode_basestring_ascii
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+# orjson formats floats below 1e-4 positionally (0.00001 instead of 1e-05)
+# and exponents differently (1e16 instead of 1e+16). Output containing such
+# a number, also as top-level value, is re-encoded with the stdlib to stay
+# byte-identical. Strings rarely match, which only costs the fallback.
+_STDLIB_EXPONENT = re.compile(rb"e-?[0-9]+(?:[,\]}]|$)")
+_STDLIB_SMALL = b"0.0000"
+
+
+def _escapeNonAscii(exc: UnicodeEncodeError) -> tuple[str, int]:
+    # called once per run of non-ASCII characters
+    return encode_basestring_ascii(exc.object[exc.start : exc.end])[1:-1], exc.end
+
+
+codecs.register_error("kitchenowl_json", _escapeNonAscii)
 
 
 class KitchenOwlJSONProvider(DefaultJSONProvider):
@@ -8,3 +31,23 @@ class KitchenOwlJSONProvider(DefaultJSONProvider):
             return int(round(o.replace(tzinfo=timezone.utc).timestamp() * 1000))
 
         return super().default(o)
+
+    def dumps(self, obj, **kwargs) -> str:
+        # Flask responses and socket packets are compact, everything else
+        # (indent, custom separators, ...) is left to the stdlib
+        if orjson is not None and kwargs == {"separators": (",", ":")}:
+            try:
+                res = orjson.dumps(
+                    obj,
+                    default=self.default,
+                    option=orjson.OPT_SORT_KEYS | orjson.OPT_PASSTHROUGH_DATETIME,
+                )
+                if _STDLIB_SMALL not in res and not _STDLIB_EXPONENT.search(res):
+                    # the stdlib escapes everything outside of printable
+                    # ASCII, orjson writes UTF-8. Both only occur in strings
+                    if not res.isascii():
+                        res = res.decode().encode("ascii", "kitchenowl_json")
+                    return res.decode().replace("\x7f", "\\u007f")
+            except TypeError:  # e.g. non-str keys or integers above 64 bit
+                pass
+        return super().dumps(obj, **kwargs)
@@ -0,0 +1,68 @@
+from typing import Any, Iterator
+from flask import Response, current_app, stream_with_context
+
+
+def stream_json(obj: Any, chunk_size: int = 64 * 1024) -> Iterator[str]:
+    """
+    Serializes obj like jsonify, but iterators (also as values of dicts) are
+    consumed and serialized element by element. Output is yielded in chunks
+    of about chunk_size characters
+    """
+    buffer, size = [], 0
+    for part in _encode(obj):
+        buffer.append(part)
+        size += len(part)
+        if size >= chunk_size:
+            yield "".join(buffer)
+            buffer, size = [], 0
+    buffer.append("\n")
+    yield "".join(buffer)
+
+
+def json_stream_response(obj: Any) -> Response:
+    """
+    Streamed JSON response, see stream_json. The request context is kept
+    until the body is written so iterators can keep reading from the db.
+    The first chunk is serialized before the response is returned, so errors
+    up to then are handled like in any other view
+    """
+    chunks = stream_json(obj)
+    return current_app.response_class(
+        stream_with_context(_abortOnError(next(chunks), chunks)),
+        mimetype="application/json",
+    )
+
+
+def _abortOnError(first: str, chunks: Iterator[str]) -> Iterator[str]:
+    yield first
+    try:
+        yield from chunks
+    except Exception as e:
+        # the status was already sent, raising closes the connection without
+        # ending the body so the client does not take the JSON as complete
+        current_app.logger.error(f"Streamed response aborted: {e}", exc_info=e)
+        raise
+
+
+def _encode(obj: Any) -> Iterator[str]:
+    dumps = current_app.json.dumps
+    if isinstance(obj, Iterator):
+        yield "["
+        first = True
+        for element in obj:
+            if not first:
+                yield ","
+            first = False
+            yield from _encode(element)
+        yield "]"
+    elif isinstance(obj, dict) and any(isinstance(v, Iterator) for v in obj.values()):
+        # keys are sorted like the json provider does
+        yield "{"
+        for i, key in enumerate(sorted(obj)):
+            if i:
+                yield ","
+            yield dumps(key) + ":"
+            yield from _encode(obj[key])
+        yield "}"
+    else:
+        yield dumps(obj, separators=(",", ":"))
@@ -0,0 +1,106 @@
+import codecs
+import json
+from typing import IO, Any, Iterator
+from app.errors import InvalidUsage
+
+_decoder = json.JSONDecoder()
+
+
+class _Reader:
+    """
+    Buffered text view of a binary stream that decodes one JSON value at a
+    time, only the part of the input that was not consumed yet is kept
+    """
+
+    def __init__(self, stream: IO[bytes], chunk_size: int):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.decoder = codecs.getincrementaldecoder("utf-8")()
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self) -> bool:
+        if self.eof:
+            return False
+        # grows with the pending input, so big values are not rescanned often
+        data = self.stream.read(max(self.chunk_size, len(self.buffer) - self.pos))
+        if not data:
+            self.eof = True
+        try:
+            text = self.decoder.decode(data, final=self.eof)
+        except UnicodeDecodeError:
+            raise InvalidUsage("Invalid JSON: not UTF-8")
+        self.buffer = self.buffer[self.pos :] + text
+        self.pos = 0
+        return True
+
+    def peek(self) -> str | None:
+        """
+        Next non-whitespace character, None at the end of the input
+        """
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in " \t\n\r":
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self.fill():
+                return None
+
+    def take(self, expected: str) -> str:
+        c = self.peek()
+        if c is None or c not in expected:
+            raise InvalidUsage(f"Invalid JSON: expected one of {expected!r}")
+        self.pos += 1
+        return c
+
+    def value(self) -> Any:
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buffer, self.pos)
+                # numbers and literals may continue in the next chunk
+                if end < len(self.buffer) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise InvalidUsage("Invalid JSON")
+            self.fill()
+
+
+def iter_json_object(
+    stream: IO[bytes], chunk_size: int = 64 * 1024
+) -> Iterator[tuple[str, int | None, Any]]:
+    """
+    Parses a JSON object from stream incrementally. Yields (key, index,
+    element) for each element of array values and (key, None, value) for
+    other values, so at most one element is held in memory at a time
+    """
+    reader = _Reader(stream, chunk_size)
+    reader.take("{")
+    if reader.peek() == "}":
+        reader.pos += 1
+    else:
+        while True:
+            key = reader.value()
+            if not isinstance(key, str):
+                raise InvalidUsage("Invalid JSON: expected a key")
+            reader.take(":")
+            if reader.peek() == "[":
+                reader.pos += 1
+                if reader.peek() == "]":
+                    reader.pos += 1
+                else:
+                    index = 0
+                    while True:
+                        yield key, index, reader.value()
+                        index += 1
+                        if reader.take(",]") == "]":
+                            break
+            else:
+                yield key, None, reader.value()
+            if reader.take(",}") == "}":
+                break
+    if reader.peek() is not None:
+        raise InvalidUsage("Invalid JSON: trailing data")
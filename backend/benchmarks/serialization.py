@@ -0,0 +1,74 @@
+"""
+Serialization microbenchmark: python -m benchmarks.serialization [rows]
+
+Compares the previous DbModelMixin.obj_to_dict (column loop per call) with
+the compiled per-model serializers on lists of transient rows.
+"""
+
+import sys
+import timeit
+from datetime import datetime, timezone
+from app.models import Item, Recipe, User
+
+
+def legacy_obj_to_dict(obj, skip_columns=None, include_columns=None) -> dict:
+    d = {}
+    for column in obj.__table__.columns:
+        d[column.name] = getattr(obj, column.name)
+
+    for column_name in skip_columns or []:
+        del d[column_name]
+
+    for column in obj.__table__.columns:
+        if not include_columns:
+            break
+
+        if column.name in d and column.name not in include_columns:
+            del d[column.name]
+
+    return d
+
+
+def rows(cls, count: int, **values) -> list:
+    now = datetime.now(timezone.utc)
+    return [cls(id=i, created_at=now, updated_at=now, **values) for i in range(count)]
+
+
+def bench(name: str, objs: list, skip_columns=None, include_columns=None):
+    def legacy():
+        return [legacy_obj_to_dict(o, skip_columns, include_columns) for o in objs]
+
+    def compiled():
+        serializer = type(objs[0]).serializer(skip_columns, include_columns)
+        return [serializer(o) for o in objs]
+
+    assert legacy() == compiled()
+    t_legacy = min(timeit.repeat(legacy, number=1, repeat=5))
+    t_compiled = min(timeit.repeat(compiled, number=1, repeat=5))
+    print(
+        f"{name:<28} legacy {t_legacy * 1000:8.2f}ms  "
+        f"compiled {t_compiled * 1000:8.2f}ms  x{t_legacy / t_compiled:.1f}"
+    )
+
+
+def main(count: int = 10000):
+    print(f"{count} rows, best of 5")
+    bench("item", rows(Item, count, name="item", household_id=1))
+    bench(
+        "recipe",
+        rows(Recipe, count, name="recipe", description="text", household_id=1),
+    )
+    bench(
+        "user (skip columns)",
+        rows(User, count, username="user", name="name", password="hash"),
+        skip_columns=["password", "email", "email_verified", "admin"],
+    )
+    bench(
+        "user (include columns)",
+        rows(User, count, username="user", name="name"),
+        include_columns=["id", "name", "username"],
+    )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
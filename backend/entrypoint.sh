@@ -26,6 +26,11 @@ fi
 mkdir -p $STORAGE_PATH/upload
 flask db upgrade
 if [ "${SKIP_UPGRADE_DEFAULT_ITEMS}" != "true" ] && [ "${SKIP_UPGRADE_DEFAULT_ITEMS}" != "True" ]; then
-    python upgrade_default_items.py
+    # only households whose language template changed are upgraded
+    if [ "${UPGRADE_DEFAULT_ITEMS_IN_BACKGROUND}" = "true" ] || [ "${UPGRADE_DEFAULT_ITEMS_IN_BACKGROUND}" = "True" ]; then
+        python upgrade_default_items.py &
+    else
+        python upgrade_default_items.py
+    fi
 fi
 uwsgi "$@"
\ No newline at end of file
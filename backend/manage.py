@@ -9,7 +9,11 @@ from app.config import UPLOAD_FOLDER
 from app.jobs import jobs
 from app.models import User, File, Household, HouseholdMember, ChallengeMailVerify
 from app.service import mail
-from app.service.delete_unused import deleteEmptyHouseholds, deleteUnusedFiles
+from app.service.delete_unused import (
+    deleteEmptyHouseholds,
+    deleteUnusedFiles,
+    deleteOrphanedUploads,
+)
 from app.service.recalculate_blurhash import recalculateBlurhashes
 
 
@@ -137,19 +141,30 @@ Settings for {user.name} (@{user.username}) (server admin: {user.admin})
 
 def manageFiles():
     while True:
-        print("""
+        print(
+            """
 What next?
     1. Import files
     2. Delete unused files
     3. Generate missing blur-hashes
-    (q) Go back""")
+    4. Delete files without database entry
+    (q) Go back"""
+        )
         selection = input("Your selection (q):")
         if selection == "1":
             importFiles()
         elif selection == "2":
-            print(f"Deleted {deleteUnusedFiles()} unused files")
+            dry_run = input("Dry run (y/N):") == "y"
+            print(
+                f"{'Found' if dry_run else 'Deleted'} {deleteUnusedFiles(dry_run)} unused files"
+            )
         elif selection == "3":
             print(f"Updated {recalculateBlurhashes()} files")
+        elif selection == "4":
+            dry_run = input("Dry run (y/N):") == "y"
+            print(
+                f"{'Found' if dry_run else 'Deleted'} {deleteOrphanedUploads(dry_run)} files without database entry"
+            )
         else:
             return
 
@@ -0,0 +1,147 @@
+import pytest
+from app.models import User
+
+
+@pytest.fixture
+def member_ids(user_client_with_household, household_id, admin_username):
+    response = user_client_with_household.get('/api/user',)
+    assert response.status_code == 200
+    user_id = response.get_json()['id']
+    admin_id = User.find_by_username(admin_username).id
+    response = user_client_with_household.put(
+        f'/api/household/{household_id}/member/{admin_id}', json={})
+    assert response.status_code == 200
+    return user_id, admin_id
+
+
+def get_balances(client, household_id):
+    response = client.get(f'/api/household/{household_id}')
+    assert response.status_code == 200
+    return {m['id']: m['expense_balance'] for m in response.get_json()['member']}
+
+
+def test_expense_balances(user_client_with_household, household_id, member_ids):
+    from app import db
+    from app.models import HouseholdChange
+
+    user_id, admin_id = member_ids
+    last_change = db.session.query(db.func.max(HouseholdChange.id)).scalar()
+    data = {
+        'name': 'groceries',
+        'amount': 30,
+        'paid_by': {'id': user_id},
+        'paid_for': [{'id': user_id, 'factor': 1}, {'id': admin_id, 'factor': 2}],
+    }
+    response = user_client_with_household.post(
+        f'/api/household/{household_id}/expense', json=data)
+    assert response.status_code == 200
+    expense_id = response.get_json()['id']
+    assert get_balances(user_client_with_household, household_id) == pytest.approx(
+        {user_id: 20, admin_id: -20})
+    # balances are updated with statements, the change feed still has them
+    assert {c.entity_id for c in HouseholdChange.query.filter(
+        HouseholdChange.id > last_change,
+        HouseholdChange.entity == 'household_member')} == {
+        f'{household_id}:{user_id}', f'{household_id}:{admin_id}'}
+
+    response = user_client_with_household.post(
+        f'/api/expense/{expense_id}', json={'amount': 60, 'paid_for': [{'id': admin_id, 'factor': 1}]})
+    assert response.status_code == 200
+    assert get_balances(user_client_with_household, household_id) == pytest.approx(
+        {user_id: 60, admin_id: -60})
+
+    response = user_client_with_household.get(
+        f'/api/household/{household_id}/expense/recalculate-balances')
+    assert response.status_code == 200
+    assert get_balances(user_client_with_household, household_id) == pytest.approx(
+        {user_id: 60, admin_id: -60})
+    response = user_client_with_household.get(
+        f'/api/household/{household_id}/expense')
+    assert response.status_code == 200
+    assert len(response.get_json()) == 1
+    assert response.get_json()[0]['paid_for'][0]['user_id'] == admin_id
+
+    response = user_client_with_household.delete(f'/api/expense/{expense_id}')
+    assert response.status_code == 200
+    assert get_balances(user_client_with_household, household_id) == pytest.approx(
+        {user_id: 0, admin_id: 0})
+
+
+def test_expense_overview(user_client_with_household, household_id, member_ids):
+    from app.models import ExpenseRollup
+
+    user_id, admin_id = member_ids
+    for amount in [30, 60]:
+        response = user_client_with_household.post(
+            f'/api/household/{household_id}/expense', json={
+                'name': 'groceries',
+                'amount': amount,
+                'paid_by': {'id': user_id},
+                'paid_for': [{'id': user_id, 'factor': 1}, {'id': admin_id, 'factor': 2}],
+            })
+        assert response.status_code == 200
+    expense_id = response.get_json()['id']
+    # one row per user of the day, the amounts are summed up
+    rows = ExpenseRollup.query.filter(ExpenseRollup.household_id == household_id).all()
+    assert len(rows) == 3
+    assert {r.user_id: r.amount for r in rows} == pytest.approx(
+        {None: 90, user_id: 30, admin_id: 60})
+
+    def overview(**args):
+        response = user_client_with_household.get(
+            f'/api/household/{household_id}/expense/overview', query_string=args)
+        assert response.status_code == 200
+        return response.get_json()
+
+    for frame in range(4):
+        data = overview(frame=frame, steps=3)
+        assert set(data.keys()) == {'0', '1', '2'}
+        assert data['0']['by_category'] == pytest.approx({'-1': 90})
+        assert sum(data['0']['by_subframe'].values()) == pytest.approx(90)
+        assert data['1']['by_category'] == {}
+    assert overview(frame=2, view=1)['0']['by_category'] == pytest.approx({'-1': 30})
+
+    response = user_client_with_household.post(
+        f'/api/expense/{expense_id}', json={'exclude_from_statistics': True})
+    assert response.status_code == 200
+    assert overview(frame=2)['0']['by_category'] == pytest.approx({'-1': 30})
+
+    response = user_client_with_household.get(
+        f'/api/household/{household_id}/expense/recalculate-balances')
+    assert response.status_code == 200
+    assert overview(frame=3)['0']['by_category'] == pytest.approx({'-1': 30})
+    assert overview(frame=3, view=1)['0']['by_category'] == pytest.approx({'-1': 10})
+
+
+def test_expense_list_cursor(user_client_with_household, household_id, member_ids):
+    user_id, admin_id = member_ids
+    ids = []
+    for i in range(5):
+        response = user_client_with_household.post(
+            f'/api/household/{household_id}/expense', json={
+                'name': f'expense{i}',
+                'amount': 10,
+                'date': 1700000000000,
+                'paid_by': {'id': user_id},
+                'paid_for': [{'id': admin_id, 'factor': 1}],
+            })
+        assert response.status_code == 200
+        ids.append(response.get_json()['id'])
+
+    seen = []
+    query = {'limit': 2}
+    while True:
+        response = user_client_with_household.get(
+            f'/api/household/{household_id}/expense', query_string=query)
+        assert response.status_code == 200
+        assert len(response.get_json()) <= 2
+        seen += [e['id'] for e in response.get_json()]
+        if 'X-Next-Cursor' not in response.headers:
+            break
+        query['cursor'] = response.headers['X-Next-Cursor']
+    assert seen == sorted(ids, reverse=True)
+    assert response.get_json()[0]['paid_for'][0]['user_id'] == admin_id
+
+    response = user_client_with_household.get(
+        f'/api/household/{household_id}/expense', query_string={'cursor': 'invalid'})
+    assert response.status_code == 400
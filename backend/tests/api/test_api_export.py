@@ -0,0 +1,98 @@
+import io
+import json
+import os
+import shutil
+import tarfile
+import time
+import zipfile
+import pytest
+
+
+@pytest.fixture
+def recipe_with_photo(user_client_with_household, recipe_with_items):
+    from app import db
+    from app.config import UPLOAD_FOLDER
+    from app.models import File, Recipe
+
+    os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+    filename = 'export-test-photo.jpg'
+    with open(os.path.join(UPLOAD_FOLDER, filename), 'wb') as f:
+        f.write(b'photo' * 1000)
+    db.session.add(File(filename=filename))
+    Recipe.find_by_id(recipe_with_items).photo = filename
+    db.session.commit()
+    yield filename
+    os.remove(os.path.join(UPLOAD_FOLDER, filename))
+
+
+def _members(data, format):
+    if format == 'zip':
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            return {name: archive.read(name) for name in archive.namelist()}
+    with tarfile.open(fileobj=io.BytesIO(data)) as archive:
+        return {m.name: archive.extractfile(m).read() for m in archive.getmembers()}
+
+
+@pytest.mark.parametrize('format', ['zip', 'tar'])
+def test_export_archive(user_client_with_household, household_id, household_name, recipe_with_photo, format):
+    url = f'/api/household/{household_id}/export/archive'
+    response = user_client_with_household.get(url, query_string={'format': format})
+    assert response.status_code == 200
+    assert response.is_streamed
+    members = _members(response.get_data(), format)
+
+    assert json.loads(members['household.json'])['name'] == household_name
+    recipes = [json.loads(line) for line in members['recipes.ndjson'].splitlines()]
+    assert recipes[0]['photo'] == recipe_with_photo
+    assert recipes[0]['items'][0]['description'] == '2 pieces'
+    assert len(members['items.ndjson'].splitlines()) == 1
+    assert members['expenses.ndjson'] == b''
+    assert members[f'files/{recipe_with_photo}'] == b'photo' * 1000
+
+    # background mode writes the same archive to disk
+    response = user_client_with_household.post(url, json={'format': format})
+    assert response.status_code == 200
+    name = response.get_json()['name']
+    assert response.get_json()['job']['type'] == 'exportArchive'
+    for _ in range(100):
+        response = user_client_with_household.get(f'{url}/{name}')
+        if response.status_code != 202:
+            break
+        time.sleep(0.05)
+    assert response.status_code == 200
+    assert _members(response.get_data(), format).keys() == members.keys()
+
+    # downloads can be resumed
+    response = user_client_with_household.get(f'{url}/{name}', headers={'Range': 'bytes=10-'})
+    assert response.status_code == 206
+
+    response = user_client_with_household.get(f'{url}/unknown.zip')
+    assert response.status_code == 404
+
+    from app.config import EXPORT_FOLDER
+    shutil.rmtree(os.path.join(EXPORT_FOLDER, str(household_id)))
+
+
+def test_export_archive_failed(user_client_with_household, household_id):
+    from app.config import EXPORT_FOLDER, EXPORT_ARCHIVE_TIMEOUT
+    from app.service.export_archive import createExportArchive
+
+    url = f'/api/household/{household_id}/export/archive'
+    name = createExportArchive(household_id)
+    path = os.path.join(EXPORT_FOLDER, str(household_id), name)
+    response = user_client_with_household.get(f'{url}/{name}')
+    assert response.status_code == 202
+
+    # the writing process was stopped
+    stale = time.time() - EXPORT_ARCHIVE_TIMEOUT.total_seconds() - 1
+    os.utime(path + '.part', (stale, stale))
+    response = user_client_with_household.get(f'{url}/{name}')
+    assert response.status_code == 410
+    assert response.get_json()['status'] == 'failed'
+
+    os.remove(path + '.part')
+    open(path + '.failed', 'w').close()
+    response = user_client_with_household.get(f'{url}/{name}')
+    assert response.status_code == 410
+
+    shutil.rmtree(os.path.join(EXPORT_FOLDER, str(household_id)))
@@ -40,3 +40,258 @@ def test_get_all_households(user_client_with_household, household_name):
     data = response.get_json()
     assert len(data) == 1
     assert data[0]["name"] == household_name
+
+
+def test_daily_analysis_skips_idle_household(user_client_with_household, household_id, shoppinglist_id_with_item, item_id):
+    from datetime import datetime, timedelta, timezone
+    from app import db
+    from app.jobs.jobs import daily
+    from app.models import Household
+
+    assert household_id in Household.find_ids_needing_analysis()
+    daily()
+    # recent activity is still considered by the recipe suggestions
+    assert household_id in Household.find_ids_needing_analysis()
+
+    household = Household.find_by_id(household_id)
+    household.last_activity_at = datetime.now(timezone.utc) - timedelta(days=10)
+    db.session.commit()
+    assert household_id not in Household.find_ids_needing_analysis()
+
+    response = user_client_with_household.delete(
+        f'/api/shoppinglist/{shoppinglist_id_with_item}/item', json={'item_id': item_id})
+    assert response.status_code == 200
+    assert household_id in Household.find_ids_needing_analysis()
+
+
+def test_household_version_invalidates_cache(user_client_with_household, household_id, item_name):
+    from app.models import Household
+
+    response = user_client_with_household.get(f'/api/household/{household_id}/item')
+    assert response.status_code == 200
+    items = response.get_json()
+    version = Household.find_version_tag(household_id)
+    # served from the cache
+    response = user_client_with_household.get(f'/api/household/{household_id}/item')
+    assert response.get_json() == items
+
+    response = user_client_with_household.post(
+        f'/api/household/{household_id}/item', json={'name': item_name})
+    assert response.status_code == 200
+    assert Household.find_version_tag(household_id) != version
+    response = user_client_with_household.get(f'/api/household/{household_id}/item')
+    assert item_name in [e['name'] for e in response.get_json()]
+
+
+def test_conditional_get(user_client_with_household, household_id, shoppinglist_id, item_name):
+    url = f'/api/household/{household_id}/item'
+    response = user_client_with_household.get(url)
+    assert response.status_code == 200
+    etag = response.headers['ETag']
+    response = user_client_with_household.get(url, headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.headers['ETag'] == etag
+    assert not response.data
+
+    response = user_client_with_household.post(url, json={'name': item_name})
+    assert response.status_code == 200
+    response = user_client_with_household.get(url, headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+    # endpoints without a household version fall back to a hash of the body
+    url = f'/api/shoppinglist/{shoppinglist_id}/items'
+    response = user_client_with_household.get(url)
+    assert response.status_code == 200
+    response = user_client_with_household.get(
+        url, headers={'If-None-Match': response.headers['ETag']})
+    assert response.status_code == 304
+
+
+def test_household_changes(user_client_with_household, household_id, item_name):
+    url = f'/api/household/{household_id}/changes'
+    response = user_client_with_household.get(url)
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data['resync']
+    cursor = data['cursor']
+
+    response = user_client_with_household.get(url, query_string={'since': cursor})
+    assert response.status_code == 200
+    assert not response.get_json()['resync']
+    assert response.get_json()['changes'] == []
+
+    response = user_client_with_household.post(
+        f'/api/household/{household_id}/item', json={'name': item_name})
+    assert response.status_code == 200
+    item_id = response.get_json()['id']
+    response = user_client_with_household.post(
+        f'/api/household/{household_id}/item', json={'name': 'temporary'})
+    assert response.status_code == 200
+    response = user_client_with_household.delete(
+        f'/api/item/{response.get_json()["id"]}')
+    assert response.status_code == 200
+
+    response = user_client_with_household.get(url, query_string={'since': cursor})
+    assert response.status_code == 200
+    data = response.get_json()
+    assert not data['resync']
+    # the temporary item was created and deleted in between
+    items = [c for c in data['changes'] if c['entity'] == 'item']
+    assert len(items) == 1
+    assert items[0]['id'] == str(item_id)
+    assert items[0]['op'] == 'upsert'
+    assert items[0]['data']['name'] == item_name
+
+    response = user_client_with_household.get(url, query_string={'since': data['cursor']})
+    assert response.get_json()['changes'] == []
+
+
+def test_household_changes_markers(user_client_with_household, household_id):
+    from app import db
+    from app.models import Household, HouseholdChange
+    from app.service.expense_rollup import rebuildExpenseRollup
+
+    url = f'/api/household/{household_id}/changes'
+    cursor = user_client_with_household.get(url).get_json()['cursor']
+    # retention removed everything up to the cursor
+    HouseholdChange.query.filter(HouseholdChange.household_id == household_id).delete()
+    db.session.commit()
+
+    # derived data only, the version gap does not force a resync
+    rebuildExpenseRollup(household_id)
+    data = user_client_with_household.get(url, query_string={'since': cursor}).get_json()
+    assert not data['resync']
+    assert data['changes'] == []
+    assert data['cursor'] != cursor
+
+    # bulk statements without changes do
+    Household.bump_version(household_id)
+    db.session.commit()
+    data = user_client_with_household.get(url, query_string={'since': data['cursor']}).get_json()
+    assert data['resync']
+
+
+def test_household_version_per_transaction(user_client_with_household, household_id, item_name):
+    from app import db
+    from app.models import Household, HouseholdChange, Item
+
+    version = Household.find_version(household_id)
+    first = Item(name=item_name, household_id=household_id)
+    db.session.add(first)
+    db.session.flush()
+    db.session.add(Item(name='other', household_id=household_id))
+    db.session.flush()
+    first.name = 'renamed'
+    db.session.commit()
+
+    # one version for all flushes of the transaction
+    assert Household.find_version(household_id) == version + 1
+    changes = HouseholdChange.query.filter(
+        HouseholdChange.household_id == household_id, HouseholdChange.version == version + 1).all()
+    assert sorted((c.entity, c.op) for c in changes) == [
+        ('item', 'insert'), ('item', 'insert'), ('item', 'update')]
+
+    db.session.add(Item(name='rolled back', household_id=household_id))
+    db.session.flush()
+    db.session.rollback()
+    db.session.commit()
+    assert Household.find_version(household_id) == version + 1
+
+
+def test_household_changes_cascades():
+    from app import db
+    from app.models import HouseholdChange
+
+    # rows deleted by the database are not in the change feed
+    unsynced = HouseholdChange.IGNORED_ENTITIES | {'job', 'socket_room', 'socket_event'}
+    for table in db.metadata.tables.values():
+        for fk in table.foreign_keys:
+            if fk.ondelete == 'CASCADE':
+                assert table.name in unsynced
+
+
+def test_delete_item_with_associations(user_client_with_household, household_id, item_name):
+    from app.models import Association, HouseholdChange
+
+    url = f'/api/household/{household_id}/item'
+    first = user_client_with_household.post(url, json={'name': item_name}).get_json()['id']
+    second = user_client_with_household.post(url, json={'name': 'other'}).get_json()['id']
+    Association.create(first, second, 0.5, 0.5, 1.0)
+    Association.create(second, first, 0.5, 0.5, 1.0)
+
+    response = user_client_with_household.delete(f'/api/item/{first}')
+    assert response.status_code == 200
+    assert Association.query.count() == 0
+    entities = {c.entity for c in HouseholdChange.query.filter(
+        HouseholdChange.household_id == household_id, HouseholdChange.op == 'delete')}
+    assert {'item', 'association'} <= entities
+
+
+def test_compressed_responses(user_client_with_household, household_id, item_name):
+    import gzip
+    import brotli
+
+    url = f'/api/household/{household_id}/item'
+    for i in range(10):
+        response = user_client_with_household.post(url, json={'name': f'{item_name}{i}'})
+        assert response.status_code == 200
+    plain = user_client_with_household.get(url)
+    assert 'Content-Encoding' not in plain.headers
+    assert plain.headers['Vary'] == 'Accept-Encoding'
+
+    response = user_client_with_household.get(url, headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(response.data) == plain.data
+    assert response.headers['ETag'] == 'W/' + plain.headers['ETag']
+    # the compressed body is reused from the cache
+    assert user_client_with_household.get(
+        url, headers={'Accept-Encoding': 'gzip'}).data == response.data
+    response = user_client_with_household.get(
+        url, headers={'Accept-Encoding': 'gzip', 'If-None-Match': response.headers['ETag']})
+    assert response.status_code == 304
+
+    response = user_client_with_household.get(
+        url, headers={'Accept-Encoding': 'gzip;q=0.5, br'})
+    assert response.headers['Content-Encoding'] == 'br'
+    assert brotli.decompress(response.data) == plain.data
+
+    # small bodies are sent as is
+    response = user_client_with_household.get(
+        f'/api/household/{household_id}/category', headers={'Accept-Encoding': 'gzip'})
+    assert response.status_code == 200
+    assert 'Content-Encoding' not in response.headers
+
+
+def test_item_pagination(user_client_with_household, household_id, item_name):
+    url = f'/api/household/{household_id}/item'
+    for name in ['b', 'a', 'c', 'a2', 'd']:
+        response = user_client_with_household.post(url, json={'name': name})
+        assert response.status_code == 200
+    names = [e['name'] for e in user_client_with_household.get(url).get_json()]
+
+    for endpoint in [url, f'/api/household/{household_id}/export/items']:
+        paged, cursor = [], None
+        while True:
+            args = {'limit': 2}
+            if cursor:
+                args['cursor'] = cursor
+            response = user_client_with_household.get(endpoint, query_string=args)
+            assert response.status_code == 200
+            page = response.get_json()
+            page = page['items'] if 'items' in page else page
+            assert len(page) <= 2
+            paged += [e['name'] for e in page]
+            cursor = response.headers.get('X-Next-Cursor')
+            if not cursor:
+                break
+        assert paged == names
+
+    # the cursor survives the response cache
+    first = user_client_with_household.get(url, query_string={'limit': 2})
+    cached = user_client_with_household.get(url, query_string={'limit': 2})
+    assert cached.headers['X-Next-Cursor'] == first.headers['X-Next-Cursor']
+    assert cached.get_json() == first.get_json()
+
+    response = user_client_with_household.get(url, query_string={'cursor': 'invalid'})
+    assert response.status_code == 400
@@ -0,0 +1,131 @@
+import os
+import pytest
+
+
+@pytest.fixture
+def import_data(username):
+    return {
+        'items': [
+            {'name': 'Flour', 'category': 'Baking', 'icon': 'flour'},
+            {'name': 'Sugar', 'category': 'Baking'},
+        ],
+        'recipes': [
+            {
+                'name': 'Cake',
+                'items': [
+                    {'name': 'flour ', 'description': '500g'},
+                    {'name': 'Eggs', 'description': '3'},
+                    {'name': 'Eggs', 'description': 'duplicate'},
+                ],
+                'tags': ['Dessert', 'Dessert'],
+            },
+            {'name': 'Cake', 'description': 'copy'},
+            {'name': 'Cake', 'description': 'another copy'},
+        ],
+        'expenses': [
+            {
+                'name': 'Groceries',
+                'amount': 10,
+                'date': 1700000000000,
+                'paid_by': username,
+                'paid_for': [{'username': username}, {'username': 'unknown'}],
+                'category': {'name': 'Food', 'color': 1},
+            },
+        ],
+    }
+
+
+def test_import(user_client_with_household, household_id, import_data):
+    url = f'/api/household/{household_id}/import'
+    response = user_client_with_household.post(url, json=import_data)
+    assert response.status_code == 200
+    assert set(response.get_json()['phases']) == {
+        'preload', 'items', 'recipes', 'expenses', 'balances', 'rollup'}
+
+    response = user_client_with_household.get(f'/api/household/{household_id}/item')
+    items = {item['name']: item for item in response.get_json()}
+    assert set(items) == {'Flour', 'Sugar', 'Eggs'}
+    assert items['Flour']['icon'] == 'flour'
+    assert items['Flour']['category']['name'] == 'Baking'
+    assert items['Sugar']['category']['id'] == items['Flour']['category']['id']
+
+    response = user_client_with_household.get(f'/api/household/{household_id}/recipe')
+    recipes = {recipe['name']: recipe for recipe in response.get_json()}
+    assert set(recipes) == {'Cake', 'Cake (2)', 'Cake (3)'}
+    cake = recipes['Cake']
+    assert sorted(item['name'] for item in cake['items']) == ['Eggs', 'Flour']
+    assert [tag['name'] for tag in cake['tags']] == ['Dessert']
+
+    response = user_client_with_household.get(f'/api/household/{household_id}/expense')
+    expenses = response.get_json()
+    assert len(expenses) == 1
+    assert expenses[0]['category']['name'] == 'Food'
+    assert len(expenses[0]['paid_for']) == 1
+
+    # importing again numbers the recipes after the existing copies
+    response = user_client_with_household.post(url, json={'recipes': [{'name': 'Cake'}]})
+    assert response.status_code == 200
+    response = user_client_with_household.get(f'/api/household/{household_id}/recipe')
+    assert 'Cake (4)' in {recipe['name'] for recipe in response.get_json()}
+
+
+def test_import_recipe_overwrite(user_client_with_household, household_id):
+    url = f'/api/household/{household_id}/import'
+    user_client_with_household.post(url, json={'recipes': [
+        {'name': 'Soup', 'items': [{'name': 'Carrot'}], 'tags': ['Warm']}]})
+    response = user_client_with_household.post(url, json={'recipe_overwrite': True, 'recipes': [
+        {'name': 'Soup', 'description': 'new', 'items': [{'name': 'Leek'}]}]})
+    assert response.status_code == 200
+
+    response = user_client_with_household.get(f'/api/household/{household_id}/recipe')
+    recipes = response.get_json()
+    assert len(recipes) == 1
+    assert recipes[0]['description'] == 'new'
+    assert [item['name'] for item in recipes[0]['items']] == ['Leek']
+    assert recipes[0]['tags'] == []
+
+
+def test_import_stream(user_client_with_household, household_id, import_data):
+    import_data['items'].append({'icon': 'no name'})
+    import_data['recipes'].insert(1, 'not a recipe')
+    import_data['shoppinglists'] = ['Default', 5]
+    # only read from the query string
+    import_data['recipe_overwrite'] = True
+    url = f'/api/household/{household_id}/import/stream'
+    response = user_client_with_household.post(url, json=import_data)
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data['imported'] == {'items': 2, 'recipes': 3, 'expenses': 1, 'shoppinglists': 1}
+    assert data['skipped'] == 3
+    assert [(e['key'], e['index']) for e in data['errors']] == [
+        ('items', 2), ('recipes', 1), ('shoppinglists', 1)]
+    assert 'rollup' in data['phases']
+
+    response = user_client_with_household.get(f'/api/household/{household_id}/recipe')
+    assert {recipe['name'] for recipe in response.get_json()} == {'Cake', 'Cake (2)', 'Cake (3)'}
+    response = user_client_with_household.get(f'/api/household/{household_id}/expense')
+    assert len(response.get_json()) == 1
+
+    response = user_client_with_household.post(url, data='{"items": [')
+    assert response.status_code == 400
+
+
+def test_import_stream_background(user_client_with_household, household_id, import_data):
+    import time
+    from app.config import IMPORT_FOLDER
+
+    url = f'/api/household/{household_id}/import/stream'
+    response = user_client_with_household.post(
+        url, query_string={'background': 'true'}, json=import_data)
+    assert response.status_code == 202
+    job_id = response.get_json()['id']
+    for _ in range(200):
+        job = user_client_with_household.get(
+            f'/api/household/{household_id}/job/{job_id}').get_json()
+        if job['status'] in ('done', 'failed'):
+            break
+        time.sleep(0.05)
+    assert job['status'] == 'done'
+    assert job['result']['imported']['recipes'] == 3
+    assert os.listdir(os.path.join(IMPORT_FOLDER, str(household_id))) == []
+    os.rmdir(os.path.join(IMPORT_FOLDER, str(household_id)))
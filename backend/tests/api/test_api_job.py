@@ -0,0 +1,163 @@
+import time
+
+
+def _wait(client, household_id, job_id):
+    for _ in range(200):
+        response = client.get(f'/api/household/{household_id}/job/{job_id}')
+        assert response.status_code == 200
+        job = response.get_json()
+        if job['status'] in ('done', 'failed'):
+            return job
+        time.sleep(0.05)
+    raise AssertionError('job did not finish')
+
+
+def test_background_import(user_client_with_household, household_id):
+    data = {'background': True, 'items': [{'name': 'Flour'}],
+            'recipes': [{'name': 'Bread', 'items': [{'name': 'Flour'}]}]}
+    response = user_client_with_household.post(
+        f'/api/household/{household_id}/import', json=data)
+    assert response.status_code == 202
+    job = response.get_json()
+    assert job['type'] == 'import'
+    assert 'args' not in job
+
+    job = _wait(user_client_with_household, household_id, job['id'])
+    assert job['status'] == 'done'
+    assert job['progress'] == 1
+    assert 'recipes' in job['result']['phases']
+
+    response = user_client_with_household.get(f'/api/household/{household_id}/recipe')
+    assert [recipe['name'] for recipe in response.get_json()] == ['Bread']
+    response = user_client_with_household.get(f'/api/household/{household_id}/job')
+    assert [j['id'] for j in response.get_json()] == [job['id']]
+
+
+def test_background_import_with_photo(user_client_with_household, household_id, username):
+    import os
+    from app import db
+    from app.config import UPLOAD_FOLDER
+    from app.models import File, User
+
+    os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+    filename = 'job-test-photo.jpg'
+    with open(os.path.join(UPLOAD_FOLDER, filename), 'wb') as f:
+        f.write(b'photo')
+    db.session.add(File(filename=filename, created_by=User.find_by_username(username).id))
+    db.session.commit()
+
+    data = {'background': True,
+            'recipes': [{'name': 'Bread', 'photo': filename},
+                        {'name': 'Cake', 'photo': filename}]}
+    response = user_client_with_household.post(
+        f'/api/household/{household_id}/import', json=data)
+    assert response.status_code == 202
+    job = _wait(user_client_with_household, household_id, response.get_json()['id'])
+    assert job['status'] == 'done', job.get('error')
+
+    response = user_client_with_household.get(f'/api/household/{household_id}/recipe')
+    photos = {recipe['name']: recipe['photo'] for recipe in response.get_json()}
+    # the unused upload is taken over, the second recipe gets a copy
+    assert photos['Bread'] == filename
+    assert photos['Cake'] not in (None, filename)
+    for name in (filename, photos['Cake']):
+        os.remove(os.path.join(UPLOAD_FOLDER, name))
+
+
+def test_language_job(user_client_with_household, household_id):
+    response = user_client_with_household.post(
+        f'/api/household/{household_id}', json={'language': 'en'})
+    assert response.status_code == 200
+    response = user_client_with_household.get(f'/api/household/{household_id}/job')
+    job = response.get_json()[0]
+    assert job['type'] == 'importLanguage'
+
+    job = _wait(user_client_with_household, household_id, job['id'])
+    assert job['status'] == 'done'
+    response = user_client_with_household.get(f'/api/household/{household_id}/item')
+    items = response.get_json()
+    assert len(items) == job['result'] > 0
+    assert len({item['name'].lower() for item in items}) == len(items)
+
+    # seeding again leaves the items as they are
+    response = user_client_with_household.post(
+        f'/api/household/{household_id}/job', json={'type': 'importLanguage'})
+    assert response.status_code == 202
+    job = _wait(user_client_with_household, household_id, response.get_json()['id'])
+    assert job['status'] == 'done'
+    assert job['result'] == 0
+
+
+def test_job_errors(user_client_with_household, household_id):
+    url = f'/api/household/{household_id}/job'
+    response = user_client_with_household.post(url, json={'type': 'unknown'})
+    assert response.status_code == 400
+    response = user_client_with_household.post(
+        url, json={'type': 'import', 'args': {'items': [{'icon': 'no name'}]}})
+    assert response.status_code == 400
+    response = user_client_with_household.get(f'{url}/1000')
+    assert response.status_code == 404
+
+
+def test_upgrade_default_items(user_client_with_household, household_id):
+    from app import db
+    from app.models import Household
+    from app.service.import_language import (
+        findOutdatedHouseholds, templateHash, upgradeDefaultItems)
+
+    response = user_client_with_household.post(
+        f'/api/household/{household_id}', json={'language': 'en'})
+    assert response.status_code == 200
+    job = user_client_with_household.get(f'/api/household/{household_id}/job').get_json()[0]
+    assert _wait(user_client_with_household, household_id, job['id'])['status'] == 'done'
+    db.session.expire_all()
+    assert Household.find_by_id(household_id).default_items_hash == templateHash('en')
+    assert findOutdatedHouseholds() == []
+
+    # a changed template upgrades the household again, without touching its version
+    household = Household.find_by_id(household_id)
+    household.default_items_hash = 'outdated'
+    db.session.commit()
+    version = household.version
+    assert findOutdatedHouseholds() == [(household_id, 'en')]
+    assert upgradeDefaultItems(findOutdatedHouseholds()) == 0
+    db.session.expire_all()
+    household = Household.find_by_id(household_id)
+    assert household.default_items_hash == templateHash('en')
+    assert household.version == version
+
+
+def test_fail_stale_jobs(user_client_with_household, household_id):
+    import os
+    from datetime import datetime, timezone
+    from app import db
+    from app.config import IMPORT_FOLDER, JOB_TIMEOUT
+    from app.jobs.background import failStaleJobs, runJob
+    from app.models import Job
+
+    # jobs of a process that was stopped, and one that was just enqueued
+    filename = f'{"0" * 32}.json'
+    path = os.path.join(IMPORT_FOLDER, str(household_id), filename)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    open(path, 'w').close()
+    spooled = Job(type='importFile', household_id=household_id,
+                  args={'filename': filename, 'recipe_overwrite': False}).save()
+    running = Job(type='import', household_id=household_id, status=Job.RUNNING, args={}).save()
+    pending = Job(type='import', household_id=household_id, args={}).save()
+    Job.query.filter(Job.id.in_([spooled.id, running.id])).update(
+        {Job.updated_at: datetime.now(timezone.utc) - JOB_TIMEOUT})
+    db.session.commit()
+
+    assert failStaleJobs() == 2
+    response = user_client_with_household.get(f'/api/household/{household_id}/job/{spooled.id}')
+    assert response.get_json()['status'] == 'failed'
+    assert response.get_json()['error'] == 'Timed out'
+    assert not os.path.exists(path)
+    db.session.expire_all()
+    assert Job.find_by_id(running.id).status == Job.FAILED
+    assert Job.find_by_id(pending.id).status == Job.PENDING
+
+    # late deliveries of failed jobs are not run
+    runJob(spooled.id)
+    assert Job.find_by_id(spooled.id).attempts == 0
+    assert failStaleJobs() == 0
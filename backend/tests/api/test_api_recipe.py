@@ -91,4 +91,102 @@ def test_recipe_deletion(user_client_with_household, recipe_with_items):
 
     # Verify deletion
     response = user_client_with_household.get(f'/api/recipe/{recipe_id}')
-    assert response.status_code != 200  # Should not be found
\ No newline at end of file
+    assert response.status_code != 200  # Should not be found
+
+def test_recipe_projection(user_client_with_household, household_id, planned_recipe):
+    """Test sparse fieldsets of recipe lists"""
+    url = f'/api/household/{household_id}/recipe'
+    response = user_client_with_household.post(
+        f'/api/recipe/{planned_recipe}', json={'tags': ['dinner']})
+    assert response.status_code == 200
+    full = user_client_with_household.get(url).get_json()
+
+    response = user_client_with_household.get(url, query_string={'view': 'summary'})
+    assert response.status_code == 200
+    summary = response.get_json()
+    assert summary == [{k: e[k] for k in e if k in
+                        ('id', 'name', 'photo', 'photo_hash', 'time', 'cook_time', 'prep_time', 'yields')}
+                       for e in full]
+    # the key is kept without photo, like in the full representation
+    assert summary[0]['photo_hash'] is None
+
+    response = user_client_with_household.get(
+        url, query_string={'fields': ','.join(full[0].keys())})
+    assert response.status_code == 200
+    assert response.get_json() == full
+
+    response = user_client_with_household.get(url, query_string={'fields': 'id,password'})
+    assert response.status_code == 400
+
+    response = user_client_with_household.get(
+        f'/api/household/{household_id}/recipe/search',
+        query_string={'query': full[0]['name'], 'fields': 'id,tags'})
+    assert response.get_json() == [{'id': planned_recipe, 'tags': full[0]['tags']}]
+
+    response = user_client_with_household.post(
+        f'/api/household/{household_id}/recipe/filter',
+        json={'filter': ['dinner'], 'fields': 'id,items'})
+    assert response.get_json() == [{'id': planned_recipe, 'items': full[0]['items']}]
+
+    response = user_client_with_household.get(
+        f'/api/household/{household_id}/planner/recipes',
+        query_string={'fields': 'name,planned,planned_days'})
+    assert response.get_json() == [
+        {'name': full[0]['name'], 'planned': True, 'planned_days': [0]}]
+
+
+def test_recipe_pagination(user_client_with_household, household_id):
+    """Test keyset pagination of recipe lists"""
+    url = f'/api/household/{household_id}/recipe'
+    for name in ['Pasta', 'Curry', 'Bread', 'Curry', 'Soup']:
+        response = user_client_with_household.post(
+            url, json={'name': name, 'description': '', 'tags': ['dinner']})
+        assert response.status_code == 200
+
+    response = user_client_with_household.get(url, query_string={'limit': 3})
+    assert response.status_code == 200
+    first = response.get_json()
+    assert [e['name'] for e in first] == ['Bread', 'Curry', 'Curry']
+    assert 'items' in first[0]
+
+    response = user_client_with_household.get(url, query_string={
+        'limit': 3, 'view': 'summary', 'cursor': response.headers['X-Next-Cursor']})
+    assert [e['name'] for e in response.get_json()] == ['Pasta', 'Soup']
+    assert 'X-Next-Cursor' not in response.headers
+
+    response = user_client_with_household.post(
+        f'{url}/filter', json={'filter': ['dinner'], 'limit': 2, 'fields': 'id'})
+    ids = [e['id'] for e in response.get_json()]
+    response = user_client_with_household.post(
+        f'{url}/filter', json={'filter': ['dinner'], 'limit': 2, 'fields': 'id',
+                               'cursor': response.headers['X-Next-Cursor']})
+    ids += [e['id'] for e in response.get_json()]
+    assert ids == [e['id'] for e in first] + [ids[3]]
+    assert len(set(ids)) == 4
+
+
+def test_recipe_streaming(user_client_with_household, household_id, recipe_with_items):
+    """Test streamed recipe lists and exports"""
+    url = f'/api/household/{household_id}/recipe'
+    response = user_client_with_household.post(
+        f'/api/recipe/{recipe_with_items}', json={'tags': ['dinner']})
+    assert response.status_code == 200
+    plain = user_client_with_household.get(url)
+    response = user_client_with_household.get(url, query_string={'stream': True})
+    assert response.status_code == 200
+    assert response.is_streamed
+    assert response.get_data() == plain.get_data()
+
+    response = user_client_with_household.get(f'/api/household/{household_id}/export/recipes')
+    assert response.is_streamed
+    recipes = response.get_json()['recipes']
+    assert recipes[0]['tags'] == ['dinner']
+    assert recipes[0]['items'][0]['description'] == '2 pieces'
+
+    response = user_client_with_household.get(f'/api/household/{household_id}/export')
+    assert response.status_code == 200
+    export = response.get_json()
+    assert export['recipes'] == recipes
+    assert export['items'][0]['name'] == recipes[0]['items'][0]['name']
+    assert export['expenses'] == []
+    assert list(export.keys()) == sorted(export.keys())
@@ -0,0 +1,148 @@
+import pytest
+from unittest import mock
+from app import app, socketio
+
+
+@pytest.fixture
+def socket_client():
+    # the server outlives the test, clients left in rooms would receive
+    # the events of the next test's household
+    clients = []
+
+    def connect(client, **kwargs):
+        socket = socketio.test_client(
+            app,
+            flask_test_client=client,
+            headers={'Authorization': client.environ_base['HTTP_AUTHORIZATION']},
+            **kwargs,
+        )
+        clients.append(socket)
+        return socket
+
+    yield connect
+    for socket in clients:
+        if socket.is_connected():
+            socket.disconnect()
+
+
+def test_socket_replay(socket_client, user_client_with_household, household_id, shoppinglist_id):
+    socket = socket_client(user_client_with_household)
+    assert socket.is_connected()
+    cursors = socket.emit('reconnect', {}, callback=True)
+    seq = next(c['seq'] for c in cursors if c['household_id'] == household_id)
+    socket.disconnect()
+
+    # events while the client was offline, another client is still online
+    other = socket_client(user_client_with_household)
+    for name in ['milk', 'eggs']:
+        response = user_client_with_household.post(
+            f'/api/shoppinglist/{shoppinglist_id}/add-item-by-name', json={'name': name})
+        assert response.status_code == 200
+    other.disconnect()
+
+    socket = socket_client(user_client_with_household)
+    socket.get_received()
+    socket.emit('reconnect', {'households': [{'household_id': household_id, 'seq': seq}]}, callback=True)
+    received = socket.get_received()
+    assert [e['name'] for e in received] == ['shoppinglist_item:add'] * 2
+    assert [e['args'][0]['item']['name'] for e in received] == ['milk', 'eggs']
+    assert [e['args'][0]['seq'] for e in received] == [str(int(seq) + 1), str(int(seq) + 2)]
+
+    # the events are shared, another process replays the same
+    from app.sockets.event_buffer import EventBuffer
+    replayed = EventBuffer(100).since(household_id, False, seq)
+    assert [data for _, data in replayed] == [e['args'][0] for e in received]
+
+    socket.emit('reconnect', {'households': [{'household_id': household_id, 'seq': 'unknown.1'}]}, callback=True)
+    received = socket.get_received()
+    assert [e['name'] for e in received] == ['resync']
+
+
+def test_socket_no_listeners(socket_client, user_client_with_household, household_id, shoppinglist_id):
+    from app.models import ShoppinglistItems, SocketRoom
+
+    socket = socket_client(user_client_with_household)
+    cursors = socket.emit('reconnect', {}, callback=True)
+    seq = next(c['seq'] for c in cursors if c['household_id'] == household_id)
+    socket.disconnect()
+
+    # nobody is connected, so no payload is built or sent
+    with mock.patch.object(ShoppinglistItems, 'obj_to_item_dict', autospec=True,
+                           side_effect=ShoppinglistItems.obj_to_item_dict) as obj_to_item_dict:
+        response = user_client_with_household.post(
+            f'/api/shoppinglist/{shoppinglist_id}/add-item-by-name', json={'name': 'milk'})
+        assert response.status_code == 200
+        obj_to_item_dict.assert_not_called()
+    # one missed event makes clients resync, later ones are not numbered
+    skipped = SocketRoom.find_seq(household_id, False)
+    assert skipped == int(seq) + 1
+    response = user_client_with_household.post(
+        f'/api/shoppinglist/{shoppinglist_id}/add-item-by-name', json={'name': 'eggs'})
+    assert response.status_code == 200
+    assert SocketRoom.find_seq(household_id, False) == skipped
+
+    socket = socket_client(user_client_with_household)
+    socket.get_received()
+    socket.emit('reconnect', {'households': [{'household_id': household_id, 'seq': seq}]}, callback=True)
+    assert [e['name'] for e in socket.get_received()] == ['resync']
+
+
+def test_socket_slim_payload(socket_client, user_client_with_household, household_id, shoppinglist_id):
+    from app.models import Household
+
+    full = socket_client(user_client_with_household)
+    slim = socket_client(user_client_with_household, auth={'payload': 'slim'})
+    full.get_received()
+    slim.get_received()
+
+    response = user_client_with_household.post(
+        f'/api/shoppinglist/{shoppinglist_id}/add-item-by-name', json={'name': 'milk', 'description': '1L'})
+    assert response.status_code == 200
+    item_id = response.get_json()['id']
+
+    received = full.get_received()
+    assert len(received) == 1
+    assert received[0]['args'][0]['item']['name'] == 'milk'
+    received = slim.get_received()
+    assert len(received) == 1
+    data = received[0]['args'][0]
+    assert data['shoppinglist_id'] == shoppinglist_id
+    assert data['item_id'] == item_id
+    assert data['description'] == '1L'
+    assert data['version'] == Household.find_version(household_id)
+    assert 'item' not in data
+
+
+def test_socket_events_after_commit(socket_client, user_client_with_household, household_id, shoppinglist_id):
+    from app import db
+    from app.models import Household, Shoppinglist
+    from app.service.socket_events import emitHouseholdEvent
+
+    full = socket_client(user_client_with_household)
+    slim = socket_client(user_client_with_household, auth={'payload': 'slim'})
+    full.get_received()
+    slim.get_received()
+    items = []
+    for name in ['milk', 'eggs']:
+        response = user_client_with_household.post(
+            f'/api/household/{household_id}/item', json={'name': name})
+        assert response.status_code == 200
+        items.append({'id': response.get_json()['id'], 'name': name, 'description': '2'})
+
+    # the events are emitted inside the request transaction, they are
+    # numbered and sent once it is committed
+    response = user_client_with_household.post(
+        f'/api/shoppinglist/{shoppinglist_id}/recipeitems', json={'items': items})
+    assert response.status_code == 200
+    received = full.get_received()
+    assert [e['args'][0]['item']['name'] for e in received] == ['milk', 'eggs']
+    assert int(received[1]['args'][0]['seq']) == int(received[0]['args'][0]['seq']) + 1
+    received = slim.get_received()
+    assert [e['args'][0]['item_id'] for e in received] == [i['id'] for i in items]
+    assert [e['args'][0]['version'] for e in received] == [Household.find_version(household_id)] * 2
+
+    # nothing is sent for rolled back transactions
+    db.session.add(Shoppinglist(name='rolled back', household_id=household_id))
+    emitHouseholdEvent('shoppinglist:add', {'shoppinglist': {}}, household_id)
+    db.session.rollback()
+    assert full.get_received() == []
@@ -0,0 +1,67 @@
+import os
+import time
+import pytest
+
+
+@pytest.fixture
+def upload_folder(monkeypatch, tmp_path):
+    monkeypatch.setattr('app.service.delete_unused.UPLOAD_FOLDER', str(tmp_path))
+    return tmp_path
+
+
+def _upload(folder, filename, age=0):
+    path = folder / filename
+    path.write_bytes(b'photo')
+    modified = time.time() - age
+    os.utime(path, (modified, modified))
+    return path
+
+
+def test_delete_unused_files(user_client_with_household, recipe_with_items, upload_folder):
+    from app import db
+    from app.models import File, Recipe
+    from app.service.delete_unused import deleteUnusedFiles, unusedFilesQuery
+
+    for i in range(5):
+        db.session.add(File(filename=f'unused{i}.jpg'))
+        _upload(upload_folder, f'unused{i}.jpg')
+    db.session.add(File(filename='used.jpg'))
+    _upload(upload_folder, 'used.jpg')
+    Recipe.find_by_id(recipe_with_items).photo = 'used.jpg'
+    db.session.commit()
+
+    assert [f for (f,) in unusedFilesQuery()] == [f'unused{i}.jpg' for i in range(5)]
+
+    assert deleteUnusedFiles(dry_run=True, batch_size=2) == 5
+    assert File.query.count() == 6
+    assert len(os.listdir(upload_folder)) == 6
+
+    assert deleteUnusedFiles(batch_size=2) == 5
+    assert [f.filename for f in File.query.all()] == ['used.jpg']
+    assert os.listdir(upload_folder) == ['used.jpg']
+    assert unusedFilesQuery().count() == 0
+
+
+def test_delete_orphaned_uploads(user_client_with_household, upload_folder):
+    from datetime import timedelta
+    from app import db
+    from app.models import File
+    from app.service.delete_unused import deleteOrphanedUploads
+
+    db.session.add(File(filename='known.jpg'))
+    db.session.commit()
+    _upload(upload_folder, 'known.jpg', age=7200)
+    for i in range(3):
+        _upload(upload_folder, f'orphan{i}.jpg', age=7200)
+    # the database entry of an upload in progress is not committed yet
+    _upload(upload_folder, 'uploading.jpg')
+    (upload_folder / 'directory').mkdir()
+
+    assert deleteOrphanedUploads(dry_run=True, batch_size=2) == 3
+    assert len(os.listdir(upload_folder)) == 6
+
+    assert deleteOrphanedUploads(batch_size=2) == 3
+    assert sorted(os.listdir(upload_folder)) == ['directory', 'known.jpg', 'uploading.jpg']
+
+    assert deleteOrphanedUploads(grace_period=timedelta(0)) == 1
+    assert sorted(os.listdir(upload_folder)) == ['directory', 'known.jpg']
@@ -0,0 +1,15 @@
+import gzip
+import brotli
+import pytest
+from app.util import ResponseCompressor
+
+
+@pytest.mark.parametrize("encoding,decompress", [
+    ("gzip", gzip.decompress),
+    ("br", brotli.decompress),
+])
+def test_compress_stream(encoding, decompress):
+    chunks = [f'{{"id":{i},"name":"item {i}"}}\n' for i in range(1000)]
+    compressed = b"".join(ResponseCompressor().compress_stream(iter(chunks), encoding))
+    assert decompress(compressed) == "".join(chunks).encode()
+    assert len(compressed) < len("".join(chunks)) / 4
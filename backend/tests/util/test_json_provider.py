@@ -0,0 +1,59 @@
+import json
+import pytest
+from unittest import mock
+from datetime import datetime
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+from app.util import KitchenOwlJSONProvider
+
+
+@pytest.fixture
+def provider():
+    return KitchenOwlJSONProvider(Flask(__name__))
+
+
+@pytest.mark.parametrize("obj", [
+    {"b": 1, "a": [1.5, 0.1, -0.0, 1e15, None, True]},
+    {"name": "Käse", "emoji": "🧀"},
+    {"control": "\x00\x1f\x7f\n\t\"\\/"},
+    {"exponent": [1e16, 1e-7, 2.5e-5]},
+    {"small": [1e-5, -9.99e-5, 0.0001, [2.5e-5]]},
+    {"text": "a,1e5 and :0.00001"},
+    {"big": 2**70},
+    {1: "int key", 2: "other"},
+    {"date": datetime(2024, 3, 1, 12, 30, 15, 123456)},
+    [{"created_at": datetime(1970, 1, 1)}, {"updated_at": datetime(2038, 1, 19)}],
+    # top-level scalars
+    1e16, -1e22, 1e-7, 2.5e-5, 1.5, 42, 2**70, "1e5", None, True,
+    datetime(2024, 3, 1),
+])
+def test_dumps_matches_stdlib(provider, obj):
+    expected = json.dumps(
+        obj,
+        default=provider.default,
+        ensure_ascii=True,
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    assert provider.dumps(obj, separators=(",", ":")) == expected
+
+
+def test_dumps_non_compact_uses_stdlib(provider):
+    obj = {"b": [1, 2], "a": datetime(2024, 3, 1)}
+    assert provider.dumps(obj) == DefaultJSONProvider.dumps(provider, obj)
+    assert provider.dumps(obj, indent=2) == DefaultJSONProvider.dumps(
+        provider, obj, indent=2
+    )
+
+
+@pytest.mark.parametrize("obj", [
+    {"id": "3e8f1c2e-0e4b-4a1e-9e2d-1f0e5e7e9e0e", "blur_hash": "L6PZfSi_.AyE_3t7t7R**0o#DgR4"},
+    {"name": "Käse", "emoji": "🧀", "amount": 1.5},
+    [0.1, 12.25, -3.0],
+])
+def test_dumps_without_fallback(provider, obj):
+    with mock.patch.object(DefaultJSONProvider, "dumps", side_effect=AssertionError):
+        res = provider.dumps(obj, separators=(",", ":"))
+    assert res == json.dumps(
+        obj, ensure_ascii=True, sort_keys=True, separators=(",", ":")
+    )
@@ -0,0 +1,44 @@
+import multiprocessing
+import pytest
+from app import app
+from app.jobs import scheduler_lock
+from app.jobs.scheduler_lock import SchedulerLock
+
+
+@pytest.fixture
+def lock_file(monkeypatch, tmp_path):
+    monkeypatch.setattr(scheduler_lock, "LOCK_FILE", str(tmp_path / "scheduler.lock"))
+    with app.app_context():
+        yield tmp_path / "scheduler.lock"
+
+
+def _hold(acquired, done):
+    lock = SchedulerLock()
+    acquired.put(lock.acquire())
+    done.wait(10)
+
+
+def test_second_holder_is_refused(lock_file):
+    leader = SchedulerLock()
+    assert leader.acquire()
+    # the leader keeps the lock on its next trigger
+    assert leader.acquire()
+    other = SchedulerLock()
+    assert not other.acquire()
+    assert other._file is None
+
+
+def test_lock_is_released_on_exit(lock_file):
+    context = multiprocessing.get_context("fork")
+    acquired, done = context.Queue(), context.Event()
+    process = context.Process(target=_hold, args=(acquired, done))
+    process.start()
+    try:
+        assert acquired.get(timeout=10)
+        assert lock_file.read_text() == str(process.pid)
+        assert not SchedulerLock().acquire()
+    finally:
+        done.set()
+        process.join(10)
+    assert process.exitcode == 0
+    assert SchedulerLock().acquire()
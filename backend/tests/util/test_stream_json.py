@@ -0,0 +1,47 @@
+import pytest
+from unittest import mock
+from datetime import datetime
+from flask import Flask
+from app.util import KitchenOwlJSONProvider
+from app.util.stream_json import json_stream_response, stream_json
+
+
+def test_stream_json_matches_jsonify():
+    app = Flask(__name__)
+    app.json = KitchenOwlJSONProvider(app)
+    rows = [{"name": f"row {i}", "date": datetime(2024, 1, 1), "ü": [i]} for i in range(100)]
+    obj = {"b": "settings", "rows": rows, "a": {"empty": []}}
+    with app.app_context():
+        expected = app.json.response(obj).get_data(as_text=True)
+        streamed = {**obj, "rows": iter(rows)}
+        chunks = list(stream_json(streamed, chunk_size=100))
+        assert len(chunks) > 1
+        assert "".join(chunks) == expected
+        assert "".join(stream_json(iter([]))) == "[]\n"
+
+
+def _failing(count):
+    for i in range(count):
+        yield {"row": i}
+    raise ValueError("database gone")
+
+
+def test_stream_json_response_errors():
+    app = Flask(__name__)
+    app.json = KitchenOwlJSONProvider(app)
+
+    @app.route("/rows/<int:count>")
+    def rows(count):
+        return json_stream_response({"rows": _failing(count)})
+
+    client = app.test_client()
+    # failing before the first chunk is a normal error response
+    assert client.get("/rows/10").status_code == 500
+
+    # later the response is aborted instead of ending as truncated JSON
+    response = client.get("/rows/10000")
+    assert response.status_code == 200
+    with mock.patch.object(app.logger, "error") as error:
+        with pytest.raises(ValueError):
+            response.get_data()
+    error.assert_called_once()
@@ -0,0 +1,33 @@
+import io
+import json
+import pytest
+from app.errors import InvalidUsage
+from app.util.stream_json_parser import iter_json_object
+
+
+def _parse(text, chunk_size=3):
+    return list(iter_json_object(io.BytesIO(text.encode()), chunk_size))
+
+
+def test_elements_and_values():
+    data = {
+        'items': [{'name': 'Äpfel'}, {'name': 'x' * 50, 'n': 12345}],
+        'empty': [],
+        'name': 'Home',
+        'count': 1234567,
+        'flag': True,
+    }
+    assert _parse(json.dumps(data, ensure_ascii=False)) == [
+        ('items', 0, {'name': 'Äpfel'}),
+        ('items', 1, {'name': 'x' * 50, 'n': 12345}),
+        ('name', None, 'Home'),
+        ('count', None, 1234567),
+        ('flag', None, True),
+    ]
+    assert _parse(' { } ') == []
+
+
+@pytest.mark.parametrize('text', ['', '[]', '{"a": [1, 2}', '{"a": 1', '{"a": 1} x', '{1: 2}'])
+def test_invalid(text):
+    with pytest.raises(InvalidUsage):
+        _parse(text)
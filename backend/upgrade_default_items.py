@@ -1,14 +1,16 @@
+import os
 from tqdm import tqdm
 from app import app
-from app.errors import NotFoundRequest
-from app.models import Household
-from app.service.import_language import importLanguage
+from app.service.import_language import findOutdatedHouseholds, upgradeDefaultItems
 
 
 if __name__ == "__main__":
-    with app.app_context():
-        for household in tqdm(Household.query.filter(Household.language != None).all(), desc="Upgrading households"):
-            try:
-                importLanguage(household.id, household.language, bulkSave=True)
-            except NotFoundRequest:
-                pass
+    households = findOutdatedHouseholds()
+    with tqdm(total=len(households), desc="Upgrading households") as bar:
+        failed = upgradeDefaultItems(
+            households,
+            int(os.getenv("UPGRADE_DEFAULT_ITEMS_WORKERS", "4")),
+            lambda: bar.update(),
+        )
+    if failed:
+        app.logger.warning(f"Upgrading the default items of {failed} households failed")